@@ -1,14 +1,15 @@
-import os
 import re
-from openai import OpenAI
 
-# Environment variables
-client = OpenAI()
-client.api_key = os.getenv("OPENAI_API_KEY")
+from utils.constants import LLM_CACHE, LLM_CACHE_DIR, LLM_REPLAY_SESSION
+from gpt.llm_cache import LLMCache
+from gpt.llm_backends import complete, llm_model
+
+llm_cache = LLMCache(LLM_CACHE, LLM_CACHE_DIR, LLM_REPLAY_SESSION)
+
 
 def request_gpt(system_content, user_contents, temperature):
     '''
-    Function to make an API call to GPT-4
+    Function to request an options file from the configured LLM backend
 
     Parameters:
     - system_content: string containing the system information
@@ -22,28 +23,16 @@ def request_gpt(system_content, user_contents, temperature):
     Returns:
     - matches: string containing the options file generated by GPT-4
     '''
-    messages = [{"role": "system", "content": system_content}]
-    for content in user_contents:
-        messages.append({"role": "user", "content": content})
-
-
-    # Assuming 'client' is already defined and authenticated for GPT-4 API access
-    completion = client.chat.completions.create(
-        model="gpt-4-0125-preview",
-        messages=messages,
-        temperature=temperature,
-        max_tokens=4096,
-        frequency_penalty=0,
-        presence_penalty=0,
-    )
-
-    # Extract the assistant's reply
-    assistant_reply = completion.choices[0].message.content
+    def fetch():
+        return complete(system_content, user_contents, temperature)
+
+    # The raw reply is cached, so a change of the parsing below can be replayed
+    assistant_reply = llm_cache.request(llm_model(), system_content, user_contents, temperature, fetch)
     matches = re.match("[\s\S]*```([\s\S]*)```([\s\S]*)", assistant_reply)
 
     # Check if result is good
     if matches is not None:
-        return matches 
+        return matches
 
     # Invalid response
     with open("invalid_assistant_reply.txt", "a") as file:
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import threading
+
+from options_files.ops_options_file import parse_gpt_text_to_dict
+from gpt.prompt_budget import estimate_tokens
+from utils.utils import log_update
+from utils.constants import LLM_BACKEND, LLM_MODEL, LLM_BASE_URL, OUTPUT_PATH
+
+# Option edits of the rules backend
+# - option: The option name
+# - step: Function computing the new value from the current one
+# - limit: The value the option is not moved past
+RULES = [
+    {"option": "write_buffer_size", "step": lambda value: value * 2, "limit": 256 * 1024 * 1024},
+    {"option": "max_write_buffer_number", "step": lambda value: value + 1, "limit": 6},
+    {"option": "max_background_jobs", "step": lambda value: value + 2, "limit": 16},
+    {"option": "target_file_size_base", "step": lambda value: value * 2, "limit": 256 * 1024 * 1024},
+    {"option": "max_bytes_for_level_base", "step": lambda value: value * 2, "limit": 2 * 1024 * 1024 * 1024},
+    {"option": "level0_file_num_compaction_trigger", "step": lambda value: value + 2, "limit": 8},
+    {"option": "min_write_buffer_number_to_merge", "step": lambda value: value + 1, "limit": 2},
+    {"option": "max_subcompactions", "step": lambda value: value + 1, "limit": 4},
+    {"option": "block_size", "step": lambda value: value * 2, "limit": 64 * 1024},
+    {"option": "bytes_per_sync", "step": lambda value: value * 2 or 1024 * 1024, "limit": 8 * 1024 * 1024},
+    {"option": "wal_bytes_per_sync", "step": lambda value: value * 2 or 1024 * 1024, "limit": 8 * 1024 * 1024},
+    {"option": "compaction_readahead_size", "step": lambda value: value * 2, "limit": 8 * 1024 * 1024},
+]
+
+clients = {}
+clients_lock = threading.Lock()
+metrics_lock = threading.Lock()
+METRICS_FILE = os.path.join(OUTPUT_PATH, "llm_metrics.jsonl")
+
+
+def get_client(base_url=None, api_key=None):
+    '''
+    Get the OpenAI client of an endpoint, created on the first call
+
+    Parameters:
+    - base_url (str): The endpoint, None for the OpenAI API
+    - api_key (str): The API key, None for OPENAI_API_KEY
+
+    Returns:
+    - client (OpenAI): The client
+    '''
+    # Imported here, hosts using the rules backend do not need the openai package
+    from openai import OpenAI
+
+    with clients_lock:
+        if base_url not in clients:
+            clients[base_url] = OpenAI(base_url=base_url, api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        return clients[base_url]
+
+
+def complete_openai_compatible(client, model, system_content, user_contents, temperature):
+    messages = [{"role": "system", "content": system_content}]
+    for content in user_contents:
+        messages.append({"role": "user", "content": content})
+
+    completion = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=4096,
+        frequency_penalty=0,
+        presence_penalty=0,
+    )
+    usage = completion.usage
+    # Extract the assistant's reply
+    return completion.choices[0].message.content, {
+        "prompt_tokens": usage.prompt_tokens if usage is not None else None,
+        "completion_tokens": usage.completion_tokens if usage is not None else None,
+    }
+
+
+def complete_openai(model, system_content, user_contents, temperature):
+    return complete_openai_compatible(get_client(LLM_BASE_URL), model, system_content, user_contents, temperature)
+
+
+def complete_local(model, system_content, user_contents, temperature):
+    # Local servers (vLLM, llama.cpp, Ollama) speak the OpenAI API and ignore the key
+    if LLM_BASE_URL is None:
+        raise ValueError("The local LLM backend needs --llm_base_url, e.g. http://localhost:8000/v1")
+    client = get_client(LLM_BASE_URL, os.getenv("OPENAI_API_KEY") or "local")
+    return complete_openai_compatible(client, model, system_content, user_contents, temperature)
+
+
+def complete_rules(model, system_content, user_contents, temperature):
+    '''
+    Deterministic stand-in for an LLM, it moves a few well known options one step
+
+    The options are read from the code blocks of the user contents, the last value of an
+    option wins. The temperature picks where the rule list starts, so candidates generated
+    with a temperature ladder differ.
+    '''
+    options = {}
+    for content in user_contents:
+        blocks = content.split("```")[1::2]
+        for block in blocks:
+            options.update(parse_gpt_text_to_dict(block))
+
+    start = int(round(temperature * 10)) % len(RULES)
+    changes = []
+    for rule in RULES[start:] + RULES[:start]:
+        try:
+            value = int(options[rule["option"]])
+        except (KeyError, ValueError):
+            continue
+        new_value = min(rule["step"](value), rule["limit"])
+        if new_value != value:
+            changes.append((rule["option"], value, new_value))
+        if len(changes) == 10:
+            break
+
+    reasoning = "The rules backend moves each known option one step towards its limit:\n"
+    reasoning += "".join(f"- {option}: {value} -> {new_value}\n" for option, value, new_value in changes)
+    options_text = "".join(f"{option}: {new_value}\n" for option, _, new_value in changes)
+    reply = f"{reasoning}```\n{options_text}```\n"
+    return reply, {
+        "prompt_tokens": estimate_tokens(system_content) + sum(estimate_tokens(content) for content in user_contents),
+        "completion_tokens": estimate_tokens(reply),
+    }
+
+
+# LLM backends
+# - complete: Function (model, system_content, user_contents, temperature) returning
+#   the reply and its token usage
+# - model: The model used when --llm_model is not set
+LLM_BACKENDS = {
+    "openai": {
+        "complete": complete_openai,
+        "model": "gpt-4-0125-preview",
+    },
+    "local": {
+        "complete": complete_local,
+        "model": "local",
+    },
+    "rules": {
+        "complete": complete_rules,
+        "model": "rules",
+    },
+}
+
+
+def get_llm_backend():
+    '''
+    Get the configured LLM backend
+
+    Returns:
+    - backend (dict): The backend description
+    '''
+    backend = LLM_BACKENDS.get(LLM_BACKEND)
+    if backend is None:
+        raise ValueError(f"No LLM backend named {LLM_BACKEND}, choose from {list(LLM_BACKENDS)}")
+    return backend
+
+
+def llm_model():
+    '''
+    Get the model requested from the backend
+
+    Returns:
+    - model (str): --llm_model, or the default model of the backend
+    '''
+    return LLM_MODEL or get_llm_backend()["model"]
+
+
+def complete(system_content, user_contents, temperature):
+    '''
+    Request a reply from the configured backend and record its latency and token usage
+
+    Parameters:
+    - system_content (str): The system message
+    - user_contents (list): The user messages
+    - temperature (float): The sampling temperature
+
+    Returns:
+    - reply (str): The raw assistant reply
+    '''
+    model = llm_model()
+    start = time.monotonic()
+    reply, usage = get_llm_backend()["complete"](model, system_content, user_contents, temperature)
+    latency = time.monotonic() - start
+
+    log_update(f"[LLM] {LLM_BACKEND}/{model} replied in {latency:.2f}s, "
+               f"{usage['prompt_tokens']} prompt and {usage['completion_tokens']} completion tokens")
+    with metrics_lock:
+        with open(METRICS_FILE, "a") as f:
+            f.write(json.dumps({"backend": LLM_BACKEND, "model": model, "latency": latency,
+                                "temperature": temperature, **usage}) + "\n")
+    return reply
+
+
+def summarize_llm_metrics():
+    '''
+    Function to summarize the LLM calls of the run
+
+    Returns:
+    - summary (dict): The number of calls, their total and average latency and their tokens,
+      None if there was no call
+    '''
+    if not os.path.exists(METRICS_FILE):
+        return None
+    with open(METRICS_FILE, "r") as f:
+        calls = [json.loads(line) for line in f if line.strip()]
+    if not calls:
+        return None
+
+    total_latency = sum(call["latency"] for call in calls)
+    return {
+        "calls": len(calls),
+        "total_latency": total_latency,
+        "avg_latency": total_latency / len(calls),
+        "max_latency": max(call["latency"] for call in calls),
+        "prompt_tokens": sum(call["prompt_tokens"] or 0 for call in calls),
+        "completion_tokens": sum(call["completion_tokens"] or 0 for call in calls),
+    }
@@ -0,0 +1,168 @@
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+
+from utils.utils import log_update
+
+CACHE_MODES = ["off", "cache", "replay"]
+
+
+def request_key(model, system_content, user_contents, temperature):
+    '''
+    Function to compute the content address of a request
+
+    Parameters:
+    - model (str): The model name
+    - system_content (str): The system message
+    - user_contents (list): The user messages
+    - temperature (float): The sampling temperature
+
+    Returns:
+    - key (str): The SHA-256 of the request
+    '''
+    request = json.dumps([model, system_content, list(user_contents), round(float(temperature), 6)])
+    return hashlib.sha256(request.encode()).hexdigest()
+
+
+def write_json_atomic(path, data):
+    '''
+    Function to write a JSON file so that a reader never sees it half written
+    '''
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+class LLMCache:
+    '''
+    On-disk cache of the raw LLM replies
+
+    - replies/<key>.json: The request and every reply recorded for it. The n-th identical
+      request of a session is served the n-th reply, so retries of the same prompt still
+      get distinct samples
+    - sessions/<session>.jsonl: The (key, occurrence) of every request of a session, in order
+
+    In "cache" mode the recorded replies are served and the missing ones are requested and
+    recorded. In "replay" mode the requests of a recorded session are served without any
+    network access: the next recorded request with the same key, so concurrent requests may
+    complete in any order, or else the next recorded request, so a session still replays
+    when the prompts differ (e.g. the benchmark results of a new run).
+
+    Requests may be made from several threads.
+    '''
+
+    def __init__(self, mode, cache_dir, replay_session=None):
+        '''
+        Parameters:
+        - mode (str): "off", "cache" or "replay"
+        - cache_dir (str): The cache directory
+        - replay_session (str): The session file or name to replay, the latest one if None
+        '''
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode {mode}, choose from {CACHE_MODES}")
+        self.mode = mode
+        self.replies_dir = os.path.join(cache_dir, "replies")
+        self.sessions_dir = os.path.join(cache_dir, "sessions")
+        self.occurrences = {}
+        self.session_path = None
+        self.replay_entries = None
+        self.replay_served = set()
+        self.replay_session = replay_session
+        self.lock = threading.Lock()
+
+    def start_session(self):
+        if self.session_path is not None or self.replay_entries is not None:
+            return
+        if self.mode == "replay":
+            self.replay_entries = self._load_session(self.replay_session)
+            return
+        os.makedirs(self.replies_dir, exist_ok=True)
+        os.makedirs(self.sessions_dir, exist_ok=True)
+        session_name = f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S-%f')}_{os.getpid()}"
+        self.session_path = os.path.join(self.sessions_dir, f"{session_name}.jsonl")
+        log_update(f"[LLM] Recording the session in {self.session_path}")
+
+    def _load_session(self, session):
+        if session is None:
+            sessions = sorted(os.listdir(self.sessions_dir)) if os.path.isdir(self.sessions_dir) else []
+            if not sessions:
+                raise FileNotFoundError(f"No recorded session in {self.sessions_dir}")
+            session = sessions[-1]
+        if os.path.exists(session):
+            session_path = session
+        else:
+            session_path = os.path.join(self.sessions_dir, session if session.endswith(".jsonl") else f"{session}.jsonl")
+        log_update(f"[LLM] Replaying the session {session_path}")
+        with open(session_path, "r") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def request(self, model, system_content, user_contents, temperature, fetch):
+        '''
+        Get the reply of a request from the cache, or from fetch
+
+        Parameters:
+        - model (str): The model name
+        - system_content (str): The system message
+        - user_contents (list): The user messages
+        - temperature (float): The sampling temperature
+        - fetch (function): Called without arguments to request the reply when it is not recorded
+
+        Returns:
+        - reply (str): The raw assistant reply
+        '''
+        if self.mode == "off":
+            return fetch()
+
+        key = request_key(model, system_content, user_contents, temperature)
+        with self.lock:
+            self.start_session()
+            if self.mode == "replay":
+                return self._replay(key)
+
+            occurrence = self.occurrences.get(key, 0)
+            self.occurrences[key] = occurrence + 1
+            reply_path = os.path.join(self.replies_dir, f"{key}.json")
+            entry = self._read_entry(reply_path)
+
+        if occurrence < len(entry["replies"]) and entry["replies"][occurrence] is not None:
+            log_update(f"[LLM] Cache hit {key[:12]} #{occurrence}")
+            reply = entry["replies"][occurrence]
+        else:
+            # The request itself runs outside the lock, concurrent requests overlap
+            reply = fetch()
+            with self.lock:
+                entry = self._read_entry(reply_path)
+                entry.update({"model": model, "system_content": system_content,
+                              "user_contents": list(user_contents), "temperature": temperature})
+                # Keep the occurrence index, a concurrent identical request may have stored first
+                entry["replies"] += [None] * (occurrence + 1 - len(entry["replies"]))
+                entry["replies"][occurrence] = reply
+                write_json_atomic(reply_path, entry)
+
+        with self.lock:
+            with open(self.session_path, "a") as f:
+                f.write(json.dumps({"key": key, "occurrence": occurrence}) + "\n")
+        return reply
+
+    def _replay(self, key):
+        unserved = [index for index in range(len(self.replay_entries)) if index not in self.replay_served]
+        if not unserved:
+            raise RuntimeError(f"The replayed session has only {len(self.replay_entries)} requests")
+        matching = [index for index in unserved if self.replay_entries[index]["key"] == key]
+        index = matching[0] if matching else unserved[0]
+        if not matching:
+            log_update(f"[LLM] Replay request #{index} differs from the recorded one, serving the recorded reply")
+        self.replay_served.add(index)
+
+        recorded = self.replay_entries[index]
+        entry = self._read_entry(os.path.join(self.replies_dir, f"{recorded['key']}.json"))
+        return entry["replies"][recorded["occurrence"]]
+
+    def _read_entry(self, reply_path):
+        if not os.path.exists(reply_path):
+            return {"replies": []}
+        with open(reply_path, "r") as f:
+            return json.load(f)
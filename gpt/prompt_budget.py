@@ -0,0 +1,137 @@
+import re
+
+from options_files.ops_options_file import parse_option_file_to_dict
+from rocksdb.scoring import score
+from utils.utils import log_update
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text):
+    '''
+    Function to estimate the number of tokens of a text
+
+    BPE tokenizers split long words, e.g. option names, into pieces of about 4
+    characters and give most punctuation its own token.
+
+    Parameters:
+    - text (str): The text
+
+    Returns:
+    - tokens (int): The estimated number of tokens
+    '''
+    return sum((len(piece) + 3) // 4 for piece in TOKEN_PATTERN.findall(text))
+
+
+def compact_options_file(options):
+    '''
+    Function to drop the comments, blank lines and indentation of an options file
+
+    Parameters:
+    - options (str): The options file
+
+    Returns:
+    - options (str): The options file with only the sections and the options
+    '''
+    lines = [line.strip() for line in options.splitlines()]
+    return "\n".join(line for line in lines if line and not line.startswith("#"))
+
+
+def options_changes(old_options, new_options):
+    '''
+    Function to list the options whose value changed between two options files
+
+    Parameters:
+    - old_options (str): The previous options file
+    - new_options (str): The new options file
+
+    Returns:
+    - changes (list): (option, old value, new value) tuples
+    '''
+    old_sections = parse_option_file_to_dict(old_options)
+    new_sections = parse_option_file_to_dict(new_options)
+    changes = []
+    for section, options in new_sections.items():
+        old_section = old_sections.get(section, {})
+        for key, value in options.items():
+            if old_section.get(key) != value:
+                changes.append((key, old_section.get(key), value))
+    return changes
+
+
+def history_rows(previous_option_files):
+    '''
+    Function to encode every iteration as a row of the history table: its throughput,
+    its score against the initial options file and the options it changed
+
+    Parameters:
+    - previous_option_files (list): (options, benchmark results, reasoning, summary) tuples
+
+    Returns:
+    - rows (list): The table rows, one per iteration
+    '''
+    reference = previous_option_files[0][1]
+    rows = []
+    for index, (options, benchmark_result, _, _) in enumerate(previous_option_files):
+        if index == 0:
+            changes = "initial options file"
+        else:
+            changes = ", ".join(f"{key}: {old} -> {new}" for key, old, new in
+                                options_changes(previous_option_files[index - 1][0], options)) or "none"
+        rows.append(f"| {index} | {benchmark_result['ops_per_sec']} | "
+                    f"{score(benchmark_result, reference):+.3f} | {changes} |")
+    return rows
+
+
+def render_history_table(rows, omitted):
+    table = ("The options files tried so far, each changing the one before. "
+             "The score is relative to the initial options file, higher is better.\n"
+             "| Iteration | Operations per second | Score | Changed options |\n"
+             "|---|---|---|---|\n")
+    table += "\n".join(rows[:1])
+    if omitted:
+        table += f"\n| ... | {omitted} older iterations omitted | | |"
+    table += "".join(f"\n{row}" for row in rows[1:])
+    return table
+
+
+def fit_history(previous_option_files, fixed_contents, budget):
+    '''
+    Function to encode the history of the options files within a token budget
+
+    The history is a table of the changed options and the score of every iteration,
+    followed by the reasoning behind the latest iterations. The oldest reasoning is
+    dropped first, its changes stay in the table. If the table alone does not fit,
+    its oldest rows are dropped, the initial and the latest iterations are kept.
+
+    Parameters:
+    - previous_option_files (list): (options, benchmark results, reasoning, summary) tuples
+    - fixed_contents (list): The user contents always sent, they count against the budget
+    - budget (int): The token budget of the user contents
+
+    Returns:
+    - history_contents (list): The user contents encoding the history
+    '''
+    used = sum(estimate_tokens(content) for content in fixed_contents)
+    rows = history_rows(previous_option_files)
+    omitted = 0
+    table = render_history_table(rows, omitted)
+    while len(rows) > 2 and used + estimate_tokens(table) > budget:
+        rows.pop(1)
+        omitted += 1
+        table = render_history_table(rows, omitted)
+    used += estimate_tokens(table)
+
+    reasonings = []
+    for index in range(len(previous_option_files) - 1, 0, -1):
+        reasoning = previous_option_files[index][2]
+        content = f"The reasoning behind iteration {index} was:\n```\n{reasoning}\n```"
+        tokens = estimate_tokens(content)
+        if used + tokens > budget:
+            break
+        reasonings.insert(0, content)
+        used += tokens
+
+    log_update(f"[OG] Prompt history: {len(rows)} table rows ({omitted} omitted), "
+               f"{len(reasonings)} of {len(previous_option_files) - 1} reasonings, about {used} of {budget} tokens")
+    return [table] + reasonings
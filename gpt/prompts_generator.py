@@ -1,7 +1,9 @@
 import re
 from difflib import Differ
-from options_files.ops_options_file import cleanup_options_file
+from concurrent.futures import ThreadPoolExecutor
+from options_files.ops_options_file import cleanup_options_file, parse_gpt_text_to_dict
 from gpt.gpt_request import request_gpt
+from gpt.prompt_budget import fit_history, compact_options_file
 from utils.utils import log_update
 from dotenv import load_dotenv
 import utils.constants as constants
@@ -31,6 +33,9 @@ def generate_system_content(device_information, rocksdb_version):
     return content
 
 def generate_default_user_content(chunk_string, previous_option_files, average_cpu_used=-1.0, average_mem_used=-1.0, test_name="fillrandom"):
+    if constants.PROMPT_TOKEN_BUDGET:
+        return generate_budgeted_user_content(chunk_string, previous_option_files, average_cpu_used, average_mem_used, test_name)
+
     user_contents = []
     for _, benchmark_result, reasoning, _ in previous_option_files[1: -1]:
         benchmark_line = generate_benchmark_info(test_name, benchmark_result, average_cpu_used, average_mem_used)
@@ -44,7 +49,35 @@ def generate_default_user_content(chunk_string, previous_option_files, average_c
     user_contents.append("Based on these information generate a new file in same format as the options_file to improve my database performance. Enclose the new options file in ```.")
     return user_contents
 
+def generate_budgeted_user_content(chunk_string, previous_option_files, average_cpu_used=-1.0, average_mem_used=-1.0, test_name="fillrandom"):
+    """
+    Function to generate the user content within the --prompt_token_budget.
+
+    The history is sent as a compact table of the changed options and scores instead
+    of every past reasoning, see fit_history.
+
+    Parameters:
+    - chunk_string: The options the new file is based on, the whole file or a chunk of it.
+    - previous_option_files: List of (options, benchmark results, reasoning, summary) tuples.
+
+    Returns:
+    - list: The user contents.
+    """
+    _, benchmark_result, _, _ = previous_option_files[-1]
+    benchmark_line = generate_benchmark_info(test_name, benchmark_result, average_cpu_used, average_mem_used)
+    fixed_contents = [
+        f"Part of the current option file is:\n```\n{compact_options_file(chunk_string)}\n```\nThe benchmark results are: {benchmark_line}",
+        "Based on these information generate a new file in same format as the options_file to improve my database performance. Enclose the new options file in ```.",
+    ]
+    history_contents = fit_history(previous_option_files, fixed_contents, constants.PROMPT_TOKEN_BUDGET)
+    return history_contents + fixed_contents
+
 def generate_user_content_with_difference(previous_option_files, average_cpu_used=-1.0, average_mem_used=-1.0, test_name="fillrandom"):
+    if constants.PROMPT_TOKEN_BUDGET:
+        # The table holds the differences, the current file is sent once instead of the original and its diff
+        current_file, _, _, _ = previous_option_files[-1]
+        return generate_budgeted_user_content(current_file, previous_option_files, average_cpu_used, average_mem_used, test_name)
+
     result =" "
     user_content = []
 
@@ -110,7 +143,56 @@ def generate_benchmark_info(test_name, benchmark_result, average_cpu_used, avera
     
     if average_cpu_used != -1 and average_mem_used != -1:
         benchmark_line += f" CPU used: {average_cpu_used}%, Memory used: {average_mem_used}% during test."
-    
+
+    resource_summary = benchmark_result.get("resource_summary")
+    if resource_summary:
+        mib = 1024 * 1024
+        benchmark_line += (f" Per-second resource usage: CPU average {resource_summary['avg_cpu_percent']:.0f}% "
+                           f"(peak {resource_summary['peak_cpu_percent']:.0f}%), peak RSS {resource_summary['peak_rss_bytes'] / mib:.0f} MiB, "
+                           f"peak page cache {resource_summary['peak_page_cache_bytes'] / mib:.0f} MiB, "
+                           f"average read {resource_summary['avg_read_bytes_per_sec'] / mib:.1f} MiB/s, "
+                           f"average write {resource_summary['avg_write_bytes_per_sec'] / mib:.1f} MiB/s, "
+                           f"peak read/write IOPS {resource_summary['peak_read_iops']:.0f}/{resource_summary['peak_write_iops']:.0f}.")
+        if resource_summary.get("dip_seconds"):
+            benchmark_line += (f" Throughput fell below 70% of its median for {resource_summary['dip_seconds']} seconds, "
+                               f"during these dips CPU averaged {resource_summary['dip_avg_cpu_percent']:.0f}%, "
+                               f"reads {resource_summary['dip_avg_read_bytes_per_sec'] / mib:.1f} MiB/s and "
+                               f"writes {resource_summary['dip_avg_write_bytes_per_sec'] / mib:.1f} MiB/s.")
+
+    amplification = benchmark_result.get("amplification")
+    if amplification:
+        factors = [f"{name} amplification {amplification[key]:.2f}"
+                   for key, name in [("write", "write"), ("read", "read"), ("space", "space")]
+                   if amplification[key] is not None]
+        if factors:
+            benchmark_line += f" Measured on the device: {', '.join(factors)}."
+
+    statistics = benchmark_result.get("statistics")
+    if statistics:
+        rates = [f"{name.replace('_', ' ')} {rate * 100:.1f}%"
+                 for name, rate in statistics["hit_rates"].items() if rate is not None]
+        if rates:
+            benchmark_line += f" RocksDB statistics: {', '.join(rates)}."
+        latencies = [f"{operation} P50 {histogram['P50']:.1f} / P99 {histogram['P99']:.1f} us"
+                     for operation, histogram in statistics["latencies"].items()]
+        if latencies:
+            benchmark_line += f" Latencies: {', '.join(latencies)}."
+
+    log_summary = benchmark_result.get("log_summary")
+    if log_summary:
+        if log_summary["stall_seconds"] is not None:
+            benchmark_line += (f" The RocksDB LOG reports {log_summary['stall_seconds']:.1f} seconds of write stalls "
+                               f"({log_summary['stall_percent']:.1f}% of the run).")
+        if log_summary["stall_reasons"]:
+            reasons = ", ".join(f"{name} x{count}" for name, count in
+                                sorted(log_summary["stall_reasons"].items(), key=lambda item: -item[1]))
+            benchmark_line += f" Stall causes: {reasons}."
+        benchmark_line += f" There were {log_summary['flushes']} flushes and {log_summary['compactions']} compactions."
+        levels = [f"{level} {stats['files']} files {stats['size_mb']:.0f} MB"
+                  for level, stats in log_summary["levels"].items() if level != "Sum"]
+        if levels:
+            benchmark_line += f" LSM shape at the end: {', '.join(levels)}."
+
     return benchmark_line
 
 def midway_options_file_generation(options, avg_cpu_used, avg_mem_used, last_throughput, device_information, options_file):
@@ -179,11 +261,55 @@ def midway_options_file_generation(options, avg_cpu_used, avg_mem_used, last_thr
     matches = request_gpt(sys_content, user_content, 0.4)
 
     if matches is not None:
-        clean_options_file = cleanup_options_file(matches[1])
+        clean_options_file = cleanup_options_file(matches[1], options)
         reasoning = matches[0] + matches[2]
 
     return clean_options_file, reasoning, ""
 
+def merge_chunk_edits(chunk_replies):
+    '''
+    Function to merge the option changes proposed for each chunk of the options file
+
+    A chunk owns the options it was sent. Its value wins for these options, and a value
+    proposed for an option of another chunk is a conflict: it is logged and dropped.
+    Option names are compared case insensitively, like RocksDB reads them.
+
+    Parameters:
+    - chunk_replies (list): (chunk, proposed) tuples, the chunk options and the options parsed from its reply
+
+    Returns:
+    - edits (dict): The options to change, with their new value, named as in the chunk that owns them
+    '''
+    # The chunk option names by lowercase name
+    chunk_keys = [{key.lower(): key for key in chunk} for chunk, _ in chunk_replies]
+    owners = {}
+    for index, keys in enumerate(chunk_keys):
+        for key in keys:
+            owners[key] = index
+
+    edits = {}
+    foreign = []
+    for index, (chunk, proposed) in enumerate(chunk_replies):
+        for key, value in proposed.items():
+            key = key.lower()
+            if key in chunk_keys[index]:
+                original_key = chunk_keys[index][key]
+                if value != chunk[original_key]:
+                    edits[original_key] = value
+            elif key in owners:
+                foreign.append((index, key, value))
+
+    for index, key, value in foreign:
+        original_key = chunk_keys[owners[key]][key]
+        kept = edits.get(original_key, chunk_replies[owners[key]][0][original_key])
+        if value != kept:
+            log_update(f"[OG] Conflict on {key}: chunk {index} proposed {value}, "
+                       f"kept {kept} from chunk {owners[key]}")
+
+    log_update(f"[OG] Merged {len(edits)} option changes from {len(chunk_replies)} chunks")
+    return edits
+
+
 def generate_option_file_with_gpt(case, previous_option_files, device_information, temperature=0.4, average_cpu_used=-1.0, average_mem_used=-1.0, test_name="fillrandom", version="8.8.1"):
     """
     Function that generates an options file for RocksDB based on specified parameters and case scenarios.
@@ -213,7 +339,7 @@ def generate_option_file_with_gpt(case, previous_option_files, device_informatio
         matches = request_gpt(system_content, user_contents, temperature)
         # Process the GPT-generated response 
         if matches is not None:
-            clean_options_file = cleanup_options_file(matches[1])
+            clean_options_file = cleanup_options_file(matches[1], previous_option_file)
             reasoning = matches[0] + matches[2]
 
         return clean_options_file, reasoning, ""
@@ -251,16 +377,24 @@ def generate_option_file_with_gpt(case, previous_option_files, device_informatio
         chunk_strings = [
             '\n'.join([f"{key}: {value}" for key, value in chunk]) for chunk in chunks]
 
-        clean_options_file = ""
-        reasoning = ""
-
-        # Loop through each part and make API calls
-        for chunk_string in chunk_strings:
+        def request_chunk(chunk_string):
             user_contents = generate_default_user_content(chunk_string, previous_option_files, average_cpu_used, average_mem_used, test_name)
-            matches = request_gpt(system_content, user_contents, temperature)
-            if matches is not None:
-                clean_options_file = cleanup_options_file(matches[1])
-                reasoning += matches[0] + matches[2]
+            return request_gpt(system_content, user_contents, temperature)
+
+        # The chunks are independent, request them concurrently
+        with ThreadPoolExecutor(max_workers=constants.LLM_CONCURRENCY) as executor:
+            chunk_matches = list(executor.map(request_chunk, chunk_strings))
+
+        answered = [(dict(chunk), matches) for chunk, matches in zip(chunks, chunk_matches) if matches is not None]
+        log_update(f"[OG] {len(answered)} of {len(chunks)} chunks answered")
+        if not answered:
+            return None, "", ""
+
+        edits = merge_chunk_edits([(chunk, parse_gpt_text_to_dict(matches[1])) for chunk, matches in answered])
+        # Every chunk's edits are applied at once on top of the previous options file
+        clean_options_file = cleanup_options_file("\n".join(f"{key}={value}" for key, value in edits.items()),
+                                                  previous_option_file)
+        reasoning = "".join(matches[0] + matches[2] for _, matches in answered)
 
         return clean_options_file, reasoning, ""
 
@@ -275,7 +409,7 @@ def generate_option_file_with_gpt(case, previous_option_files, device_informatio
         matches = request_gpt(system_content, user_contents, temperature)
         # Process the GPT response
         if matches is not None:
-            clean_options_file = cleanup_options_file(matches[1])
+            clean_options_file = cleanup_options_file(matches[1], previous_option_files[-1][0])
             reasoning = matches[0] + matches[2]
 
         return clean_options_file, reasoning, ""
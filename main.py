@@ -1,12 +1,17 @@
 import utils.constants as constants
 from utils.graph import plot, plot_multiple
-from utils.system_operations.fio_runner import get_fio_result
 from options_files.ops_options_file import parse_option_file_to_dict, get_initial_options_file
 
 import rocksdb.subprocess_manager as spm
+from rocksdb.slot_runner import build_slots, evaluate_candidates_in_slots
+from rocksdb.speculative import evaluate_speculative
+from rocksdb.local_search import refine_numeric_options
+from rocksdb.benchmark_backend import device_fio_result
+from rocksdb.scoring import score
 from utils.utils import log_update, store_best_option_file, path_of_db, store_diff_options_list
 from utils.system_operations.get_sys_info import system_info
 from gpt.prompts_generator import generate_option_file_with_gpt
+from gpt.llm_backends import summarize_llm_metrics
 import os
 
 def main():
@@ -32,7 +37,8 @@ def main():
     output_folder_dir = constants.OUTPUT_PATH
     os.makedirs(output_folder_dir, exist_ok=True)
     db_path = path_of_db()
-    fio_result = get_fio_result(constants.FIO_RESULT_PATH)
+    fio_result = device_fio_result()
+    slots = build_slots(constants.PARALLEL_SLOTS, db_path, output_folder_dir) if constants.PARALLEL_SLOTS > 1 else None
 
     log_update(f"[MFN] Starting the program with the case number: {constants.CASE_NUMBER}")
     print(f"[MFN] Starting the program with the case number: {constants.CASE_NUMBER}")
@@ -72,6 +78,39 @@ def main():
             generated = False
 
             for gpt_query_count in range(retry_counter, 0, -1):
+                if constants.SPECULATIVE_CANDIDATES > 1:
+                    # Screen several candidates with short runs, only the best get a full run
+                    best = evaluate_speculative(
+                        slots, db_path, output_folder_dir, options, options_files,
+                        system_info(db_path, fio_result), temperature,
+                        average_cpu_usage, average_memory_usage, iteration_count, benchmark_results,
+                        constants.CASE_NUMBER, constants.TEST_NAME, constants.VERSION)
+                    if best is None:
+                        log_update(f"[MFN] All candidates failed. Retrying. Retries left: {gpt_query_count - 1}")
+                        print("[MFN] All candidates failed. Retrying. Retries left: ", gpt_query_count - 1)
+                        temperature += 0.1
+                        continue
+
+                    new_options_file, benchmark_results, average_cpu_usage, average_memory_usage, reasoning, summary_of_changes = best
+                    generated = True
+                    break
+
+                if slots is not None:
+                    # Generate and benchmark one candidate per slot concurrently
+                    best = evaluate_candidates_in_slots(
+                        slots, options, options_files, system_info(db_path, fio_result), temperature,
+                        average_cpu_usage, average_memory_usage, iteration_count, benchmark_results,
+                        constants.CASE_NUMBER, constants.TEST_NAME, constants.VERSION)
+                    if best is None:
+                        log_update(f"[MFN] All candidates failed. Retrying. Retries left: {gpt_query_count - 1}")
+                        print("[MFN] All candidates failed. Retrying. Retries left: ", gpt_query_count - 1)
+                        temperature += 0.1
+                        continue
+
+                    new_options_file, benchmark_results, average_cpu_usage, average_memory_usage, reasoning, summary_of_changes = best
+                    generated = True
+                    break
+
                 # Generate new options file with retry limit of 5
 
                 new_options_file, reasoning, summary_of_changes = generate_option_file_with_gpt(
@@ -84,6 +123,11 @@ def main():
                     print("[MFN] Failed to generate options file. Retrying. Retries left: ", gpt_query_count - 1)
                     continue
 
+                if constants.LOCAL_SEARCH:
+                    new_options_file, notes = refine_numeric_options(
+                        options, new_options_file, db_path, output_folder_dir, iteration_count, options_files)
+                    reasoning += notes
+
                 # Parse output
                 is_error, benchmark_results, average_cpu_usage, average_memory_usage, new_options_file = spm.benchmark(
                     db_path, new_options_file, output_folder_dir, reasoning, iteration_count, benchmark_results, options_files)
@@ -112,11 +156,20 @@ def main():
         # Graph Ops/Sec
         plot([e[1]["ops_per_sec"] for e in options_files], "OpsPerSec",
              f"{output_folder_dir}/OpsPerSec.png")
+        # Score of every iteration relative to the initial options file
+        plot([score(e[1], options_files[0][1]) for e in options_files], "Score",
+             f"{output_folder_dir}/Score.png", ylim=None)
         plot_multiple(options_files, "Ops Per Second",
                       f"{output_folder_dir}/opsM_per_sec.png")
         
         store_diff_options_list(options_list, output_folder_dir)
 
+        llm_metrics = summarize_llm_metrics()
+        if llm_metrics is not None:
+            log_update(f"[MFN] {llm_metrics['calls']} LLM requests took {llm_metrics['total_latency']:.1f}s "
+                       f"(average {llm_metrics['avg_latency']:.2f}s, max {llm_metrics['max_latency']:.2f}s), "
+                       f"{llm_metrics['prompt_tokens']} prompt and {llm_metrics['completion_tokens']} completion tokens")
+
 
 
 if __name__ == "__main__":
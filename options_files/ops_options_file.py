@@ -1,9 +1,8 @@
 import os
-import re
-import configparser
-from utils.constants import DEFAULT_OPTION_FILE_DIR, INITIAL_OPTIONS_FILE_NAME, OPTIONS_FILE_DIR
+from utils.constants import DEFAULT_OPTION_FILE_DIR, INITIAL_OPTIONS_FILE_NAME
 from utils.filter import BLACKLIST
-from utils.parse import dict_to_configparser, configparser_to_string
+from options_files.options_model import parse_options
+from options_files.options_validator import validate_edits, repair_constraints
 
 def parse_gpt_text_to_dict(gpt_output_text):
     '''
@@ -20,21 +19,20 @@ def parse_gpt_text_to_dict(gpt_output_text):
     for line in gpt_output_text.split("\n"):
         # Ignore lines starting with '#' as they are comments
         if not line.startswith('#'):
-            # Split the line at the first '=' and strip whitespace
-            parts = line.split(':', 1)
-            if len(parts) == 1:
-                parts = line.split('=', 1)
-            if len(parts) == 2:
-                # filters options that start with { - k
-                if '{' not in parts[1].strip():
-                    # filters options that are in the blacklist
-                    if parts[0].strip() not in BLACKLIST:
-                        key, value = parts[0].strip(), parts[1].strip()
-                        options_dict[key] = value
+            # Split the line at the first ':' or '=', values may contain the other one
+            # (e.g. filter_policy=bloomfilter:10:false, compression_opts: {level=3;})
+            separators = [index for index in (line.find(':'), line.find('=')) if index != -1]
+            if separators:
+                parts = [line[:min(separators)], line[min(separators) + 1:]]
+                # {...} struct values are checked by the validator
+                # filters options that are in the blacklist
+                if parts[0].strip() not in BLACKLIST:
+                    key, value = parts[0].strip(), parts[1].strip()
+                    options_dict[key] = value
 
     return options_dict
 
-def cleanup_options_file(gpt_options_text):
+def cleanup_options_file(gpt_options_text, base_options):
     """
     Function to clean up the options file generated by GPT
     - replace the values of the options in the original options file with the values generated by GPT-4
@@ -44,29 +42,22 @@ def cleanup_options_file(gpt_options_text):
 
     Parameters:
     - gpt_options_text: string containing the options file generated by GPT-4
+    - base_options: string containing the options file the changes are applied to
 
     Returns:
-    - config_string: string containing the options file in the original format
+    - config_string: string containing the options file in the format of base_options
     """
-    clean_output_dict = parse_option_file_to_dict(open(f"{OPTIONS_FILE_DIR}").read())
+    options_file = parse_options(base_options)
 
     # Parse the GPT-4 generated options
     gpt_output_dict = parse_gpt_text_to_dict(gpt_options_text)
 
-    # Update the original options with GPT-4 generated value
-    for key, value in gpt_output_dict.items():
-        for internal_dict in clean_output_dict:
-            if key in clean_output_dict[internal_dict]:
-                clean_output_dict[internal_dict][key] = gpt_output_dict[key]
+    # Update the original options with the GPT-4 generated values that pass the schema
+    for (section, key), value in validate_edits(gpt_output_dict, options_file).items():
+        options_file.set(section, key, value)
+    repair_constraints(options_file)
 
-    # Convert dictionary to configparser
-    config_parser = dict_to_configparser(clean_output_dict)
-    config_string = configparser_to_string(config_parser)
-
-    # Save to a file
-    with open(f"{OPTIONS_FILE_DIR}", "w") as file:
-        file.write(config_string)
-    return config_string
+    return options_file.serialize()
 
 def get_initial_options_file():
     '''
@@ -94,20 +85,11 @@ def parse_option_file_to_dict(option_file):
     Function to parse the given option file to a dictionary
 
     Parameters:
-    - option_file (str): The path to the option file
+    - option_file (str): The options file
 
     Returns:
-    - parsed (dict): A dictionary containing the parsed data
+    - parsed (dict): A dictionary containing the parsed data, the option names are lowercase
     '''
-    pat = re.compile("(.*)\s*([#].*)?")
-    config = configparser.ConfigParser()
-    config.read_string(option_file)
-    parsed = {section: dict(config.items(section))
-              for section in config.sections()}
-    for section_name, section in parsed.items():
-        for k, v in section.items():
-            m = pat.match(v)
-            section[k] = m[1]
-    return parsed
+    return parse_options(option_file).to_dict()
 
 
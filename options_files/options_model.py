@@ -0,0 +1,191 @@
+import re
+from functools import lru_cache
+
+SECTION_PATTERN = re.compile(r"^\s*\[(?P<name>[^\]]*)\]\s*$")
+# Split at the first '=' or ':', like configparser, the rest of the line is the value
+OPTION_PATTERN = re.compile(r"^(?P<prefix>\s*(?P<key>[^=:\s][^=:]*?)\s*[=:]\s*)(?P<value>.*?)(?P<suffix>\s*)$")
+COMMENT_PREFIXES = ("#", ";")
+
+
+class Option:
+    '''
+    One option line of an options file, kept with its original formatting
+
+    An Option is never changed once built, a new value is a new Option, so the files
+    cloned from each other can share them.
+    '''
+    __slots__ = ("key", "value", "prefix", "suffix")
+
+    def __init__(self, key, value, prefix, suffix):
+        '''
+        Parameters:
+        - key (str): The option name, in its original case
+        - value (str): The option value
+        - prefix (str): The text before the value (indentation, name and separator)
+        - suffix (str): The text after the value (trailing spaces and line end)
+        '''
+        self.key = key
+        self.value = value
+        self.prefix = prefix
+        self.suffix = suffix
+
+    def __str__(self):
+        return f"{self.prefix}{self.value}{self.suffix}"
+
+
+class OptionsFile:
+    '''
+    An options file held in memory
+
+    The lines are kept as written, option lines as Option objects, so serializing an
+    unchanged file gives the text it was parsed from. The option names are looked up
+    case insensitively but written in their original case. Options are only changed,
+    never added or removed, so the index of the lines is built once when parsing and
+    shared by every clone. A clone shares the lines too until one of the files is
+    changed, when the changed file copies them.
+    '''
+    __slots__ = ("_lines", "_positions", "_key_sections", "_section_names", "_shared")
+
+    def __init__(self, lines, positions, key_sections, section_names, shared=False):
+        '''
+        Parameters:
+        - lines (list): The lines, option lines as Option objects and the others as strings
+        - positions (dict): The line of every option, keyed by (section, lowercase option name)
+        - key_sections (dict): The sections of every lowercase option name, in file order
+        - section_names (tuple): The section names, in file order
+        - shared (bool): If the lines are shared with another file
+        '''
+        self._lines = lines
+        self._positions = positions
+        self._key_sections = key_sections
+        self._section_names = section_names
+        self._shared = shared
+
+    def sections(self):
+        '''
+        Returns:
+        - sections (tuple): The section names, in file order
+        '''
+        return self._section_names
+
+    def sections_of(self, key):
+        '''
+        Parameters:
+        - key (str): The option name, in any case
+
+        Returns:
+        - sections (tuple): The sections that have the option, in file order
+        '''
+        return self._key_sections.get(key.lower(), ())
+
+    def get(self, section, key, default=None):
+        '''
+        Parameters:
+        - section (str): The section name
+        - key (str): The option name, in any case
+        - default (str): The value returned when the section does not have the option
+
+        Returns:
+        - value (str): The option value
+        '''
+        position = self._positions.get((section, key.lower()))
+        return default if position is None else self._lines[position].value
+
+    def set(self, section, key, value):
+        '''
+        Change the value of an option
+
+        Parameters:
+        - section (str): The section name
+        - key (str): The option name, in any case
+        - value (str): The new value
+
+        Raises:
+        - KeyError: If the section does not have the option
+        '''
+        position = self._positions[(section, key.lower())]
+        if self._shared:
+            self._lines = list(self._lines)
+            self._shared = False
+        option = self._lines[position]
+        self._lines[position] = Option(option.key, value, option.prefix, option.suffix)
+
+    def items(self, section):
+        '''
+        Parameters:
+        - section (str): The section name
+
+        Returns:
+        - items (list): The (lowercase option name, value) pairs of the section, in file order
+        '''
+        return [(key, self._lines[position].value)
+                for (option_section, key), position in self._positions.items() if option_section == section]
+
+    def to_dict(self):
+        '''
+        Returns:
+        - parsed (dict): The values keyed by section and lowercase option name, as configparser parses them
+        '''
+        parsed = {section: {} for section in self._section_names}
+        for (section, key), position in self._positions.items():
+            parsed[section][key] = self._lines[position].value
+        return parsed
+
+    def clone(self):
+        '''
+        Returns:
+        - options_file (OptionsFile): An independent copy, the lines are only copied when one of the files changes
+        '''
+        self._shared = True
+        return OptionsFile(self._lines, self._positions, self._key_sections, self._section_names, shared=True)
+
+    def serialize(self):
+        '''
+        Returns:
+        - text (str): The options file, unchanged lines exactly as they were parsed
+        '''
+        return "".join(map(str, self._lines))
+
+    def __str__(self):
+        return self.serialize()
+
+
+@lru_cache(maxsize=64)
+def _parse(text):
+    lines = []
+    positions = {}
+    key_sections = {}
+    section_names = []
+    section = None
+    for line in text.splitlines(keepends=True):
+        stripped = line.strip()
+        section_match = SECTION_PATTERN.match(line)
+        if section_match:
+            section = section_match["name"]
+            section_names.append(section)
+        elif section is not None and stripped and not stripped.startswith(COMMENT_PREFIXES):
+            option_match = OPTION_PATTERN.match(line)
+            if option_match:
+                key = option_match["key"]
+                positions[(section, key.lower())] = len(lines)
+                key_sections.setdefault(key.lower(), ())
+                if section not in key_sections[key.lower()]:
+                    key_sections[key.lower()] += (section,)
+                line = Option(key, option_match["value"], option_match["prefix"], option_match["suffix"])
+        lines.append(line)
+    return OptionsFile(lines, positions, key_sections, tuple(section_names), shared=True)
+
+
+def parse_options(text):
+    '''
+    Function to parse an options file into an OptionsFile
+
+    The parse of a text is cached, parsing the same options file again only clones it.
+
+    Parameters:
+    - text (str): The options file
+
+    Returns:
+    - options_file (OptionsFile): The parsed options file, free to be changed
+    '''
+    return _parse(text).clone()
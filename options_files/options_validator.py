@@ -0,0 +1,350 @@
+import os
+import re
+import glob
+
+from utils.constants import DEFAULT_OPTION_FILE_DIR, VERSION
+from utils.utils import log_update
+from options_files.options_model import parse_options
+
+INT_PATTERN = re.compile(r"^-?\d+$")
+FLOAT_PATTERN = re.compile(r"^-?\d+\.\d*$")
+SIZE_PATTERN = re.compile(r"^(-?\d+(?:\.\d+)?)\s*([kmgt])(?:i?b)?$", re.IGNORECASE)
+SIZE_UNITS = {"k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+
+# Legal values of the enum options, the values found in the default files are added
+ENUMS = {
+    "compaction_style": ["kCompactionStyleLevel", "kCompactionStyleUniversal", "kCompactionStyleFIFO",
+                         "kCompactionStyleNone"],
+    "compaction_pri": ["kByCompensatedSize", "kOldestLargestSeqFirst", "kOldestSmallestSeqFirst",
+                       "kMinOverlappingRatio", "kRoundRobin"],
+    "wal_recovery_mode": ["kTolerateCorruptedTailRecords", "kAbsoluteConsistency", "kPointInTimeRecovery",
+                          "kSkipAnyCorruptedRecords"],
+    "index_type": ["kBinarySearch", "kHashSearch", "kTwoLevelIndexSearch", "kBinarySearchWithFirstKey"],
+    "data_block_index_type": ["kDataBlockBinarySearch", "kDataBlockBinaryAndHash"],
+    "checksum": ["kNoChecksum", "kCRC32c", "kxxHash", "kxxHash64", "kXXH3"],
+    "index_shortening": ["kNoShortening", "kShortenSeparators", "kShortenSeparatorsAndSuccessor"],
+    "prepopulate_block_cache": ["kDisable", "kFlushOnly"],
+    "prepopulate_blob_cache": ["kDisable", "kFlushOnly"],
+    "access_hint_on_compaction_start": ["NONE", "NORMAL", "SEQUENTIAL", "WILLNEED"],
+    "info_log_level": ["DEBUG_LEVEL", "INFO_LEVEL", "WARN_LEVEL", "ERROR_LEVEL", "FATAL_LEVEL", "HEADER_LEVEL"],
+    "stop_style": ["kCompactionStopStyleSimilarSize", "kCompactionStopStyleTotalSize"],
+    "unpartitioned_pinning": ["kFallback", "kNone", "kFlushedAndSimilar", "kAll"],
+    "partition_pinning": ["kFallback", "kNone", "kFlushedAndSimilar", "kAll"],
+    "top_level_index_pinning": ["kFallback", "kNone", "kFlushedAndSimilar", "kAll"],
+}
+for compression_option in ["compression", "bottommost_compression", "blob_compression_type", "wal_compression"]:
+    ENUMS[compression_option] = ["kNoCompression", "kSnappyCompression", "kZlibCompression", "kBZip2Compression",
+                                 "kLZ4Compression", "kLZ4HCCompression", "kXpressCompression", "kZSTD",
+                                 "kDisableCompressionOption"]
+
+# Legal (minimum, maximum) of the numeric options, None for no bound. Options not listed
+# must be at least 0, or -1 when their default is negative (unlimited or automatic)
+RANGES = {
+    "write_buffer_size": (64 * 1024, 64 * 1024 ** 3),
+    "db_write_buffer_size": (0, 1024 ** 4),
+    "max_write_buffer_number": (1, 256),
+    "min_write_buffer_number_to_merge": (1, 256),
+    "max_background_jobs": (1, 1024),
+    "max_background_compactions": (-1, 1024),
+    "max_background_flushes": (-1, 1024),
+    "max_subcompactions": (1, 1024),
+    "level0_file_num_compaction_trigger": (1, None),
+    "level0_slowdown_writes_trigger": (1, None),
+    "level0_stop_writes_trigger": (1, None),
+    "num_levels": (1, 64),
+    "target_file_size_base": (1, None),
+    "target_file_size_multiplier": (1, None),
+    "max_bytes_for_level_base": (1, None),
+    "max_bytes_for_level_multiplier": (1e-6, None),
+    "block_size": (256, 4 * 1024 ** 3 - 1),
+    "metadata_block_size": (256, 4 * 1024 ** 3 - 1),
+    "block_restart_interval": (1, None),
+    "index_block_restart_interval": (1, None),
+    "table_cache_numshardbits": (0, 19),
+    "bloom_locality": (0, 1),
+    "data_block_hash_table_util_ratio": (1e-6, 1),
+    "memtable_prefix_bloom_size_ratio": (0, 0.25),
+    "blob_garbage_collection_age_cutoff": (0, 1),
+    "blob_garbage_collection_force_threshold": (0, 1),
+}
+# Values must fit in the 64 bit integers RocksDB stores them in
+INT_LIMITS = (-2 ** 63, 2 ** 64 - 1)
+
+
+def infer_spec(key, value):
+    '''
+    Function to infer the type and the legal values of an option from its default value
+
+    Parameters:
+    - key (str): The option name
+    - value (str): The default value
+
+    Returns:
+    - spec (dict): The option type ("bool", "int", "float", "enum", "struct" or "string"),
+      its bounds, its legal values or its fields
+    '''
+    if key in ENUMS:
+        return {"type": "enum", "values": list(ENUMS[key])}
+    if value in ("true", "false"):
+        return {"type": "bool"}
+    if value.startswith("{") and value.endswith("}"):
+        fields = split_struct(value)
+        if fields is None:
+            return {"type": "string"}
+        return {"type": "struct", "fields": {field: infer_spec(field, field_value)
+                                             for field, field_value in fields.items()}}
+    if INT_PATTERN.match(value) or FLOAT_PATTERN.match(value):
+        number_type = "int" if INT_PATTERN.match(value) else "float"
+        minimum, maximum = RANGES.get(key, (-1 if float(value) < 0 else 0, None))
+        return {"type": number_type, "min": minimum, "max": maximum}
+    if re.match(r"^k[A-Z]\w*$", value):
+        return {"type": "enum", "values": [value]}
+    return {"type": "string"}
+
+
+def split_struct(value):
+    '''
+    Function to split a struct value, e.g. {a=1;b={c=2;};}, into its fields
+
+    Parameters:
+    - value (str): The struct value
+
+    Returns:
+    - fields (dict): The value of every field, None if the value is not a struct of key=value fields
+    '''
+    body = value.strip()[1:-1]
+    fields = {}
+    depth = 0
+    start = 0
+    parts = []
+    for index, char in enumerate(body):
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+        elif char == ";" and depth == 0:
+            parts.append(body[start:index])
+            start = index + 1
+    parts.append(body[start:])
+
+    for part in parts:
+        if not part.strip():
+            continue
+        field, separator, field_value = part.partition("=")
+        if not separator:
+            return None
+        fields[field.strip().lower()] = field_value.strip()
+    return fields
+
+
+def build_schema(version):
+    '''
+    Function to build the option schema of a RocksDB version from the shipped default options files
+
+    Parameters:
+    - version (str): The RocksDB version, the schema of every shipped version is merged if it has no file
+
+    Returns:
+    - schema (dict): The spec of every option in every section
+    '''
+    path = os.path.join(DEFAULT_OPTION_FILE_DIR, f"dbbench_default_options-{version}.ini")
+    paths = [path] if os.path.exists(path) else sorted(
+        glob.glob(os.path.join(DEFAULT_OPTION_FILE_DIR, "dbbench_default_options-*.ini")))
+
+    schema = {}
+    for path in paths:
+        with open(path, "r") as f:
+            options_file = parse_options(f.read())
+        for section in options_file.sections():
+            for key, value in options_file.items(section):
+                spec = infer_spec(key, value)
+                if spec["type"] == "enum" and value not in spec["values"]:
+                    spec["values"].append(value)
+                schema.setdefault(section, {}).setdefault(key, spec)
+    return schema
+
+
+SCHEMA = build_schema(VERSION)
+
+
+def clean_value(value):
+    '''
+    Function to strip the quotes, trailing comments and separators an LLM adds to a value
+    '''
+    value = value.split(" #")[0].strip()
+    value = value.strip("`'\"").strip()
+    return value.rstrip(",").strip()
+
+
+def validate_number(key, value, spec):
+    text = value.replace("_", "").replace(",", "").strip()
+    size = SIZE_PATTERN.match(text)
+    try:
+        if size:
+            number = float(size[1]) * SIZE_UNITS[size[2].lower()]
+        else:
+            number = float(text)
+    except ValueError:
+        return None, f"{value} is not a number"
+
+    if spec["type"] == "int":
+        if number != int(number):
+            return None, f"{value} is not an integer"
+        number = int(number)
+        minimum, maximum = max(spec["min"], INT_LIMITS[0]), min(spec["max"] or INT_LIMITS[1], INT_LIMITS[1])
+    else:
+        minimum, maximum = spec["min"], spec["max"]
+
+    message = f"{value} read as {int(number) if spec['type'] == 'int' else number}" if size or text != value else None
+    if number < minimum:
+        message = f"{value} is below the minimum {minimum}, clamped"
+        number = minimum
+    elif maximum is not None and number > maximum:
+        message = f"{value} is above the maximum {maximum}, clamped"
+        number = maximum
+    if spec["type"] == "int":
+        return str(int(number)), message
+    return f"{float(number):f}", message
+
+
+def validate_value(key, value, spec, current):
+    '''
+    Function to check a proposed option value against its spec, repairing it when possible
+
+    Parameters:
+    - key (str): The option name
+    - value (str): The proposed value
+    - spec (dict): The spec of the option
+    - current (str): The current value of the option
+
+    Returns:
+    - value (str): The valid value, None if the value is rejected
+    - message (str): What was wrong with the value, None if it was valid as proposed
+    '''
+    value = clean_value(value)
+    if spec["type"] == "bool":
+        lowered = value.lower()
+        if lowered in ("true", "1", "yes", "on"):
+            return "true", None if value == "true" else f"{value} read as true"
+        if lowered in ("false", "0", "no", "off"):
+            return "false", None if value == "false" else f"{value} read as false"
+        return None, f"{value} is not a boolean"
+
+    if spec["type"] in ("int", "float"):
+        return validate_number(key, value, spec)
+
+    if spec["type"] == "enum":
+        for legal in spec["values"]:
+            if value.lower() == legal.lower():
+                return legal, None if value == legal else f"{value} read as {legal}"
+        return None, f"{value} is not one of {spec['values']}"
+
+    if spec["type"] == "struct":
+        if not (value.startswith("{") and value.endswith("}")):
+            return None, f"{value} is not a {{...}} struct"
+        fields = split_struct(value)
+        if fields is None:
+            return None, f"{value} is not a struct of field=value pairs"
+        # Fields not proposed keep their current value
+        merged = split_struct(current) or {}
+        messages = []
+        for field, field_value in fields.items():
+            field_spec = spec["fields"].get(field)
+            if field_spec is None:
+                messages.append(f"unknown field {field} dropped")
+                continue
+            field_value, message = validate_value(field, field_value, field_spec, merged.get(field, ""))
+            if message is not None:
+                messages.append(f"{field}: {message}")
+            if field_value is not None:
+                merged[field] = field_value
+        value = "{" + "".join(f"{field}={field_value};" for field, field_value in merged.items()) + "}"
+        return value, "; ".join(messages) or None
+
+    return value, None
+
+
+def validate_edits(edits, options_file):
+    '''
+    Function to validate the option changes proposed by the LLM against the schema
+
+    Values are repaired when the intent is clear (units, letter case, out of range values
+    are clamped). The other invalid values and the unknown options are dropped, so the
+    current value is kept and the options file still loads.
+
+    Parameters:
+    - edits (dict): The proposed options and their values
+    - options_file (OptionsFile): The current options file
+
+    Returns:
+    - valid_edits (dict): The valid values, keyed by (section, option)
+    '''
+    valid_edits = {}
+    for key, value in edits.items():
+        option = key.strip().lower()
+        targets = options_file.sections_of(option)
+        if not targets:
+            log_update(f"[OV] Unknown option {key}={value} dropped")
+            continue
+
+        for section in targets:
+            current = options_file.get(section, option)
+            spec = SCHEMA.get(section, {}).get(option) or infer_spec(option, current)
+            valid_value, message = validate_value(option, value, spec, current)
+            if valid_value is None:
+                log_update(f"[OV] Invalid {key}={value} dropped, {message}")
+                continue
+            if message is not None:
+                log_update(f"[OV] Repaired {key}={value} to {valid_value}, {message}")
+            valid_edits[(section, option)] = valid_value
+    return valid_edits
+
+
+def repair_constraints(options_file):
+    '''
+    Function to repair the options that are valid alone but not together
+
+    - The level 0 triggers must be compaction <= slowdown <= stop
+    - min_write_buffer_number_to_merge must be below max_write_buffer_number
+    - The soft pending compaction bytes limit must not be above the hard one
+
+    Parameters:
+    - options_file (OptionsFile): The options file, updated in place
+
+    Returns:
+    - None
+    '''
+    def repair(section, options, key, value, reason):
+        log_update(f"[OV] Raised {key} from {options[key]} to {value}, {reason}")
+        options[key] = str(value)
+        options_file.set(section, key, str(value))
+
+    for section in options_file.sections():
+        options = dict(options_file.items(section))
+        try:
+            if all(key in options for key in ["level0_file_num_compaction_trigger", "level0_slowdown_writes_trigger",
+                                              "level0_stop_writes_trigger"]):
+                compaction = int(options["level0_file_num_compaction_trigger"])
+                if int(options["level0_slowdown_writes_trigger"]) < compaction:
+                    repair(section, options, "level0_slowdown_writes_trigger", compaction,
+                           "it must not be below level0_file_num_compaction_trigger")
+                slowdown = int(options["level0_slowdown_writes_trigger"])
+                if int(options["level0_stop_writes_trigger"]) < slowdown:
+                    repair(section, options, "level0_stop_writes_trigger", slowdown,
+                           "it must not be below level0_slowdown_writes_trigger")
+
+            if "min_write_buffer_number_to_merge" in options and "max_write_buffer_number" in options:
+                to_merge = int(options["min_write_buffer_number_to_merge"])
+                if int(options["max_write_buffer_number"]) <= to_merge:
+                    repair(section, options, "max_write_buffer_number", to_merge + 1,
+                           "it must be above min_write_buffer_number_to_merge")
+
+            if "soft_pending_compaction_bytes_limit" in options and "hard_pending_compaction_bytes_limit" in options:
+                soft = int(options["soft_pending_compaction_bytes_limit"])
+                hard = int(options["hard_pending_compaction_bytes_limit"])
+                if hard and soft > hard:
+                    repair(section, options, "hard_pending_compaction_bytes_limit", soft,
+                           "it must not be below soft_pending_compaction_bytes_limit")
+        except ValueError:
+            # A value the schema does not know as a number, e.g. an options file from another version
+            continue
@@ -0,0 +1,136 @@
+import os
+import json
+import fcntl
+import shutil
+import hashlib
+import subprocess
+
+from utils.utils import log_update
+from utils.constants import BASE_DB_CACHE, BASE_DB_CACHE_DIR, VERSION
+from options_files.ops_options_file import parse_option_file_to_dict
+
+# Options that change the on-disk format of the prefilled database. Two options files that
+# agree on these can share the same base database, the others only matter at run time.
+FORMAT_AFFECTING_OPTIONS = [
+    "comparator", "table_factory", "merge_operator", "prefix_extractor", "num_levels",
+    "compaction_style", "format_version", "block_size", "block_restart_interval",
+    "index_block_restart_interval", "filter_policy", "whole_key_filtering", "index_type",
+    "partition_filters", "metadata_block_size", "data_block_index_type", "checksum",
+    "enable_blob_files", "min_blob_size",
+]
+
+# Immutable files that can be shared between the snapshot and the clones
+IMMUTABLE_FILE_SUFFIXES = (".sst", ".blob")
+
+
+def base_db_fingerprint(prefill_command, options):
+    '''
+    Fingerprint of a base database
+
+    The db_bench command and the RocksDB version are part of the fingerprint, a database
+    filled by another build is never reused.
+
+    Parameters:
+    - prefill_command (list): The db_bench command that fills the database
+    - options (str): The options file used for the prefill
+
+    Returns:
+    - fingerprint (str): A hash of the version, the prefill command and the format affecting options
+    '''
+    # The --db and --options_file paths differ per run and slot, they do not change the data
+    prefill_flags = [flag for flag in prefill_command
+                     if not flag.startswith(("--db=", "--options_file="))]
+
+    format_options = {}
+    for section_name, section in parse_option_file_to_dict(options).items():
+        for key, value in section.items():
+            if key in FORMAT_AFFECTING_OPTIONS:
+                format_options[f"{section_name}.{key}"] = value.strip()
+
+    payload = json.dumps({"version": VERSION, "prefill": prefill_flags, "format": format_options}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def clone_base_db(snapshot_path, database_path):
+    '''
+    Clone a pristine snapshot into the run directory, checkpoint style
+
+    SST and blob files are hard linked since RocksDB never modifies them in place, the
+    mutable files (MANIFEST, CURRENT, OPTIONS, WAL) are copied. When hard links are not
+    possible (different file system) a reflink copy is attempted.
+
+    Parameters:
+    - snapshot_path (str): The path of the snapshot
+    - database_path (str): The path of the database to create
+
+    Returns:
+    - None
+    '''
+    os.makedirs(database_path, exist_ok=True)
+    for file_name in os.listdir(snapshot_path):
+        # The info log belongs to the prefill run
+        if file_name == "LOG" or file_name.startswith("LOG.old"):
+            continue
+
+        source = os.path.join(snapshot_path, file_name)
+        target = os.path.join(database_path, file_name)
+        if file_name.endswith(IMMUTABLE_FILE_SUFFIXES):
+            try:
+                os.link(source, target)
+                continue
+            except OSError:
+                pass
+            subprocess.run(["cp", "--reflink=auto", source, target], check=True)
+        else:
+            shutil.copy2(source, target)
+
+
+def prefill_db(prefill_command, database_path, options):
+    '''
+    Fill the database before the measured phase, reusing a cached base database if possible
+
+    The snapshots are never evicted, every new fingerprint adds a full database to
+    BASE_DB_CACHE_DIR until the directory is deleted by hand.
+
+    Parameters:
+    - prefill_command (list): The db_bench command that fills the database at database_path
+    - database_path (str): The path to the database
+    - options (str): The options file used for the prefill
+
+    Returns:
+    - None
+    '''
+    if not BASE_DB_CACHE:
+        subprocess.run(prefill_command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, check=False)
+        return
+
+    fingerprint = base_db_fingerprint(prefill_command, options)
+    snapshot_path = os.path.join(BASE_DB_CACHE_DIR, fingerprint)
+    os.makedirs(BASE_DB_CACHE_DIR, exist_ok=True)
+
+    # Concurrent slots may need the same base database, only one of them fills it
+    with open(f"{snapshot_path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        if not os.path.isdir(snapshot_path):
+            log_update(f"[BDC] Filling base database {fingerprint}")
+            print(f"[BDC] Filling base database {fingerprint}")
+            tmp_path = f"{snapshot_path}.tmp"
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+            fill_command = [f"--db={tmp_path}" if flag.startswith("--db=") else flag for flag in prefill_command]
+            proc = subprocess.run(fill_command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, check=False)
+            if proc.returncode != 0:
+                # Leave the database empty, the measured run reports the error
+                log_update(f"[BDC] Prefill failed: {proc.stdout.decode()[-1000:]}")
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                return
+
+            # Publish the snapshot atomically so a crash never leaves a half filled base
+            os.rename(tmp_path, snapshot_path)
+
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    log_update(f"[BDC] Cloning base database {fingerprint} into {database_path}")
+    print(f"[BDC] Cloning base database {fingerprint}")
+    clone_base_db(snapshot_path, database_path)
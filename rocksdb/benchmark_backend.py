@@ -0,0 +1,71 @@
+import sys
+
+from utils.constants import BENCHMARK_BACKEND, DB_BENCH_PATH, FIO_RESULT_PATH
+from utils.system_operations.fio_runner import get_fio_result
+
+# Benchmark backends
+# - command: The command prefix launching db_bench, the db_bench flags are appended to it
+# - privileged: If the backend measures a real device, i.e. needs the page cache dropped
+#   (root access), the settle wait and the fio device benchmark
+BACKENDS = {
+    "db_bench": {
+        "command": [DB_BENCH_PATH],
+        "privileged": True,
+    },
+    "simulator": {
+        "command": [sys.executable, "-m", "rocksdb.db_bench_simulator"],
+        "privileged": False,
+    },
+}
+
+SIMULATED_FIO_RESULT = (
+    "randwrite bandwidth is 400MiB/s (419MB/s)\n"
+    "randread bandwidth is 600MiB/s (629MB/s)\n"
+    "read bandwidth is 2000MiB/s (2097MB/s)\n"
+    "write bandwidth is 1500MiB/s (1573MB/s)"
+)
+
+
+def get_backend():
+    '''
+    Get the configured benchmark backend
+
+    Returns:
+    - backend (dict): The backend description
+    '''
+    backend = BACKENDS.get(BENCHMARK_BACKEND)
+    if backend is None:
+        raise ValueError(f"No benchmark backend named {BENCHMARK_BACKEND}, choose from {list(BACKENDS)}")
+    return backend
+
+
+def db_bench_command_prefix():
+    '''
+    Get the command launching db_bench
+
+    Returns:
+    - command (list): The command prefix
+    '''
+    return list(get_backend()["command"])
+
+
+def is_privileged_backend():
+    '''
+    Check if the backend runs on a real device
+
+    Returns:
+    - privileged (bool): True for the real db_bench
+    '''
+    return get_backend()["privileged"]
+
+
+def device_fio_result():
+    '''
+    Get the fio result describing the device, the simulator uses a canned result
+
+    Returns:
+    - fio_result (str): The fio result
+    '''
+    if not is_privileged_backend():
+        return SIMULATED_FIO_RESULT
+    return get_fio_result(FIO_RESULT_PATH)
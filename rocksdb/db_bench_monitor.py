@@ -0,0 +1,81 @@
+import re
+from collections import namedtuple
+
+# A single "--stats_interval_seconds" report emitted by db_bench, e.g.
+# "... thread 0: (1000,5000) ops and (999.8,1001.2) ops/second in (1.000200,4.993900) seconds"
+# - timestamp: seconds elapsed since the measured benchmark started
+# - interval_ops_per_sec: throughput over the last interval
+# - cumulative_ops_per_sec: average throughput since the benchmark started
+# - interval_seconds: length of the last interval
+IntervalSample = namedtuple("IntervalSample", [
+    "timestamp", "interval_ops_per_sec", "cumulative_ops_per_sec",
+    "interval_seconds", "interval_ops", "total_ops"
+])
+
+INTERVAL_PATTERN = re.compile(
+    r"\((\d+),(\d+)\) ops and \(([\d.]+),([\d.]+)\) ops/second in \(([\d.]+),([\d.]+)\) seconds")
+
+
+def parse_interval_line(line):
+    '''
+    Parse one db_bench stats interval line
+
+    Parameters:
+    - line (str): A line of db_bench output
+
+    Returns:
+    - sample (IntervalSample): The parsed sample, None if the line is not an interval report
+    '''
+    if "ops/second" not in line:
+        return None
+
+    match = INTERVAL_PATTERN.search(line)
+    if match is None:
+        return None
+
+    return IntervalSample(
+        timestamp=float(match.group(6)),
+        interval_ops_per_sec=float(match.group(3)),
+        cumulative_ops_per_sec=float(match.group(4)),
+        interval_seconds=float(match.group(5)),
+        interval_ops=int(match.group(1)),
+        total_ops=int(match.group(2)),
+    )
+
+
+def monitor_db_bench_output(stream, callbacks=()):
+    '''
+    Walk the db_bench output line by line, parsing the stats interval reports as they arrive
+
+    Every parsed sample is handed to each callback before the line is yielded, so several
+    consumers (side checker, plotting, final parsing) can share a single pass over the output.
+
+    Parameters:
+    - stream (iterable): The db_bench stdout, e.g. Popen(...).stdout
+    - callbacks (iterable): Functions called with each IntervalSample
+
+    Returns:
+    - generator: Yields (line, sample) tuples, sample is None for non interval lines
+    '''
+    for line in stream:
+        sample = parse_interval_line(line)
+        if sample is not None:
+            for callback in callbacks:
+                callback(sample)
+        yield line, sample
+
+
+def samples_to_graph(samples):
+    '''
+    Convert the interval samples to the ops per second graph format
+
+    Parameters:
+    - samples (list): List of IntervalSample
+
+    Returns:
+    - graph (list): [timestamps, interval ops/sec]
+    '''
+    return [
+        [sample.timestamp for sample in samples],
+        [sample.interval_ops_per_sec for sample in samples],
+    ]
@@ -0,0 +1,442 @@
+'''
+Synthetic db_bench stand-in
+
+Run as `python -m rocksdb.db_bench_simulator <db_bench flags>`. It accepts the flags used by
+generate_db_bench_command, reads the options file and prints db_bench-like stdout (stats
+interval lines, the summary line and the latency histogram) with a throughput model driven
+by the main options. Simulated time runs DB_BENCH_SIMULATOR_SPEEDUP times faster than real
+time. This module must not import utils.constants, its argument parser would reject the
+db_bench flags.
+'''
+import os
+import sys
+import math
+import json
+import time
+import zlib
+import random
+import configparser
+from datetime import datetime
+
+# Simulated seconds per real second
+SPEEDUP = float(os.getenv("DB_BENCH_SIMULATOR_SPEEDUP", 100))
+KEY_SIZE = 16
+VALUE_SIZE = 100
+
+# Base throughput and operation type of each benchmark
+WORKLOAD_MODELS = {
+    "fillrandom": {"base_ops": 180000, "kind": "write"},
+    "readrandom": {"base_ops": 250000, "kind": "read"},
+    "readrandomwriterandom": {"base_ops": 200000, "kind": "mixed"},
+    "readwhilewriting": {"base_ops": 220000, "kind": "mixed"},
+    "mixgraph": {"base_ops": 150000, "kind": "mixed"},
+}
+
+# Options read by the throughput model, with their defaults
+MODEL_OPTIONS = {
+    "write_buffer_size": 67108864,
+    "max_write_buffer_number": 2,
+    "max_background_jobs": 2,
+    "max_subcompactions": 1,
+    "level0_slowdown_writes_trigger": 20,
+    "level0_file_num_compaction_trigger": 4,
+    "block_size": 4096,
+    "max_open_files": -1,
+    "stats_dump_period_sec": 600,
+}
+
+
+def parse_flags(argv):
+    '''
+    Parse the db_bench style --key=value flags
+
+    Parameters:
+    - argv (list): The command line arguments
+
+    Returns:
+    - flags (dict): The flags, boolean flags without a value are set to "true"
+    '''
+    flags = {}
+    for arg in argv:
+        if not arg.startswith("--"):
+            continue
+        key, _, value = arg[2:].partition("=")
+        flags[key] = value if value else "true"
+    return flags
+
+
+def load_options(options_file):
+    '''
+    Read the options used by the throughput model
+
+    Parameters:
+    - options_file (str): The path of the options file
+
+    Returns:
+    - options (dict): The model options plus the raw string options
+
+    Raises:
+    - ValueError: If the file cannot be parsed or a model option is not a number
+    '''
+    config = configparser.ConfigParser()
+    try:
+        config.read(options_file)
+    except configparser.Error as e:
+        raise ValueError(str(e))
+
+    raw = {}
+    for section in config.sections():
+        for key, value in config.items(section):
+            raw[key] = value.split("#")[0].strip()
+
+    options = dict(raw)
+    for key, default in MODEL_OPTIONS.items():
+        try:
+            options[key] = int(float(raw.get(key, default)))
+        except ValueError:
+            raise ValueError(f"Error parsing option {key}={raw[key]}")
+    return options
+
+
+def clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+def throughput_model(options, kind):
+    '''
+    Relative throughput of an options file, 1.0 for the default options
+
+    Parameters:
+    - options (dict): The options loaded by load_options
+    - kind (str): "write", "read" or "mixed"
+
+    Returns:
+    - factor (float): The throughput multiplier
+    - stall_period (float): Simulated seconds between two write stalls, 0 for none
+    '''
+    cpus = os.cpu_count() or 1
+
+    write_factor = clamp(1 + 0.25 * math.log2(max(options["write_buffer_size"], 1 << 20) / 67108864), 0.5, 1.6)
+    jobs = max(options["max_background_jobs"], 1)
+    write_factor *= clamp(1 + 0.15 * math.log2(jobs / 2), 0.7, 1.5)
+    if jobs > 2 * cpus:
+        write_factor *= 0.9
+    write_factor *= clamp(0.85 + 0.15 * math.sqrt(max(options["level0_slowdown_writes_trigger"], 1) / 20), 0.6, 1.2)
+    write_factor *= 1 + 0.05 * clamp(options["max_write_buffer_number"] - 2, -1, 4)
+    write_factor *= 1 + 0.05 * math.log2(max(options["max_subcompactions"], 1))
+    if options.get("enable_pipelined_write") == "true":
+        write_factor *= 1.05
+
+    read_factor = 1.0
+    if "bloom" in options.get("filter_policy", "").lower():
+        read_factor *= 1.3
+    read_factor *= 1 - 0.05 * abs(math.log2(max(options["block_size"], 512) / 8192))
+    if options["max_open_files"] != -1 and options["max_open_files"] < 1000:
+        read_factor *= 0.8
+    if options.get("cache_index_and_filter_blocks") == "true":
+        read_factor *= 0.95
+    # Many L0 files slow down the reads
+    read_factor *= clamp(1.1 - 0.025 * options["level0_file_num_compaction_trigger"], 0.6, 1.1)
+
+    if kind == "write":
+        factor = write_factor
+    elif kind == "read":
+        factor = read_factor
+    else:
+        factor = math.sqrt(write_factor * read_factor)
+
+    # Small memtables and low slowdown triggers make the writes stall periodically
+    stall_period = 0.0
+    if kind != "read":
+        stall_period = 15 * options["write_buffer_size"] / 67108864 * options["level0_slowdown_writes_trigger"] / 20
+    return clamp(factor, 0.2, 3.0), stall_period
+
+
+def percentiles(average, stall_period):
+    '''
+    Latency percentiles around the average latency, heavier tails with frequent stalls
+    '''
+    tail = 1 + (10 / stall_period if stall_period > 0 else 0)
+    return {
+        "P50": average * 0.6,
+        "P75": average * 0.9,
+        "P99": average * 4 * math.sqrt(tail),
+        "P99.9": average * 15 * tail,
+        "P99.99": average * 60 * tail,
+    }
+
+
+def print_histogram(operation, count, average, stall_period):
+    '''
+    Print the "Microseconds per ..." block of db_bench
+    '''
+    points = percentiles(average, stall_period)
+    print(f"Microseconds per {operation}:")
+    print(f"Count: {count} Average: {average:.4f}  StdDev: {average * 1.5:.2f}")
+    print(f"Min: 0  Median: {points['P50']:.4f}  Max: {int(points['P99.99'] * 10)}")
+    print(f"Percentiles: P50: {points['P50']:.2f} P75: {points['P75']:.2f} P99: {points['P99']:.2f} "
+          f"P99.9: {points['P99.9']:.2f} P99.99: {points['P99.99']:.2f}")
+    print("-" * 54)
+
+    # Bucket table, the shares follow the percentiles above
+    bounds = [0] + sorted({max(1, int(points[p])) for p in points}) + [int(points["P99.99"] * 10)]
+    shares = [0.5, 0.25, 0.24, 0.009, 0.0009, 0.0001]
+    cumulative = 0.0
+    for (low, high), share in zip(zip(bounds, bounds[1:]), shares):
+        cumulative += share * 100
+        bucket_count = int(count * share)
+        print(f"[ {low:7d}, {high:7d} ) {bucket_count:8d} {share * 100:7.3f}% {cumulative:7.3f}% "
+              + "#" * int(share * 20))
+    print()
+
+
+def print_statistics(kind, count, average, stall_period, options, log):
+    '''
+    Print the "STATISTICS:" ticker and histogram dump of --statistics
+    '''
+    reads = count if kind == "read" else (count // 2 if kind == "mixed" else 0)
+    writes = count - reads
+    bloom = "bloom" in options.get("filter_policy", "").lower()
+    # Caching the index and filter blocks moves their lookups into the block cache
+    metadata_lookups = reads * 2 if options.get("cache_index_and_filter_blocks") == "true" else 0
+    data_hits = int(reads * 0.35)
+    memtable_hits = int(reads * 0.05)
+    tickers = {
+        "rocksdb.block.cache.data.hit": data_hits,
+        "rocksdb.block.cache.data.miss": reads - data_hits,
+        "rocksdb.block.cache.index.hit": int(metadata_lookups * 0.45),
+        "rocksdb.block.cache.index.miss": metadata_lookups // 2 - int(metadata_lookups * 0.45),
+        "rocksdb.block.cache.filter.hit": int(metadata_lookups * 0.45) if bloom else 0,
+        "rocksdb.block.cache.filter.miss": metadata_lookups // 2 - int(metadata_lookups * 0.45) if bloom else 0,
+        "rocksdb.memtable.hit": memtable_hits,
+        "rocksdb.memtable.miss": reads - memtable_hits,
+        "rocksdb.bloom.filter.useful": int(reads * 0.6) if bloom else 0,
+        "rocksdb.bloom.filter.full.positive": reads - int(reads * 0.6) if bloom else 0,
+        "rocksdb.number.keys.written": writes,
+        "rocksdb.number.keys.read": reads,
+        "rocksdb.stall.micros": int(log.stall_seconds * 1e6),
+    }
+    tickers["rocksdb.block.cache.hit"] = sum(tickers[f"rocksdb.block.cache.{block}.hit"] for block in ["data", "index", "filter"])
+    tickers["rocksdb.block.cache.miss"] = sum(tickers[f"rocksdb.block.cache.{block}.miss"] for block in ["data", "index", "filter"])
+
+    histograms = {
+        "rocksdb.db.get.micros": (reads, average * 1.2),
+        "rocksdb.db.write.micros": (writes, average * 0.8),
+        "rocksdb.compaction.times.micros": (log.compactions, 800000),
+        "rocksdb.db.flush.micros": (log.flushes, 500000),
+    }
+    tail = 1 + (10 / stall_period if stall_period > 0 else 0)
+
+    print("STATISTICS:")
+    for name, value in sorted(tickers.items()):
+        print(f"{name} COUNT : {value}")
+    for name, (histogram_count, mean) in histograms.items():
+        if not histogram_count:
+            mean = 0
+        print(f"{name} P50 : {mean * 0.6:.6f} P95 : {mean * 1.8:.6f} P99 : {mean * 4 * math.sqrt(tail):.6f} "
+              f"P100 : {mean * 20 * tail:.6f} COUNT : {histogram_count} SUM : {int(histogram_count * mean)}")
+
+
+def write_fake_db(db_path, entries):
+    '''
+    Create the files of a database so that --use_existing_db and the DB cloning work
+    '''
+    os.makedirs(db_path, exist_ok=True)
+    with open(os.path.join(db_path, "CURRENT"), "w") as f:
+        f.write("MANIFEST-000001\n")
+    with open(os.path.join(db_path, "MANIFEST-000001"), "w") as f:
+        f.write(f"entries={entries}\n")
+    with open(os.path.join(db_path, "000010.sst"), "wb") as f:
+        f.write(b"\0" * 4096)
+
+
+class SimulatedLog:
+    '''
+    Write a RocksDB-like LOG: write stall lines, flush/compaction EVENT_LOG_v1 lines and
+    DUMP STATS blocks every stats_dump_period_sec simulated seconds
+    '''
+
+    def __init__(self, db_path, options):
+        log_path = os.path.join(db_path, "LOG")
+        # RocksDB keeps the LOG of the previous open as LOG.old.<micros>
+        if os.path.exists(log_path):
+            os.rename(log_path, f"{log_path}.old.{int(time.time() * 1e6)}")
+        self.file = open(log_path, "w")
+        self.options = options
+        self.stall_seconds = 0.0
+        self.stall_count = 0
+        self.stalled = False
+        self.flushes = 0
+        self.compactions = 0
+        self.written_bytes = 0
+        self.last_dump = 0.0
+        self.write("RocksDB version: 8.8.1 (simulated)")
+
+    def write(self, message):
+        timestamp = datetime.now().strftime("%Y/%m/%d-%H:%M:%S.%f")
+        self.file.write(f"{timestamp} 7f0000000000 {message}\n")
+        self.file.flush()
+
+    def update(self, elapsed, step, written_bytes, stalled):
+        '''
+        Account one stats interval of the benchmark
+        '''
+        if stalled:
+            if not self.stalled:
+                self.stall_count += 1
+                self.write(f"[default] Stalling writes because we have "
+                           f"{self.options['level0_slowdown_writes_trigger']} level-0 files rate 16777216")
+            self.stall_seconds += step * 0.7
+        self.stalled = stalled
+
+        self.written_bytes += written_bytes
+        while self.written_bytes >= self.options["write_buffer_size"]:
+            self.written_bytes -= self.options["write_buffer_size"]
+            self.flushes += 1
+            self.write("EVENT_LOG_v1 " + json.dumps({"time_micros": int(time.time() * 1e6), "job": self.flushes,
+                                                    "event": "flush_finished", "lsm_state": [self.l0_files()]}))
+            if self.flushes % max(self.options["level0_file_num_compaction_trigger"], 1) == 0:
+                self.compactions += 1
+                self.write("EVENT_LOG_v1 " + json.dumps({"time_micros": int(time.time() * 1e6), "job": self.flushes,
+                                                        "event": "compaction_finished", "output_level": 1,
+                                                        "compaction_time_micros": 800000}))
+
+        period = self.options["stats_dump_period_sec"]
+        if period > 0 and elapsed - self.last_dump >= period:
+            self.dump_stats(elapsed, elapsed - self.last_dump)
+            self.last_dump = elapsed
+
+    def l0_files(self):
+        return self.flushes % max(self.options["level0_file_num_compaction_trigger"], 1)
+
+    def dump_stats(self, uptime, interval):
+        buffer_mb = self.options["write_buffer_size"] / 1048576
+        l0_files = self.l0_files()
+        l1_files = self.compactions * max(self.options["level0_file_num_compaction_trigger"], 1)
+        stall = time.strftime("%H:%M:%S", time.gmtime(self.stall_seconds))
+        self.write("------- DUMP STATS -------")
+        self.write("\n** DB Stats **")
+        lines = [
+            f"Uptime(secs): {uptime:.1f} total, {interval:.1f} interval",
+            f"Cumulative stall: {stall}.{int(self.stall_seconds % 1 * 1000):03d} H:M:S, "
+            f"{self.stall_seconds / uptime * 100:.1f} percent",
+            "",
+            "** Compaction Stats [default] **",
+            "Level    Files   Size     Score Read(GB)  Rn(GB) Rnp1(GB) Write(GB) Wnew(GB) Moved(GB) W-Amp "
+            "Rd(MB/s) Wr(MB/s) Comp(sec) CompMergeCPU(sec) Comp(cnt) Avg(sec) KeyIn KeyDrop",
+            "-" * 120,
+            f"  L0    {l0_files}/0   {l0_files * buffer_mb:.2f} MB   {l0_files / 4:.1f}      0.0     0.0      0.0"
+            f"       {self.flushes * buffer_mb / 1024:.1f}      0.0       0.0   1.0      0.0     90.0"
+            f"     {self.flushes * 0.5:.2f}              0.00  {self.flushes}    0.500       0      0",
+            f"  L1    {l1_files}/0   {l1_files * buffer_mb:.2f} MB   0.9      0.0     0.0      0.0"
+            f"       {self.compactions * buffer_mb * 4 / 1024:.1f}      0.0       0.0   1.0      0.0     90.0"
+            f"     {self.compactions * 0.8:.2f}              0.00  {self.compactions}    0.800       0      0",
+            "",
+            f"Stalls(count): {self.stall_count} level0_slowdown, 0 level0_slowdown_with_compaction, "
+            f"0 level0_numfiles, 0 level0_numfiles_with_compaction, 0 stop for pending_compaction_bytes, "
+            f"0 slowdown for pending_compaction_bytes, 0 memtable_compaction, 0 memtable_slowdown, "
+            f"interval 0 total count",
+        ]
+        self.file.write("\n".join(lines) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def run(argv):
+    '''
+    Simulate one db_bench invocation
+
+    Parameters:
+    - argv (list): The db_bench flags
+
+    Returns:
+    - exit_code (int): The process exit code
+    '''
+    flags = parse_flags(argv)
+    benchmark = flags.get("benchmarks", "fillrandom").split(",")[0]
+    model = WORKLOAD_MODELS.get(benchmark)
+    db_path = flags.get("db", "/tmp/db_bench_simulator")
+    options_file = flags.get("options_file")
+
+    if options_file is not None:
+        try:
+            options = load_options(options_file)
+        except (OSError, ValueError) as e:
+            print(f"Unable to load options file {options_file} --- Invalid argument: {e}")
+            return 1
+    else:
+        options = dict(MODEL_OPTIONS)
+
+    if model is None:
+        print(f"unknown benchmark '{benchmark}'")
+        return 1
+    if flags.get("use_existing_db") == "true" and not os.path.exists(os.path.join(db_path, "CURRENT")):
+        print(f"open error: Invalid argument: {db_path}/CURRENT: does not exist (create_if_missing is false)")
+        return 1
+
+    num = int(flags.get("num", 1000000))
+    duration = float(flags.get("duration", 0))
+    interval = float(flags.get("stats_interval_seconds", 0))
+    factor, stall_period = throughput_model(options, model["kind"])
+    target_ops = model["base_ops"] * factor
+    rng = random.Random(zlib.crc32(repr(sorted(options.items())).encode()))
+
+    print("Set seed to 0 because --seed was 0")
+    print("Initializing RocksDB Options from the specified file")
+    print("Initializing RocksDB Options from command-line flags")
+    print("RocksDB:    version 8.8.1 (simulated)")
+    print(f"Date:       {datetime.now().strftime('%a %b %d %H:%M:%S %Y')}")
+    print(f"Keys:       {KEY_SIZE} bytes each (+ 0 bytes user-defined timestamp)")
+    print(f"Values:     {VALUE_SIZE} bytes each ({VALUE_SIZE // 2} bytes after compression)")
+    print(f"Entries:    {num}")
+    print(f"DB path: [{db_path}]")
+    sys.stdout.flush()
+    write_fake_db(db_path, num)
+    log = SimulatedLog(db_path, options)
+
+    # Without --duration the benchmark runs until num operations are done
+    elapsed = 0.0
+    total_ops = 0
+    step = interval if interval > 0 else 1.0
+    while (duration > 0 and elapsed < duration) or (duration <= 0 and total_ops < num):
+        elapsed += step
+        # Warm-up ramp, noise and periodic write stalls
+        rate = target_ops * min(1.0, 0.4 + 0.6 * elapsed / 30) * rng.gauss(1.0, 0.05)
+        stalled = stall_period > 0 and elapsed % stall_period < 2 * step
+        if stalled:
+            rate *= 0.3
+        interval_ops = max(int(rate * step), 0)
+        if duration <= 0:
+            interval_ops = min(interval_ops, num - total_ops)
+        total_ops += interval_ops
+        written = interval_ops * (KEY_SIZE + VALUE_SIZE) if model["kind"] != "read" else 0
+        log.update(elapsed, step, written, stalled)
+
+        time.sleep(step / SPEEDUP)
+        if interval > 0:
+            timestamp = datetime.now().strftime("%Y/%m/%d-%H:%M:%S")
+            print(f"{timestamp}  ... thread 0: ({interval_ops},{total_ops}) ops and "
+                  f"({interval_ops / step:.1f},{total_ops / elapsed:.1f}) ops/second in "
+                  f"({step:.6f},{elapsed:.6f}) seconds")
+            sys.stdout.flush()
+
+    ops_per_sec = int(total_ops / elapsed) if elapsed > 0 else 0
+    micros_per_op = 1e6 / ops_per_sec if ops_per_sec > 0 else 0.0
+    megabytes_per_sec = ops_per_sec * (KEY_SIZE + VALUE_SIZE) / 1048576
+    extra = f" {megabytes_per_sec:6.1f} MB/s"
+    if model["kind"] != "write":
+        extra += f" ({total_ops} of {total_ops} found)\n"
+
+    print(f"{benchmark:<12} : {micros_per_op:11.3f} micros/op {ops_per_sec} ops/sec {elapsed:.3f} seconds "
+          f"{total_ops} operations;{extra}")
+    print_histogram("write" if model["kind"] == "write" else "read", total_ops, micros_per_op, stall_period)
+    if flags.get("statistics") == "true":
+        print_statistics(model["kind"], total_ops, micros_per_op, stall_period, options, log)
+    log.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(sys.argv[1:]))
@@ -0,0 +1,90 @@
+import math
+from statistics import NormalDist
+
+
+def batch_means_standard_error(values, batch_count=10):
+    '''
+    Standard error of the mean of an autocorrelated series using the batch means method
+
+    Consecutive per-second throughput readings are strongly correlated, so the naive
+    std / sqrt(n) underestimates the error. Averaging contiguous batches first gives
+    nearly independent observations. Every sample is used, when the series does not
+    divide evenly the batches differ by at most one sample.
+
+    Parameters:
+    - values (list): The series
+    - batch_count (int): The number of batches
+
+    Returns:
+    - standard_error (float): The standard error of the mean, inf if there is not enough data
+    '''
+    if len(values) < batch_count:
+        return math.inf
+
+    bounds = [i * len(values) // batch_count for i in range(batch_count + 1)]
+    batch_means = [sum(values[bounds[i]:bounds[i + 1]]) / (bounds[i + 1] - bounds[i])
+                   for i in range(batch_count)]
+    mean = sum(values) / len(values)
+    variance = sum((batch_mean - mean) ** 2 for batch_mean in batch_means) / (batch_count - 1)
+    return math.sqrt(variance / batch_count)
+
+
+class EarlyStoppingEngine:
+    '''
+    Track the throughput distribution of a running benchmark and decide if it is clearly
+    losing against the incumbent best throughput.
+
+    A run is stopped when the upper confidence bound of its mean throughput falls below
+    the incumbent, i.e. even an optimistic estimate of the candidate cannot win.
+    '''
+
+    def __init__(self, incumbent_throughput, confidence=0.99, min_seconds=30, check_interval=30):
+        '''
+        Parameters:
+        - incumbent_throughput (float): Ops/sec of the best options file so far
+        - confidence (float): One sided confidence level of the bound
+        - min_seconds (float): Seconds observed before any decision is taken
+        - check_interval (float): Seconds between two decisions
+        '''
+        self.incumbent_throughput = float(incumbent_throughput)
+        self.z_score = NormalDist().inv_cdf(confidence)
+        self.min_seconds = min_seconds
+        self.check_interval = check_interval
+        self.values = []
+        self.last_check = 0.0
+        self.upper_bound = math.inf
+
+    def mean(self):
+        return sum(self.values) / len(self.values) if self.values else 0.0
+
+    def update(self, sample):
+        '''
+        Add an interval sample
+
+        Parameters:
+        - sample (IntervalSample): The latest interval sample
+
+        Returns:
+        - stop (bool): True if the run should be stopped
+        '''
+        self.values.append(sample.interval_ops_per_sec)
+        if sample.timestamp < self.min_seconds or sample.timestamp - self.last_check < self.check_interval:
+            return False
+
+        self.last_check = sample.timestamp
+        self.upper_bound = self.mean() + self.z_score * batch_means_standard_error(self.values)
+        return self.upper_bound < self.incumbent_throughput
+
+    def summary(self):
+        '''
+        Summary of the tracked distribution
+
+        Returns:
+        - summary (dict): The number of samples, mean, upper bound and incumbent throughput
+        '''
+        return {
+            "samples": len(self.values),
+            "mean_ops_per_sec": self.mean(),
+            "upper_bound_ops_per_sec": self.upper_bound,
+            "incumbent_ops_per_sec": self.incumbent_throughput,
+        }
@@ -0,0 +1,154 @@
+import os
+import math
+
+from rocksdb.scoring import score
+from rocksdb.speculative import run_candidates
+from rocksdb.result_cache import IGNORED_OPTIONS
+from options_files.ops_options_file import parse_option_file_to_dict
+from options_files.options_model import parse_options
+from options_files.options_validator import SCHEMA, validate_value
+from utils.utils import log_update
+from utils.constants import LOCAL_SEARCH_KNOBS, LOCAL_SEARCH_DURATION
+
+# Multiples of the LLM value tried for every knob, a log-scale grid around it
+GRID_FACTORS = [0.25, 0.5, 1, 2, 4]
+
+
+def numeric_changes(base_options, new_options):
+    '''
+    Function to find the numeric options the LLM changed, the largest changes first
+
+    Parameters:
+    - base_options (str): The options file the LLM started from
+    - new_options (str): The options file generated by the LLM
+
+    Returns:
+    - changes (list): (section, option, old value, new value) tuples
+    '''
+    base_sections = parse_option_file_to_dict(base_options)
+    changes = []
+    for section, options in parse_option_file_to_dict(new_options).items():
+        for key, value in options.items():
+            spec = SCHEMA.get(section, {}).get(key)
+            old_value = base_sections.get(section, {}).get(key)
+            if key in IGNORED_OPTIONS or spec is None or spec["type"] not in ("int", "float") or old_value is None or old_value == value:
+                continue
+            try:
+                old_number, new_number = float(old_value), float(value)
+            except ValueError:
+                continue
+            # A sentinel (0 for disabled, -1 for automatic) has no magnitude to refine
+            if old_number <= 0 or new_number <= 0:
+                continue
+            changes.append((section, key, old_value, value))
+
+    changes.sort(key=lambda change: abs(math.log(float(change[3]) / float(change[2]))), reverse=True)
+    return changes
+
+
+def set_option(options, section, key, value):
+    '''
+    Function to change one option of an options file
+
+    Returns:
+    - options (str): The options file with the new value
+    '''
+    options_file = parse_options(options)
+    options_file.set(section, key, value)
+    return options_file.serialize()
+
+
+def knob_grid(section, key, value):
+    '''
+    Function to list the legal values of the log-scale grid around a value
+
+    Returns:
+    - values (list): The distinct values, clamped to the legal range of the option
+    '''
+    spec = SCHEMA[section][key]
+    values = []
+    for factor in GRID_FACTORS:
+        number = float(value) * factor
+        candidate = str(int(round(number))) if spec["type"] == "int" else f"{number:f}"
+        candidate, _ = validate_value(key, candidate, spec, value)
+        if candidate is not None and candidate not in values:
+            values.append(candidate)
+    return values
+
+
+def successive_halving(candidates, evaluate):
+    '''
+    Function to keep the better half of the candidates, doubling the run length, until one is left
+
+    Parameters:
+    - candidates (list): The candidates
+    - evaluate (function): Called with the candidates and a duration, returns their scores (None for a failed run)
+
+    Returns:
+    - best (object): The best candidate, None if every run failed
+    '''
+    duration = LOCAL_SEARCH_DURATION
+    while len(candidates) > 1:
+        scores = evaluate(candidates, duration)
+        ranked = sorted([(candidate_score, index) for index, candidate_score in enumerate(scores)
+                         if candidate_score is not None], reverse=True)
+        candidates = [candidates[index] for _, index in ranked[:max(1, len(candidates) // 2)]]
+        duration *= 2
+    return candidates[0] if candidates else None
+
+
+def refine_numeric_options(base_options, new_options, db_path, output_folder_dir, iteration_count, options_files,
+                           slots=None):
+    '''
+    Refine the magnitudes of the numeric options the LLM changed with short runs
+
+    The LLM picks the options and the direction, then coordinate descent goes over the
+    LOCAL_SEARCH_KNOBS most changed options: every knob is tried on a log-scale grid around
+    the LLM value by successive halving, the others staying at their best value so far.
+
+    Parameters:
+    - base_options (str): The options file the LLM started from
+    - new_options (str): The options file generated by the LLM
+    - db_path (str): The path of the database
+    - output_folder_dir (str): The output directory, the short runs are stored in its local_search folder
+    - iteration_count (int): The current iteration
+    - options_files (list): List of the previous options files
+    - slots (list): The slots built by build_slots, None to run one after the other
+
+    Returns:
+    - options (str): The refined options file
+    - notes (str): The refined values, for the reasoning
+    '''
+    changes = numeric_changes(base_options, new_options)[:LOCAL_SEARCH_KNOBS]
+    if not changes:
+        return new_options, ""
+
+    search_dir = os.path.join(output_folder_dir, "local_search")
+    os.makedirs(search_dir, exist_ok=True)
+    reference = options_files[0][1]
+
+    def evaluate(candidates, duration):
+        log_update(f"[LCS] Running {len(candidates)} candidates for {duration} seconds")
+        results = run_candidates(slots, db_path, search_dir, [(options, "Local search", "") for _, options in candidates],
+                                 iteration_count, None, options_files, duration)
+        return [None if result[0] else score(result[1], reference) for result in results]
+
+    options = new_options
+    notes = []
+    for section, key, old_value, value in changes:
+        grid = knob_grid(section, key, value)
+        log_update(f"[LCS] Refining {key} (LLM moved it from {old_value} to {value}) over {grid}")
+        print(f"[LCS] Refining {key} over {grid}")
+        best = successive_halving([(grid_value, set_option(options, section, key, grid_value)) for grid_value in grid],
+                                  evaluate)
+        if best is None:
+            log_update(f"[LCS] Every run of {key} failed, keeping {value}")
+            continue
+        options = best[1]
+        log_update(f"[LCS] Best {key}: {best[0]}")
+        if float(best[0]) != float(value):
+            notes.append(f"{key}: {value} -> {best[0]}")
+
+    if notes:
+        return options, "\nLocal search refined " + ", ".join(notes)
+    return options, ""
@@ -0,0 +1,385 @@
+import os
+import re
+import json
+import time
+import shutil
+import threading
+from datetime import datetime
+
+# The RocksDB LOG of the database directory
+# - "------- DUMP STATS -------" blocks every stats_dump_period_sec with the DB stats
+#   (uptime, cumulative/interval stall time) and the per-level "Compaction Stats" table
+# - "Stalling writes because ..." / "Stopping writes because ..." lines when a stall starts
+# - EVENT_LOG_v1 JSON lines for every flush and compaction
+LOG_TIMESTAMP_PATTERN = re.compile(r"^(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)")
+UPTIME_PATTERN = re.compile(r"Uptime\(secs\): ([\d.]+) total, ([\d.]+) interval")
+STALL_TIME_PATTERN = re.compile(r"(Cumulative|Interval) stall: (\d+):(\d+):([\d.]+) H:M:S, ([\d.]+) percent")
+CUMULATIVE_COMPACTION_PATTERN = re.compile(
+    r"Cumulative compaction: ([\d.]+) GB write, ([\d.]+) MB/s write, ([\d.]+) GB read, "
+    r"([\d.]+) MB/s read, ([\d.]+) seconds")
+FLUSH_PATTERN = re.compile(r"Flush\(GB\): cumulative ([\d.]+), interval ([\d.]+)")
+# "Stalls(count): 0 level0_slowdown, 0 level0_numfiles, ..., interval 0 total count" (before 8.x)
+OLD_STALL_COUNT_PATTERN = re.compile(r"(\d+) ([a-z0-9_ ]+?)(?:,|$)")
+# "Write Stall (count): l0-file-count-limit-delays: 0, memtable-limit-stops: 0, ..." (8.x)
+STALL_COUNT_PATTERN = re.compile(r"([a-z0-9-]+): (\d+)")
+STALL_EVENT_PATTERN = re.compile(
+    r"\[(.*?)\] (Stalling|Stopping) writes because "
+    r"(?:we have (\d+) (level-0 files|immutable memtables)|of estimated pending compaction bytes (\d+))")
+STALL_REASONS = {
+    "level-0 files": "level0_files",
+    "immutable memtables": "memtables",
+    None: "pending_compaction_bytes",
+}
+SIZE_UNITS = {"B": 1 / 1048576, "KB": 1 / 1024, "MB": 1, "GB": 1024, "TB": 1048576}
+
+
+def parse_log_timestamp(line):
+    '''
+    Function to read the timestamp at the start of a LOG line
+
+    Parameters:
+    - line (str): A line of the RocksDB LOG
+
+    Returns:
+    - timestamp (float): Seconds since the epoch, None if the line has no timestamp
+    '''
+    match = LOG_TIMESTAMP_PATTERN.match(line)
+    if match is None:
+        return None
+    return datetime.strptime(match.group(1), "%Y/%m/%d-%H:%M:%S.%f").timestamp()
+
+
+def parse_stall_counts(line):
+    '''
+    Function to parse the stall counters of a DUMP STATS block, both the pre 8.x
+    "Stalls(count)" line and the 8.x "Write Stall (count)" line
+
+    Parameters:
+    - line (str): The stall counters line
+
+    Returns:
+    - stall_counts (dict): The count of every stall cause
+    '''
+    counters = line.split(":", 1)[1]
+    if line.lstrip().startswith("Stalls(count)"):
+        counts = {name.strip(): int(count) for count, name in OLD_STALL_COUNT_PATTERN.findall(counters)}
+        # The trailing "interval 0 total count" is the interval total, not a cause
+        counts.pop("total count", None)
+        return counts
+    counts = {name: int(count) for name, count in STALL_COUNT_PATTERN.findall(counters)}
+    counts.pop("interval", None)
+    return counts
+
+
+def parse_compaction_row(header, line):
+    '''
+    Function to parse one level row of the "Compaction Stats" table
+
+    The Size column is printed as a value and a unit ("128.00 MB"), every other column is a
+    single token, so the columns after Size are matched with the header by position.
+
+    Parameters:
+    - header (list): The column names of the table
+    - line (str): The row, e.g. "  L0      2/0   128.00 MB   0.5  ..."
+
+    Returns:
+    - level (str): The level name (L0, L1, ..., Sum, Int)
+    - stats (dict): The columns of the row
+    '''
+    tokens = line.split()
+    stats = {"files": tokens[1], "size_mb": float(tokens[2]) * SIZE_UNITS.get(tokens[3], 1)}
+    for name, value in zip(header[3:], tokens[4:]):
+        try:
+            stats[name] = float(value)
+        except ValueError:
+            stats[name] = value
+    return tokens[0], stats
+
+
+class LogStatsParser:
+    '''
+    Turn the RocksDB LOG lines into structured time series
+
+    The lines are fed one at a time, so the parser works both on a LOG being written
+    and on a finished one.
+    '''
+
+    def __init__(self, start_time=None):
+        '''
+        Parameters:
+        - start_time (float): Epoch seconds the stall events are timed from, the first LOG line if None
+        '''
+        self.start_time = start_time
+        self.dumps = []
+        self.stall_events = []
+        self.flushes = 0
+        self.compactions = 0
+        self.compaction_seconds_by_level = {}
+        self.compaction_header = None
+
+    def feed(self, line):
+        '''
+        Parse one LOG line
+
+        Parameters:
+        - line (str): A line of the RocksDB LOG
+
+        Returns:
+        - None
+        '''
+        if self.start_time is None:
+            self.start_time = parse_log_timestamp(line)
+
+        if "DUMP STATS" in line:
+            self.dumps.append({"levels": {}, "stall_counts": {}})
+            self.compaction_header = None
+            return
+        if "EVENT_LOG_v1" in line:
+            self._feed_event(line)
+            return
+        if "writes because" in line:
+            self._feed_stall_event(line)
+            return
+        if not self.dumps:
+            return
+
+        self._feed_dump_line(self.dumps[-1], line.strip())
+
+    def _feed_dump_line(self, dump, line):
+        if line.startswith("Level ") and "Files" in line:
+            self.compaction_header = line.split()
+            return
+        if line.startswith("Priority "):
+            # The per-priority table of the same block is not per level
+            self.compaction_header = None
+            return
+        if self.compaction_header is not None and re.match(r"(L\d+|Sum|Int)\s", line):
+            level, stats = parse_compaction_row(self.compaction_header, line)
+            # Only the first column family table of the block is kept
+            dump["levels"].setdefault(level, stats)
+            return
+        if line.startswith("Stalls(count)") or line.startswith("Write Stall (count)"):
+            for name, count in parse_stall_counts(line).items():
+                dump["stall_counts"][name] = dump["stall_counts"].get(name, 0) + count
+            return
+
+        match = UPTIME_PATTERN.search(line)
+        if match is not None:
+            dump.setdefault("uptime", float(match.group(1)))
+            dump.setdefault("interval", float(match.group(2)))
+            return
+        match = STALL_TIME_PATTERN.search(line)
+        if match is not None:
+            seconds = int(match.group(2)) * 3600 + int(match.group(3)) * 60 + float(match.group(4))
+            prefix = match.group(1).lower()
+            dump[f"{prefix}_stall_seconds"] = seconds
+            dump[f"{prefix}_stall_percent"] = float(match.group(5))
+            return
+        match = CUMULATIVE_COMPACTION_PATTERN.search(line)
+        if match is not None:
+            dump.setdefault("cumulative_compaction", {
+                "write_gb": float(match.group(1)),
+                "read_gb": float(match.group(3)),
+                "seconds": float(match.group(5)),
+            })
+            return
+        match = FLUSH_PATTERN.search(line)
+        if match is not None:
+            dump.setdefault("flush_gb", float(match.group(1)))
+
+    def _feed_event(self, line):
+        try:
+            event = json.loads(line[line.index("{"):])
+        except ValueError:
+            return
+        if event.get("event") == "flush_finished":
+            self.flushes += 1
+        elif event.get("event") == "compaction_finished":
+            self.compactions += 1
+            level = f"L{event.get('output_level', '?')}"
+            seconds = event.get("compaction_time_micros", 0) / 1e6
+            self.compaction_seconds_by_level[level] = self.compaction_seconds_by_level.get(level, 0) + seconds
+
+    def _feed_stall_event(self, line):
+        match = STALL_EVENT_PATTERN.search(line)
+        if match is None:
+            return
+        timestamp = parse_log_timestamp(line)
+        self.stall_events.append({
+            "t": round(timestamp - self.start_time, 3) if None not in (timestamp, self.start_time) else None,
+            "action": "stop" if match.group(2) == "Stopping" else "slowdown",
+            "reason": STALL_REASONS[match.group(4)],
+            "value": int(match.group(3) or match.group(5)),
+        })
+
+    def result(self):
+        '''
+        Get the parsed LOG stats
+
+        Returns:
+        - log_stats (dict): The DUMP STATS blocks, the stall events, the flush and compaction
+          counts, and the stall time series ([uptime, interval stall seconds])
+        '''
+        dumps = [dump for dump in self.dumps if "uptime" in dump]
+
+        # Older LOGs only print the cumulative stall time
+        interval_stalls = []
+        previous_stall = 0.0
+        for dump in dumps:
+            cumulative_stall = dump.get("cumulative_stall_seconds", previous_stall)
+            interval_stalls.append(dump.get("interval_stall_seconds", cumulative_stall - previous_stall))
+            previous_stall = cumulative_stall
+
+        return {
+            "dumps": dumps,
+            "stall_events": self.stall_events,
+            "stall_timeline": [[dump["uptime"] for dump in dumps], interval_stalls],
+            "flushes": self.flushes,
+            "compactions": self.compactions,
+            "compaction_seconds_by_level": self.compaction_seconds_by_level,
+        }
+
+
+class LogTailer:
+    '''
+    Follow the RocksDB LOG of a database while db_bench runs, in a background thread
+
+    db_bench renames the LOG of an existing database to LOG.old.* when it opens it, the
+    tailer waits for a LOG it has not seen at start and reopens it if it is replaced.
+    '''
+
+    def __init__(self, database_path, poll_interval=1.0):
+        '''
+        Parameters:
+        - database_path (str): The database directory
+        - poll_interval (float): Seconds between two reads of the LOG
+        '''
+        self.log_path = os.path.join(database_path, "LOG")
+        self.poll_interval = poll_interval
+        self.parser = LogStatsParser()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.file = None
+        self.inode = None
+        self.partial_line = ""
+        self.stale_inode = None
+
+    def start(self):
+        self.parser.start_time = time.time()
+        try:
+            self.stale_inode = os.stat(self.log_path).st_ino
+        except OSError:
+            self.stale_inode = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        '''
+        Stop following the LOG, the lines written so far are parsed
+
+        Returns:
+        - log_stats (dict): The result of LogStatsParser.result
+        '''
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        self._read()
+        if self.partial_line:
+            self.parser.feed(self.partial_line)
+            self.partial_line = ""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        return self.parser.result()
+
+    def _run(self):
+        while not self.stop_event.wait(self.poll_interval):
+            self._read()
+
+    def _read(self):
+        try:
+            inode = os.stat(self.log_path).st_ino
+        except OSError:
+            return
+        if inode == self.stale_inode:
+            return
+
+        if inode != self.inode:
+            if self.file is not None:
+                # Finish the replaced LOG before switching
+                self._read_lines()
+                self.file.close()
+            self.file = open(self.log_path, "r", errors="replace")
+            self.inode = inode
+            self.partial_line = ""
+        self._read_lines()
+
+    def _read_lines(self):
+        data = self.partial_line + self.file.read()
+        lines = data.split("\n")
+        # The last piece may be a line still being written
+        self.partial_line = lines.pop()
+        for line in lines:
+            self.parser.feed(line)
+
+
+def summarize_log_stats(log_stats):
+    '''
+    Function to summarize the LOG stats of a run for the prompts
+
+    Parameters:
+    - log_stats (dict): The result of LogTailer.stop
+
+    Returns:
+    - summary (dict): The stall time and causes, the flush and compaction counts and the
+      final LSM shape, None if the LOG had no stats
+    '''
+    if not log_stats or (not log_stats["dumps"] and not log_stats["stall_events"]):
+        return None
+
+    summary = {
+        "stall_seconds": None,
+        "stall_percent": None,
+        "stall_reasons": {},
+        "flushes": log_stats["flushes"],
+        "compactions": log_stats["compactions"],
+        "levels": {},
+    }
+
+    for event in log_stats["stall_events"]:
+        key = f"{event['reason']}_{event['action']}"
+        summary["stall_reasons"][key] = summary["stall_reasons"].get(key, 0) + 1
+
+    if log_stats["dumps"]:
+        last_dump = log_stats["dumps"][-1]
+        summary["stall_seconds"] = last_dump.get("cumulative_stall_seconds")
+        summary["stall_percent"] = last_dump.get("cumulative_stall_percent")
+        # The counters are cumulative, the last block has the totals
+        if not summary["stall_reasons"]:
+            summary["stall_reasons"] = {name: count for name, count in last_dump["stall_counts"].items()
+                                        if count and not name.startswith("total")}
+        summary["levels"] = {level: {"files": stats["files"], "size_mb": round(stats["size_mb"], 1),
+                                     "write_amp": stats.get("W-Amp")}
+                             for level, stats in last_dump["levels"].items() if level != "Int"}
+    return summary
+
+
+def archive_log(database_path, output_file_dir, run_name, log_stats):
+    '''
+    Function to store the RocksDB LOG and its parsed stats with the run, before the
+    database is torn down by the next run
+
+    Parameters:
+    - database_path (str): The database directory
+    - output_file_dir (str): The output directory
+    - run_name (str): The name of the run the files are stored under
+    - log_stats (dict): The result of LogTailer.stop
+
+    Returns:
+    - None
+    '''
+    log_path = os.path.join(database_path, "LOG")
+    if os.path.exists(log_path):
+        shutil.copyfile(log_path, os.path.join(output_file_dir, f"LOG_{run_name}"))
+    with open(os.path.join(output_file_dir, f"log_stats_{run_name}.json"), "w") as f:
+        json.dump(log_stats, f)
@@ -1,143 +1,375 @@
 import re
-import os
 from utils.utils import log_update
+from rocksdb.db_bench_monitor import INTERVAL_PATTERN, samples_to_graph
+from rocksdb.workloads import WORKLOADS, get_workload
 
-def parse_db_bench_output(output):
-    
-    if re.match("Unable to load options file.*", output) is not None:
+# The output is read in a single pass, line by line, with these precompiled patterns.
+# A db_bench output is made of benchmark sections, e.g. for "--benchmarks=fillrandom,readrandom":
+#
+# fillrandom   :       5.123 micros/op 195000 ops/sec 100.000 seconds 19500000 operations;   21.6 MB/s
+# Microseconds per write:
+# Count: 19500000 Average: 5.1234  StdDev: 10.00
+# Min: 0  Median: 3.0000  Max: 12345
+# Percentiles: P50: 3.00 P75: 4.50 P99: 20.00 P99.9: 100.00 P99.99: 500.00
+# ------------------------------------------------------
+# [       0,       1 ]   123456  12.345%  12.345% ##
+# (       1,       2 ]   ...
+#
+# readrandom   :       4.250 micros/op 235287 ops/sec 1000.000 seconds 235287516 operations;   26.0 MB/s (235287516 of 235287516 found)
+# ...
+#
+# followed by the "STATISTICS:" dump when --statistics is set.
+ENTRIES_PATTERN = re.compile(r"Entries:\s+(\d+)")
+# Summary line, db_bench before 7.x does not print the seconds and operations
+SUMMARY_PATTERN = re.compile(
+    r"^(\S+)\s+:\s+(\d+\.\d+)\s+micros/op\s+(\d+)\s+ops/sec(?:\s+(\d+\.\d+)\s+seconds\s+(\d+)\s+operations)?;(.*)$")
+DATA_SPEED_PATTERN = re.compile(r"^\s*(\d+\.\d+)\s+(\w+/s)")
+FOUND_PATTERN = re.compile(r"\((\d+)\s+of\s+(\d+)\s+found\)")
+HISTOGRAM_START = "Microseconds per "
+HISTOGRAM_COUNT_PATTERN = re.compile(r"^Count:\s+(\d+)\s+Average:\s+([\d.]+)\s+StdDev:\s+([\d.]+)")
+HISTOGRAM_RANGE_PATTERN = re.compile(r"^Min:\s+([\d.]+)\s+Median:\s+([\d.]+)\s+Max:\s+([\d.]+)")
+PERCENTILE_PATTERN = re.compile(r"(P[\d.]+):\s+([\d.]+)")
+BUCKET_PATTERN = re.compile(r"^[\[(]\s*(\d+),\s*(\d+)\s*[\])]\s+(\d+)\s+([\d.]+)%\s+([\d.]+)%")
+
+# "--statistics" dump printed after the summary, e.g.
+# "rocksdb.block.cache.hit COUNT : 1234"
+# "rocksdb.db.get.micros P50 : 2.5 P95 : 5.0 P99 : 9.1 P100 : 310.0 COUNT : 1000 SUM : 5000"
+STATISTICS_START = "STATISTICS:"
+STATISTICS_TICKER_PATTERN = re.compile(r"^(rocksdb\.[\w.]+) COUNT : (\d+)$")
+STATISTICS_HISTOGRAM_PATTERN = re.compile(
+    r"^(rocksdb\.[\w.]+) P50 : ([\d.]+) P95 : ([\d.]+) P99 : ([\d.]+) P100 : ([\d.]+) COUNT : (\d+) SUM : (\d+)")
+
+# Hit rates derived from the tickers: (hits, misses)
+STATISTICS_HIT_RATES = {
+    "block_cache_hit_rate": ("rocksdb.block.cache.hit", "rocksdb.block.cache.miss"),
+    "block_cache_data_hit_rate": ("rocksdb.block.cache.data.hit", "rocksdb.block.cache.data.miss"),
+    "block_cache_index_hit_rate": ("rocksdb.block.cache.index.hit", "rocksdb.block.cache.index.miss"),
+    "block_cache_filter_hit_rate": ("rocksdb.block.cache.filter.hit", "rocksdb.block.cache.filter.miss"),
+    "memtable_hit_rate": ("rocksdb.memtable.hit", "rocksdb.memtable.miss"),
+    # A "useful" check skipped reading a file, a positive had to read it
+    "bloom_filter_useful_rate": ("rocksdb.bloom.filter.useful", "rocksdb.bloom.filter.full.positive"),
+}
+
+# Per-operation latency histograms
+STATISTICS_LATENCIES = {
+    "get": "rocksdb.db.get.micros",
+    "write": "rocksdb.db.write.micros",
+    "compaction": "rocksdb.compaction.times.micros",
+    "flush": "rocksdb.db.flush.micros",
+}
+
+# The histogram of each workload parser
+PARSER_HISTOGRAMS = {
+    "write": "write",
+    "read": "read",
+    "ops": None,
+}
+
+
+def to_number(value):
+    '''
+    Convert a number printed by db_bench, keeping integers as int
+    '''
+    return float(value) if "." in value else int(value)
+
+
+def new_histogram():
+    '''
+    An empty "Microseconds per ..." histogram
+
+    Returns:
+    - histogram (dict): The summary values and the bucket table as numeric arrays
+    '''
+    return {
+        "count": None,
+        "average": None,
+        "std_dev": None,
+        "min": None,
+        "median": None,
+        "max": None,
+        "percentiles": {},
+        "buckets": {"low": [], "high": [], "count": [], "percent": [], "cumulative_percent": []},
+    }
+
+
+def parse_summary_line(match):
+    '''
+    Convert a matched summary line to a benchmark section
+
+    Parameters:
+    - match (re.Match): The SUMMARY_PATTERN match
+
+    Returns:
+    - section (dict): The benchmark name, its summary and an empty histogram table
+    '''
+    section = {
+        "benchmark": match.group(1),
+        "micros_per_op": float(match.group(2)),
+        "ops_per_sec": int(match.group(3)),
+        "total_seconds": float(match.group(4)) if match.group(4) is not None else None,
+        "total_operations": int(match.group(5)) if match.group(5) is not None else None,
+        "data_speed": None,
+        "data_speed_unit": None,
+        "extra": match.group(6).strip(),
+        "histograms": {},
+    }
+    speed_match = DATA_SPEED_PATTERN.match(match.group(6))
+    if speed_match is not None:
+        section["data_speed"] = float(speed_match.group(1))
+        section["data_speed_unit"] = speed_match.group(2)
+    found_match = FOUND_PATTERN.search(match.group(6))
+    if found_match is not None:
+        section["found"] = int(found_match.group(1))
+        section["total"] = int(found_match.group(2))
+    return section
+
+
+def parse_histogram_line(histogram, line):
+    '''
+    Add one line of a "Microseconds per ..." block to its histogram
+
+    Parameters:
+    - histogram (dict): The histogram being read
+    - line (str): The line
+
+    Returns:
+    - done (bool): True once the histogram block is over
+    '''
+    if not line.strip():
+        # The bucket table ends with a blank line
+        return histogram["count"] is not None
+    if line.startswith("---"):
+        return False
+
+    match = BUCKET_PATTERN.match(line)
+    if match is not None:
+        buckets = histogram["buckets"]
+        buckets["low"].append(int(match.group(1)))
+        buckets["high"].append(int(match.group(2)))
+        buckets["count"].append(int(match.group(3)))
+        buckets["percent"].append(float(match.group(4)))
+        buckets["cumulative_percent"].append(float(match.group(5)))
+        return False
+    if line.startswith("Percentiles:"):
+        histogram["percentiles"] = {name: float(value) for name, value in PERCENTILE_PATTERN.findall(line)}
+        return False
+
+    match = HISTOGRAM_COUNT_PATTERN.match(line)
+    if match is not None:
+        histogram["count"] = int(match.group(1))
+        histogram["average"] = float(match.group(2))
+        histogram["std_dev"] = float(match.group(3))
+        return False
+    match = HISTOGRAM_RANGE_PATTERN.match(line)
+    if match is not None:
+        histogram["min"] = to_number(match.group(1))
+        histogram["median"] = float(match.group(2))
+        histogram["max"] = to_number(match.group(3))
+        return False
+    # Anything else ends the block
+    return True
+
+
+def statistics_to_dict(tickers, histograms):
+    '''
+    Build the statistics result from the ticker and histogram dump of --statistics
+
+    Parameters:
+    - tickers (dict): The ticker counts
+    - histograms (dict): P50, P95, P99, P100, count and sum of every histogram
+
+    Returns:
+    - statistics (dict):
+        - tickers (dict): The ticker counts
+        - histograms (dict): The histograms
+        - hit_rates (dict): Block cache, memtable and bloom filter hit rates, None without lookups
+        - latencies (dict): The get, write, compaction and flush histograms in microseconds
+    '''
+    hit_rates = {}
+    for rate_name, (hit_ticker, miss_ticker) in STATISTICS_HIT_RATES.items():
+        hits, misses = tickers.get(hit_ticker, 0), tickers.get(miss_ticker, 0)
+        hit_rates[rate_name] = hits / (hits + misses) if hits + misses else None
+
+    latencies = {operation: histograms[name] for operation, name in STATISTICS_LATENCIES.items()
+                 if histograms.get(name, {}).get("count")}
+
+    return {
+        "tickers": tickers,
+        "histograms": histograms,
+        "hit_rates": hit_rates,
+        "latencies": latencies,
+    }
+
+
+def parse_output_lines(output, parse_intervals=True):
+    '''
+    Walk the db_bench output once, splitting it into benchmark sections
+
+    Parameters:
+    - output (str): The db_bench output
+    - parse_intervals (bool): Parse the stats interval lines, skipped when they were streamed
+
+    Returns:
+    - entries (int): The number of entries, None if not printed
+    - sections (list): One dict per benchmark summary, with its histograms
+    - ops_per_second_graph (list): [timestamps, interval ops/sec] of the interval lines
+    - statistics (dict): The --statistics dump, None if not printed
+    '''
+    entries = None
+    sections = []
+    timestamps, interval_ops = [], []
+    tickers = histograms = None
+    histogram = None
+    in_statistics = False
+
+    for line in output.splitlines():
+        # Interval reports are most of the output, they are handled first
+        if "ops/second" in line:
+            if parse_intervals:
+                match = INTERVAL_PATTERN.search(line)
+                if match is not None:
+                    timestamps.append(float(match.group(6)))
+                    interval_ops.append(float(match.group(3)))
+            continue
+
+        if in_statistics:
+            match = STATISTICS_TICKER_PATTERN.match(line)
+            if match is not None:
+                tickers[match.group(1)] = int(match.group(2))
+                continue
+            match = STATISTICS_HISTOGRAM_PATTERN.match(line)
+            if match is not None:
+                histograms[match.group(1)] = {
+                    "P50": float(match.group(2)),
+                    "P95": float(match.group(3)),
+                    "P99": float(match.group(4)),
+                    "P100": float(match.group(5)),
+                    "count": int(match.group(6)),
+                    "sum": int(match.group(7)),
+                }
+                continue
+            in_statistics = False
+
+        if histogram is not None:
+            if not parse_histogram_line(histogram, line):
+                continue
+            histogram = None
+
+        if line.startswith(HISTOGRAM_START):
+            histogram = new_histogram()
+            operation = line[len(HISTOGRAM_START):].rstrip().rstrip(":")
+            if sections:
+                sections[-1]["histograms"][operation] = histogram
+            continue
+        if line.startswith(STATISTICS_START):
+            in_statistics = True
+            tickers, histograms = {}, {}
+            continue
+        if " micros/op " in line:
+            match = SUMMARY_PATTERN.match(line)
+            if match is not None:
+                sections.append(parse_summary_line(match))
+            continue
+        if entries is None and line.startswith("Entries:"):
+            match = ENTRIES_PATTERN.match(line)
+            if match is not None:
+                entries = int(match.group(1))
+
+    statistics = statistics_to_dict(tickers, histograms) if tickers is not None else None
+    return entries, sections, [timestamps, interval_ops], statistics
+
+
+def guess_test_name(sections):
+    '''
+    Guess the measured benchmark of an output from the registered workloads
+
+    The section names are exact, so a prefill of another benchmark in the same output is
+    simply an earlier section. The last section of a registered benchmark is the measured one.
+
+    Parameters:
+    - sections (list): The benchmark sections of the output
+
+    Returns:
+    - test_name (str): The benchmark name, None if no registered benchmark is found
+    - parser (str): The parser of the benchmark
+    '''
+    benchmarks = {workload["benchmark"]: workload["parser"] for workload in WORKLOADS.values()}
+    for section in reversed(sections):
+        if section["benchmark"] in benchmarks:
+            return section["benchmark"], benchmarks[section["benchmark"]]
+    return None, "ops"
+
+
+def parse_db_bench_output(output, samples=None, test_name=None):
+    '''
+    Parse the db_bench output into a dictionary of results
+
+    Parameters:
+    - output (str): The db_bench output
+    - samples (list): The IntervalSamples already parsed while streaming the output, if any
+    - test_name (str): The registered workload that produced the output, guessed if None
+
+    Returns:
+    - parsed_data (dict): The parsed benchmark results
+    '''
+    if output.startswith("Unable to load options file"):
         return {
             "error": "Invalid options file"
         }
 
-    # Regular expression to find and extract the number of Entries
-    # Searches for the pattern "Entries:" followed by one or more digits
-    entries_match = re.search(r"Entries:\s+(\d+)", output)
-    # If a match is found, convert the captured digits to an integer
-    entries = int(entries_match.group(1)) if entries_match else None
-
-    # Regular expression to parse the output line
-    # Captures various performance metrics and their units
-    test_name = None
-
-    if "readrandomwriterandom" in output:
-        op_line = output.split("readrandomwriterandom")[1].split("\n")[0]
-        test_name = "readrandomwriterandom"
-        test_pattern = r"readrandomwriterandom\s+:\s+(\d+\.\d+)\s+micros/op\s+(\d+)\s+ops/sec\s+(\d+\.\d+)\s+seconds\s+(\d+)\s+operations;"
-    elif "fillrandom" in output:
-        op_line = output.split("fillrandom")[1].split("\n")[0]
-        test_name = "fillrandom"
-        test_pattern = r"fillrandom\s+:\s+(\d+\.\d+)\s+micros/op\s+(\d+)\s+ops/sec\s+(\d+\.\d+)\s+seconds\s+(\d+)\s+operations;\s+(\d+\.\d+)\s+(\w+/s)\nMicroseconds per write:\nCount:\s+(\d+)\s+Average:\s+(\d+\.\d+)\s+StdDev:\s+(\d+\.\d+)\nMin:\s+(\d+)\s+Median:\s+(\d+\.\d+)\s+Max:\s+(\d+)\nPercentiles:\s+P50:\s+(\d+\.\d+)\s+P75:\s+(\d+\.\d+)\s+P99:\s+(\d+\.\d+)\s+P99\.9:\s+(\d+\.\d+)\s+P99\.99:\s+(\d+\.\d+)\n-{50}"
-    elif "readrandom" in output:
-        op_line = output.split("readrandom")[1].split("\n")[0]
-        test_name = "readrandom"
-        test_pattern = r"readrandom\s+:\s+(\d+\.\d+)\s+micros/op\s+(\d+)\s+ops/sec\s+(\d+\.\d+)\s+seconds\s+(\d+)\s+operations;\s+(\d+\.\d+)\s+(\w+/s)\s+\((\d+)\s+of\s+(\d+)\s+found\)\n\nMicroseconds per read:\nCount:\s+(\d+)\s+Average:\s+(\d+\.\d+)\s+StdDev:\s+(\d+\.\d+)\nMin:\s+(\d+)\s+Median:\s+(\d+\.\d+)\s+Max:\s+(\d+)\nPercentiles:\s+P50:\s+(\d+\.\d+)\s+P75:\s+(\d+\.\d+)\s+P99:\s+(\d+\.\d+)\s+P99\.9:\s+(\d+\.\d+)\s+P99\.99:\s+(\d+\.\d+)\n-{50}"
-    elif "mixgraph" in output:
-        op_line = output.split("mixgraph     :")[1].split("\n")[0]
-        test_name = "mixgraph"
-        test_pattern = r"mixgraph\s+:\s+(\d+\.\d+)\s+micros/op\s+(\d+)\s+ops/sec\s+(\d+\.\d+)\s+seconds\s+(\d+)\s+operations;"
-        # test_pattern = r"mixgraph\s+:\s+(\d+\.\d+)\s+micros/op\s+(\d+)\s+ops/sec\s+(\d+\.\d+)\s+seconds\s+(\d+)\s+operations;\s+\(\s+Gets:+(\d+)\s+Puts:+(\d+)\s+Seek:(\d+),\s+reads\s+(\d+)\s+in\s+(\d+)\s+found,\s+avg\s+size:\s+\d+\s+value,\s+-nan\s+scan\)\n\nMicroseconds per read:\nCount:\s+(\d+)\s+Average:\s+(\d+\.\d+)\s+StdDev:\s+(\d+\.\d+)\nMin:\s+(\d+)\s+Median:\s+(\d+\.\d+)\s+Max:\s+(\d+)\nPercentiles:\s+P50:\s+(\d+\.\d+)\s+P75:\s+(\d+\.\d+)\s+P99:\s+(\d+\.\d+)\s+P99\.9:\s+(\d+\.\d+)\s+P99\.99:\s+(\d+\.\d+)\n-{50}"
-    elif "readwhilewriting" in output:
-        op_line = output.split("readwhilewriting")[1].split("\n")[0]
-        test_name = "readwhilewriting"
-        test_pattern = r"readwhilewriting\s+:\s+(\d+\.\d+)\s+micros/op\s+(\d+)\s+ops/sec\s+(\d+\.\d+)\s+seconds\s+(\d+)\s+operations;"
+    # Reuse the streamed samples instead of re-parsing the interval lines
+    entries, sections, ops_per_second_graph, statistics = parse_output_lines(output, parse_intervals=samples is None)
+    if samples is not None:
+        ops_per_second_graph = samples_to_graph(samples)
+
+    # The workload registry tells which benchmark section is measured and how it is formatted,
+    # guessing from the output is only the fallback for unregistered workloads
+    workload = get_workload(test_name) if test_name is not None else None
+    if workload is None:
+        test_name, parser = guess_test_name(sections)
+        benchmark_name = test_name
     else:
+        benchmark_name, parser = workload["benchmark"], workload["parser"]
+
+    if benchmark_name is None:
         log_update(f"[PDB] Test name not found in output: {output}")
-        op_line = "unknown test"
         test_name = "unknown"
-        test_pattern = r"(\d+\.\d+)\s+micros/op\s+(\d+)\s+ops/sec\s+(\d+\.\d+)\s+seconds\s+(\d+)\s+operations;(\s+\(.*found:\d+\))?\nMicroseconds per (read|write):\nCount: (\d+) Average: (\d+\.\d+)  StdDev: (\d+\.\d+)\nMin: (\d+)  Median: (\d+\.\d+)  Max: (\d+)\nPercentiles: P50: (\d+\.\d+) P75: (\d+\.\d+) P99: (\d+\.\d+) P99.9: (\d+\.\d+) P99.99: (\d+\.\d+)"
+        # Any benchmark with a read or write histogram, scored by its ops/sec
+        measured = [section for section in sections
+                    if "read" in section["histograms"] or "write" in section["histograms"]]
+    else:
+        measured = [section for section in sections if section["benchmark"] == benchmark_name]
 
-    pattern_matches = re.findall(test_pattern, output)
     log_update(f"[PDB] Test name: {test_name}")
-    log_update(f"[PDB] Matches: {pattern_matches}")
-    log_update(f"[PDB] Output line: {op_line}")
-    # Set all values to None if the pattern is not found
+    log_update(f"[PDB] Sections: {[section['benchmark'] for section in sections]}")
+    # Set all values to None if the benchmark is not found
     micros_per_op = ops_per_sec = total_seconds = total_operations = data_speed = data_speed_unit = None
+    latency = None
 
-    # Extract the performance metrics if the pattern is found
-    for pattern_match in pattern_matches:
-        # Convert each captured group to the appropriate type (float or int)
-        micros_per_op = float(pattern_match[0])
-        ops_per_sec = int(pattern_match[1])
-        total_seconds = float(pattern_match[2])
-        total_operations = int(pattern_match[3])
-         # Check for specific workloads to handle additional data
-        if "readrandomwriterandom" in output:
-            data_speed = ops_per_sec
-            data_speed_unit = "ops/sec"
-            reads_found = None
-        elif "fillrandom" in output:
-            data_speed = float(pattern_match[4])
-            data_speed_unit = pattern_match[5]
-            writes_data = {
-                "count": int(pattern_match[6]),
-                "average": float(pattern_match[7]),
-                "std_dev": float(pattern_match[8]),
-                "min": int(pattern_match[9]),
-                "median": float(pattern_match[10]),
-                "max": int(pattern_match[11]),
-                "percentiles": {
-                    "P50": float(pattern_match[12]),
-                    "P75": float(pattern_match[13]),
-                    "P99": float(pattern_match[14]),
-                    "P99.9": float(pattern_match[15]),
-                    "P99.99": float(pattern_match[16])
-                }
-            }
-        elif "readrandom" in output:
-            data_speed = float(pattern_match[4])
-            data_speed_unit = pattern_match[5]
-            reads_found = {
-                "count": int(pattern_match[6]),
-                "total": int(pattern_match[7])
-            }
-            reads_data = {
-                "count": int(pattern_match[8]),
-                "average": float(pattern_match[9]),
-                "std_dev": float(pattern_match[10]),
-                "min": int(pattern_match[11]),
-                "median": float(pattern_match[12]),
-                "max": int(pattern_match[13]),
-                "percentiles": {
-                    "P50": float(pattern_match[14]),
-                    "P75": float(pattern_match[15]),
-                    "P99": float(pattern_match[16]),
-                    "P99.9": float(pattern_match[17]),
-                    "P99.99": float(pattern_match[18])
-                }
-            }
-        elif "readwhilewriting" in output:
-            data_speed = float(pattern_match[4])
-            data_speed_unit = pattern_match[5]
-            # reads_found = {
-            #     "count": int(pattern_match[6]),
-            #     "total": int(pattern_match[7])
-            # }
-            # reads_data = {
-            #     "count": int(pattern_match[8]),
-            #     "average": float(pattern_match[9]),
-            #     "std_dev": float(pattern_match[10]),
-            #     "min": int(pattern_match[11]),
-            #     "median": float(pattern_match[12]),
-            #     "max": int(pattern_match[13]),
-            #     "percentiles": {
-            #         "P50": float(pattern_match[14]),
-            #         "P75": float(pattern_match[15]),
-            #         "P99": float(pattern_match[16]),
-            #         "P99.9": float(pattern_match[17]),
-            #         "P99.99": float(pattern_match[18])
-            #     }
-            # }
-        elif "mixgraph" in output:
-            data_speed = ops_per_sec
-            data_speed_unit = "ops/sec"
+    if measured:
+        section = measured[-1]
+        micros_per_op = section["micros_per_op"]
+        ops_per_sec = section["ops_per_sec"]
+        total_seconds = section["total_seconds"]
+        total_operations = section["total_operations"]
+
+        histogram_name = PARSER_HISTOGRAMS[parser]
+        if histogram_name is not None:
+            histogram = section["histograms"].get(histogram_name)
+            if histogram is not None and histogram["count"] is not None:
+                latency = dict(histogram)
+            # The read and write summaries are only complete with their histogram
+            if latency is not None and section["data_speed"] is not None:
+                data_speed = section["data_speed"]
+                data_speed_unit = section["data_speed_unit"]
+            if latency is not None and parser == "read" and "found" in section:
+                latency["found"] = section["found"]
+                latency["total"] = section["total"]
         else:
-            log_update(f"[PDB] Test name not found in output: {output}")
             data_speed = ops_per_sec
             data_speed_unit = "ops/sec"
-   
-        log_update(f"[PDB] Ops per sec: {ops_per_sec} Total seconds: {total_seconds} Total operations: {total_operations} Data speed: {data_speed} {data_speed_unit}")
 
-    ops_per_sec_points = re.findall("and \((.*),.*\) ops\/second in \(.*,(.*)\)", output)
+        log_update(f"[PDB] Ops per sec: {ops_per_sec} Total seconds: {total_seconds} Total operations: {total_operations} Data speed: {data_speed} {data_speed_unit}")
 
     # Store all extracted values in a dictionary
     parsed_data = {
@@ -148,16 +380,20 @@ def parse_db_bench_output(output):
         "total_operations": total_operations,
         "data_speed": data_speed,
         "data_speed_unit": data_speed_unit,
-        "ops_per_second_graph": [
-            [float(a[1]) for a in ops_per_sec_points],
-            [float(a[0]) for a in ops_per_sec_points],
-        ]
+        "ops_per_second_graph": ops_per_second_graph
     }
+    if latency is not None:
+        parsed_data["latency"] = latency
+    if statistics is not None:
+        parsed_data["statistics"] = statistics
+    # Every section, e.g. the prefill and the measured phase of a "--benchmarks=a,b" run
+    if len(sections) > 1:
+        parsed_data["benchmarks"] = sections
 
     # Grab the latency and push into the output logs file
-    latency = re.findall("Percentiles:.*", output)
-    for i in latency:
-        log_update("[PDB] " + i)
+    for section in sections:
+        for operation, histogram in section["histograms"].items():
+            log_update(f"[PDB] {section['benchmark']} {operation} percentiles: {histogram['percentiles']}")
 
     # Return the dictionary with the parsed data
     return parsed_data
@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import fcntl
+import hashlib
+import platform
+import statistics
+
+import psutil
+
+from utils.utils import log_update
+from utils.constants import RESULT_CACHE, RESULT_CACHE_DIR, RESULT_CACHE_MEASUREMENTS, VERSION, NUM_ENTRIES, \
+    BENCHMARK_BACKEND, STEADY_STATE, STATISTICS
+from rocksdb.workloads import get_workload
+from options_files.ops_options_file import parse_option_file_to_dict
+from utils.system_operations.settle import device_of_path
+
+# Options that do not change the measurement. The version is part of the key and the
+# stats dump period is replaced by --log_stats_dump_period for every run
+IGNORED_OPTIONS = ["rocksdb_version", "options_file_version", "db_host_id", "stats_dump_period_sec"]
+
+
+def normalize_value(value):
+    '''
+    Function to write an option value in a canonical form, so 10, 10.0 and 10.000000
+    or TRUE and true give the same fingerprint
+
+    Parameters:
+    - value (str): The option value
+
+    Returns:
+    - value (str): The canonical value
+    '''
+    value = value.strip()
+    if value.lower() in ("true", "false"):
+        return value.lower()
+    if value.startswith("{") and value.endswith("}"):
+        fields = [field.strip() for field in value[1:-1].split(";") if field.strip()]
+        return "{" + ";".join(sorted(fields)) + "}"
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    return str(int(number)) if number.is_integer() else repr(number)
+
+
+def normalize_options(options):
+    '''
+    Function to reduce an options file to its sorted, canonical option values
+
+    Parameters:
+    - options (str): The options file
+
+    Returns:
+    - normalized (dict): The canonical value of every option, keyed by section.option
+    '''
+    normalized = {}
+    for section_name, section in parse_option_file_to_dict(options).items():
+        for key, value in section.items():
+            if key not in IGNORED_OPTIONS:
+                normalized[f"{section_name}.{key}"] = normalize_value(value)
+    return dict(sorted(normalized.items()))
+
+
+def hardware_fingerprint(db_path):
+    '''
+    Function to describe the hardware a result was measured on
+
+    Parameters:
+    - db_path (str): The path of the database, its device is described
+
+    Returns:
+    - hardware (dict): The CPU model and count, the memory and cgroup limits and the device model
+    '''
+    device = device_of_path(db_path)
+    device_model = None
+    if device is not None:
+        # A partition has no model, its parent disk has
+        for model_path in [f"/sys/class/block/{device}/device/model", f"/sys/class/block/{device}/../device/model"]:
+            if os.path.exists(model_path):
+                with open(model_path, "r") as f:
+                    device_model = f.read().strip()
+                break
+
+    return {
+        "machine": platform.machine(),
+        "cpu": platform.processor(),
+        "cpus": len(os.sched_getaffinity(0)),
+        "cpu_limit": os.getenv("CPU_COUNT"),
+        "memory": psutil.virtual_memory().total,
+        "memory_limit": os.getenv("MEMORY_MAX"),
+        "device": device,
+        "device_model": device_model,
+    }
+
+
+def result_key(options, db_path, test_name, duration=None):
+    '''
+    Function to compute the cache key of a benchmark
+
+    Parameters:
+    - options (str): The options file
+    - db_path (str): The path of the database
+    - test_name (str): The workload name
+    - duration (int): The duration override of the run, None for the workload duration
+
+    Returns:
+    - key (str): The hash of everything the result depends on
+    - material (dict): What was hashed, stored with the results
+    '''
+    material = {
+        "options": normalize_options(options),
+        "workload": get_workload(test_name),
+        "version": VERSION,
+        "backend": BENCHMARK_BACKEND,
+        "hardware": hardware_fingerprint(db_path),
+        "num_entries": NUM_ENTRIES,
+        "measurement": {"duration": duration, "steady_state": STEADY_STATE, "statistics": STATISTICS},
+    }
+    payload = json.dumps(material, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest(), material
+
+
+def noise_summary(measurements):
+    '''
+    Function to summarize the spread of the repeated measurements of an options file
+    '''
+    throughputs = [measurement["benchmark_results"]["ops_per_sec"] for measurement in measurements]
+    return {
+        "measurements": len(throughputs),
+        "mean_ops_per_sec": statistics.mean(throughputs),
+        "stdev_ops_per_sec": statistics.stdev(throughputs) if len(throughputs) > 1 else None,
+    }
+
+
+def lookup_result(options, db_path, test_name, duration=None):
+    '''
+    Function to find the result of an options file already benchmarked on this hardware
+
+    An options file is measured until it has --result_cache_measurements results, the
+    later requests are served the latest result with the spread of all of them.
+
+    Parameters:
+    - options (str): The options file
+    - db_path (str): The path of the database
+    - test_name (str): The workload name
+    - duration (int): The duration override of the run, None for the workload duration
+
+    Returns:
+    - cached (tuple): (benchmark_results, average_cpu_usage, average_memory_usage, options),
+      None if the options file must be benchmarked
+    '''
+    if not RESULT_CACHE:
+        return None
+
+    key, _ = result_key(options, db_path, test_name, duration)
+    entry_path = os.path.join(RESULT_CACHE_DIR, f"{key}.json")
+    if not os.path.exists(entry_path):
+        return None
+    with open(entry_path, "r") as f:
+        measurements = json.load(f)["measurements"]
+
+    if len(measurements) < RESULT_CACHE_MEASUREMENTS:
+        log_update(f"[RCH] Options {key[:12]} measured {len(measurements)} of {RESULT_CACHE_MEASUREMENTS} times, measuring again")
+        return None
+
+    latest = measurements[-1]
+    benchmark_results = dict(latest["benchmark_results"])
+    benchmark_results["cached"] = noise_summary(measurements)
+    log_update(f"[RCH] Options {key[:12]} already measured {len(measurements)} times, "
+               f"reusing {benchmark_results['ops_per_sec']} ops/sec")
+    print(f"[RCH] Options already measured, reusing {benchmark_results['ops_per_sec']} ops/sec")
+    return benchmark_results, latest["average_cpu_usage"], latest["average_memory_usage"], latest["options"]
+
+
+def store_result(options, db_path, test_name, benchmark_results, average_cpu_usage, average_memory_usage, duration=None):
+    '''
+    Function to add a successful benchmark to the result cache
+
+    Failed runs are not stored, the failure may come from the device rather than the options.
+
+    Parameters:
+    - options (str): The options file that was benchmarked
+    - db_path (str): The path of the database
+    - test_name (str): The workload name
+    - benchmark_results (dict): The benchmark results
+    - average_cpu_usage (float): Average CPU usage during the run
+    - average_memory_usage (float): Average memory usage during the run
+    - duration (int): The duration override of the run, None for the workload duration
+
+    Returns:
+    - None
+    '''
+    if not RESULT_CACHE:
+        return
+
+    key, material = result_key(options, db_path, test_name, duration)
+    os.makedirs(RESULT_CACHE_DIR, exist_ok=True)
+    entry_path = os.path.join(RESULT_CACHE_DIR, f"{key}.json")
+
+    # Concurrent slots may measure the same options file
+    with open(f"{entry_path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        entry = {"key": material, "measurements": []}
+        if os.path.exists(entry_path):
+            with open(entry_path, "r") as f:
+                entry = json.load(f)
+        entry["measurements"].append({
+            "time": time.time(),
+            "options": options,
+            "benchmark_results": benchmark_results,
+            "average_cpu_usage": average_cpu_usage,
+            "average_memory_usage": average_memory_usage,
+        })
+
+        tmp_path = f"{entry_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, entry_path)
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    log_update(f"[RCH] Stored measurement {len(entry['measurements'])} of options {key[:12]}")
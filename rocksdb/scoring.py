@@ -0,0 +1,198 @@
+import math
+
+from utils.constants import SCORING_MODE, SCORE_WEIGHTS
+
+# Objectives a run is ranked by
+# - extract: Function reading the objective from the benchmark results, None when not measured
+# - maximize: If a higher value is better
+OBJECTIVES = {
+    "ops_per_sec": {
+        "extract": lambda result: result.get("ops_per_sec"),
+        "maximize": True,
+    },
+    "p99": {
+        "extract": lambda result: (result.get("latency") or {}).get("percentiles", {}).get("P99"),
+        "maximize": False,
+    },
+    "p999": {
+        "extract": lambda result: (result.get("latency") or {}).get("percentiles", {}).get("P99.9"),
+        "maximize": False,
+    },
+    "cpu": {
+        "extract": lambda result: (result.get("resource_summary") or {}).get("avg_cpu_percent"),
+        "maximize": False,
+    },
+    "memory": {
+        "extract": lambda result: (result.get("resource_summary") or {}).get("peak_rss_bytes"),
+        "maximize": False,
+    },
+    "write_amp": {
+        "extract": lambda result: (result.get("amplification") or {}).get("write"),
+        "maximize": False,
+    },
+}
+
+SCORING_MODES = ["weighted", "pareto"]
+
+
+def parse_weights(weights_text):
+    '''
+    Function to parse the --score_weights text
+
+    Parameters:
+    - weights_text (str): name=weight pairs separated by commas, e.g. "ops_per_sec=1,p999=0.5"
+
+    Returns:
+    - weights (dict): The weight of every objective, 0 for the ones not listed
+
+    Raises:
+    - ValueError: If an objective is unknown or a weight is not a number
+    '''
+    weights = {name: 0.0 for name in OBJECTIVES}
+    for pair in weights_text.split(","):
+        if not pair.strip():
+            continue
+        name, _, weight = pair.partition("=")
+        name = name.strip()
+        if name not in OBJECTIVES:
+            raise ValueError(f"Unknown objective {name}, choose from {list(OBJECTIVES)}")
+        weights[name] = float(weight)
+    return weights
+
+
+WEIGHTS = parse_weights(SCORE_WEIGHTS)
+if SCORING_MODE not in SCORING_MODES:
+    raise ValueError(f"Unknown scoring mode {SCORING_MODE}, choose from {SCORING_MODES}")
+
+
+def objective_values(result):
+    '''
+    Function to read the objectives of a run
+
+    Parameters:
+    - result (dict): The benchmark results
+
+    Returns:
+    - values (dict): The value of every objective, None when it was not measured
+    '''
+    values = {}
+    for name, objective in OBJECTIVES.items():
+        value = objective["extract"](result)
+        values[name] = value if value is not None and value > 0 else None
+    return values
+
+
+def score(result, reference, weights=None):
+    '''
+    Function to compute the weighted score of a run against a reference run
+
+    Every objective contributes its weight times the log of its ratio to the reference,
+    negated when lower is better. The score is unitless, 0 for the reference, and the
+    ranking of the runs does not depend on the reference.
+
+    A weighted objective the run did not measure (e.g. the latency of a run stopped by the
+    steady state detector) is a loss: the score is -inf, below every run that measured it.
+    An objective the reference did not measure is left out, it cannot be compared.
+
+    Parameters:
+    - result (dict): The benchmark results
+    - reference (dict): The benchmark results the objectives are compared with
+    - weights (dict): The weight of every objective, the --score_weights if None
+
+    Returns:
+    - score (float): Higher is better
+    '''
+    weights = WEIGHTS if weights is None else weights
+    values = objective_values(result)
+    reference_values = objective_values(reference)
+
+    total = 0.0
+    for name, weight in weights.items():
+        if not weight or reference_values[name] is None:
+            continue
+        if values[name] is None:
+            return -math.inf
+        ratio = math.log(values[name] / reference_values[name])
+        total += weight * (ratio if OBJECTIVES[name]["maximize"] else -ratio)
+    return total
+
+
+def dominates(values, other_values, names):
+    '''
+    Function to check if a run is at least as good on every objective and better on one
+
+    Like in score, an objective that was not measured is worse than any measured value.
+    '''
+    better = False
+    for name in names:
+        value, other_value = values[name], other_values[name]
+        if value is None or other_value is None:
+            if value is None and other_value is not None:
+                return False
+            if value is not None and other_value is None:
+                better = True
+            continue
+        if not OBJECTIVES[name]["maximize"]:
+            value, other_value = -value, -other_value
+        if value < other_value:
+            return False
+        if value > other_value:
+            better = True
+    return better
+
+
+def pareto_front(results, weights=None):
+    '''
+    Function to find the runs no other run beats on every weighted objective
+
+    Parameters:
+    - results (list): The benchmark results of the runs
+    - weights (dict): The weight of every objective, the --score_weights if None
+
+    Returns:
+    - front (list): The indexes of the non-dominated runs
+    '''
+    weights = WEIGHTS if weights is None else weights
+    names = [name for name, weight in weights.items() if weight]
+    values = [objective_values(result) for result in results]
+    return [index for index, result_values in enumerate(values)
+            if not any(dominates(other_values, result_values, names)
+                       for other_index, other_values in enumerate(values) if other_index != index)]
+
+
+def select_best(results, reference=None, weights=None):
+    '''
+    Function to pick the best run with the --scoring mode
+
+    Parameters:
+    - results (list): The benchmark results of the runs
+    - reference (dict): The benchmark results the scores are relative to, the first run if None
+    - weights (dict): The weight of every objective, the --score_weights if None
+
+    Returns:
+    - index (int): The index of the best run
+    '''
+    reference = results[0] if reference is None else reference
+    candidates = range(len(results))
+    if SCORING_MODE == "pareto":
+        # The front can have several runs, the weighted score breaks the tie
+        candidates = pareto_front(results, weights)
+    return max(candidates, key=lambda index: score(results[index], reference, weights))
+
+
+def incumbent_throughput(results):
+    '''
+    Function to get the throughput a new run must beat for the side checker
+
+    The side checker only sees the throughput while the run is going, so it compares with
+    the throughput of the best scoring run, and is disabled when throughput is not scored.
+
+    Parameters:
+    - results (list): The benchmark results of the previous runs
+
+    Returns:
+    - throughput (float): The ops/sec of the best run, None to disable early stopping
+    '''
+    if not results or not WEIGHTS["ops_per_sec"]:
+        return None
+    return results[select_best(results)]["ops_per_sec"]
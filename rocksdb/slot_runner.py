@@ -0,0 +1,221 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import rocksdb.subprocess_manager as spm
+from rocksdb.scoring import select_best
+from rocksdb.surrogate import rank_candidates
+from utils.utils import log_update
+from utils.constants import SLOT_DB_PATHS, SLOT_CGROUP_ROOT
+from utils.system_operations.settle import device_of_path
+from gpt.prompts_generator import generate_option_file_with_gpt
+
+
+def build_slots(slot_count, db_path, output_folder_dir):
+    '''
+    Build the isolated benchmark slots
+
+    Each slot has its own database directory, options file, output folder and CPU set.
+    Database directories are spread round robin over SLOT_DB_PATHS (one root per drive)
+    or placed next to db_path when no roots are given.
+
+    Parameters:
+    - slot_count (int): The number of slots
+    - db_path (str): The path of the database used by the single slot mode
+    - output_folder_dir (str): The output directory
+
+    Returns:
+    - slots (list): A list of slot dictionaries
+    '''
+    db_roots = [root for root in SLOT_DB_PATHS.split(",") if root] if SLOT_DB_PATHS else []
+    cpus = sorted(os.sched_getaffinity(0))
+    cpus_per_slot = max(1, len(cpus) // slot_count)
+
+    slots = []
+    for slot_id in range(slot_count):
+        if db_roots:
+            slot_db_path = os.path.join(db_roots[slot_id % len(db_roots)], f"slot_{slot_id}")
+        else:
+            slot_db_path = f"{db_path}_slot_{slot_id}"
+
+        slot_output_dir = os.path.join(output_folder_dir, f"slot_{slot_id}")
+        os.makedirs(slot_output_dir, exist_ok=True)
+
+        cpu_set = cpus[slot_id * cpus_per_slot:(slot_id + 1) * cpus_per_slot] or cpus
+        slots.append({
+            "id": slot_id,
+            "db_path": slot_db_path,
+            "options_file_dir": os.path.join(slot_output_dir, "options_file.ini"),
+            "output_dir": slot_output_dir,
+            "cpu_set": cpu_set,
+        })
+        log_update(f"[SLT] Slot {slot_id}: db {slot_db_path}, cpus {cpu_set}")
+
+    # The device counters of a device used by several slots count the IO of all of them
+    devices = [device_of_path(slot["db_path"]) for slot in slots]
+    for slot, device in zip(slots, devices):
+        slot["shared_device"] = device is None or devices.count(device) > 1
+        if slot["shared_device"]:
+            log_update(f"[SLT] Slot {slot['id']} shares its device, its IO is read from its cgroup when available")
+
+    return slots
+
+
+def isolate_slot(slot):
+    '''
+    Pin the current process (and the db_bench it spawns) to the CPU set of the slot
+
+    The process is moved into its own cgroup when the cgroup hierarchy is writable,
+    otherwise only the CPU affinity is set. The io controller is enabled for the slot
+    cgroups, so the IO of a slot can be told apart from the other slots on its device.
+
+    Parameters:
+    - slot (dict): The slot to isolate
+
+    Returns:
+    - None
+    '''
+    cpu_list = ",".join(str(cpu) for cpu in slot["cpu_set"])
+    cgroup_path = os.path.join(SLOT_CGROUP_ROOT, f"slot_{slot['id']}")
+    try:
+        # The io controller gives every slot its own io.stat counters
+        os.makedirs(SLOT_CGROUP_ROOT, exist_ok=True)
+        with open(os.path.join(SLOT_CGROUP_ROOT, "cgroup.subtree_control"), "w") as f:
+            f.write("+io")
+    except OSError as e:
+        log_update(f"[SLT] Unable to enable the io controller in {SLOT_CGROUP_ROOT}: {e}")
+    try:
+        os.makedirs(cgroup_path, exist_ok=True)
+        with open(os.path.join(cgroup_path, "cpuset.cpus"), "w") as f:
+            f.write(cpu_list)
+        with open(os.path.join(cgroup_path, "cgroup.procs"), "w") as f:
+            f.write(str(os.getpid()))
+    except OSError as e:
+        log_update(f"[SLT] Unable to use cgroup {cgroup_path}, falling back to CPU affinity: {e}")
+
+    os.sched_setaffinity(0, slot["cpu_set"])
+
+
+def run_slot(slot, options, reasoning, iteration_count, previous_results, options_files, duration=None):
+    '''
+    Benchmark one options file inside a slot, runs in a pool worker
+
+    Parameters:
+    - slot (dict): The slot to run in
+    - options (str): The options file to benchmark
+    - reasoning (str): The reasoning behind the options file
+    - iteration_count (int): The current iteration
+    - previous_results (dict): The benchmark results of the previous iteration
+    - options_files (list): List of the previous options files
+    - duration (int): Seconds the measured phase runs for at most, None for the workload duration
+
+    Returns:
+    - tuple: The return value of spm.benchmark
+    '''
+    isolate_slot(slot)
+    # Shortened runs are kept apart from the full length runs of the slot
+    output_dir = slot["output_dir"] if duration is None else os.path.join(slot["output_dir"], "screening")
+    os.makedirs(output_dir, exist_ok=True)
+    return spm.benchmark(slot["db_path"], options, output_dir, reasoning, iteration_count,
+                         previous_results, options_files, options_file_dir=slot["options_file_dir"],
+                         drop_caches=False, duration=duration, shared_device=slot["shared_device"])
+
+
+def generate_candidates(count, options, options_files, device_information, temperature,
+                        average_cpu_used, average_mem_used, case, test_name, version):
+    '''
+    Ask the LLM for several candidate options files derived from the same base file
+
+    Each candidate uses a slightly higher temperature to keep the candidates diverse.
+
+    Parameters:
+    - count (int): The number of candidates
+    - options (str): The current options file every candidate is based on
+    - temperature (float): The temperature of the first candidate
+
+    Returns:
+    - candidates (list): A list of (options, reasoning, summary_of_changes) tuples
+    '''
+    candidates = []
+    for candidate_id in range(count):
+        new_options_file, reasoning, summary_of_changes = generate_option_file_with_gpt(
+            case, options_files, device_information, temperature + 0.1 * candidate_id,
+            average_cpu_used, average_mem_used, test_name, version)
+        if new_options_file is None:
+            log_update(f"[SLT] Failed to generate candidate {candidate_id}")
+            continue
+        candidates.append((new_options_file, reasoning, summary_of_changes))
+
+    return candidates
+
+
+def benchmark_candidates(slots, candidates, iteration_count, previous_results, options_files, duration=None):
+    '''
+    Benchmark the candidates concurrently, one candidate per slot at a time
+
+    The page cache is flushed once per batch instead of once per run, since
+    dropping it from one slot would disturb the runs in the other slots.
+
+    Parameters:
+    - slots (list): The slots built by build_slots
+    - candidates (list): A list of (options, reasoning, summary_of_changes) tuples
+    - iteration_count (int): The current iteration
+    - previous_results (dict): The benchmark results of the previous iteration
+    - options_files (list): List of the previous options files
+    - duration (int): Seconds the measured phase runs for at most, None for the workload duration
+
+    Returns:
+    - results (list): A list of (is_error, benchmark_results, average_cpu_usage,
+      average_memory_usage, options, reasoning, summary_of_changes) tuples
+    '''
+    results = []
+    with ProcessPoolExecutor(max_workers=len(slots)) as pool:
+        for start in range(0, len(candidates), len(slots)):
+            batch = candidates[start:start + len(slots)]
+            spm.flush_caches()
+
+            log_update(f"[SLT] Benchmarking {len(batch)} candidates concurrently")
+            print(f"[SLT] Benchmarking {len(batch)} candidates concurrently")
+            # The deletions of the main process must not overlap the measurements of the slots
+            spm.trash_deleter.pause()
+            try:
+                futures = [
+                    pool.submit(run_slot, slot, candidate_options, candidate_reasoning,
+                                iteration_count, previous_results, options_files, duration)
+                    for slot, (candidate_options, candidate_reasoning, _) in zip(slots, batch)
+                ]
+
+                for (_, reasoning, summary_of_changes), future in zip(batch, futures):
+                    is_error, benchmark_results, average_cpu_usage, average_memory_usage, options = future.result()
+                    results.append((is_error, benchmark_results, average_cpu_usage, average_memory_usage,
+                                    options, reasoning, summary_of_changes))
+            finally:
+                spm.trash_deleter.resume()
+
+    return results
+
+
+def evaluate_candidates_in_slots(slots, options, options_files, device_information, temperature,
+                                 average_cpu_used, average_mem_used, iteration_count, previous_results,
+                                 case, test_name, version):
+    '''
+    Generate one candidate per slot, benchmark them concurrently and keep the best one
+
+    Returns:
+    - best (tuple): (options, benchmark_results, average_cpu_usage, average_memory_usage,
+      reasoning, summary_of_changes) of the best candidate, None if every candidate failed
+    '''
+    candidates = generate_candidates(len(slots), options, options_files, device_information, temperature,
+                                     average_cpu_used, average_mem_used, case, test_name, version)
+    candidates = rank_candidates(candidates, slots[0]["db_path"], test_name, options_files)
+    results = benchmark_candidates(slots, candidates, iteration_count, previous_results, options_files)
+
+    successful = [result for result in results if not result[0]]
+    if not successful:
+        return None
+
+    reference = options_files[0][1] if options_files else None
+    best = select_best([result[1] for result in successful], reference)
+    _, benchmark_results, average_cpu_usage, average_memory_usage, best_options, reasoning, summary_of_changes = successful[best]
+    log_update(f"[SLT] Best of {len(results)} candidates: {benchmark_results['ops_per_sec']} ops/sec")
+
+    return best_options, benchmark_results, average_cpu_usage, average_memory_usage, reasoning, summary_of_changes
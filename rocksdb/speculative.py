@@ -0,0 +1,126 @@
+import os
+
+import rocksdb.subprocess_manager as spm
+from rocksdb.scoring import score, select_best
+from rocksdb.slot_runner import generate_candidates, benchmark_candidates
+from rocksdb.surrogate import rank_candidates
+from utils.utils import log_update
+from utils.constants import SPECULATIVE_CANDIDATES, SCREENING_DURATION, SCREENING_FINALISTS
+
+
+def run_candidates(slots, db_path, output_dir, candidates, iteration_count, previous_results, options_files,
+                   duration=None):
+    '''
+    Benchmark the candidates, in the slots when there are some or else one after the other
+
+    Parameters:
+    - slots (list): The slots built by build_slots, None to run in db_path
+    - db_path (str): The path of the database used without slots
+    - output_dir (str): The output directory used without slots
+    - candidates (list): A list of (options, reasoning, summary_of_changes) tuples
+    - iteration_count (int): The current iteration
+    - previous_results (dict): The benchmark results of the previous iteration, None disables the side checker
+    - options_files (list): List of the previous options files
+    - duration (int): Seconds the measured phase runs for at most, None for the workload duration
+
+    Returns:
+    - results (list): A list of (is_error, benchmark_results, average_cpu_usage,
+      average_memory_usage, options, reasoning, summary_of_changes) tuples
+    '''
+    if slots is not None:
+        return benchmark_candidates(slots, candidates, iteration_count, previous_results, options_files, duration)
+
+    results = []
+    for candidate_options, reasoning, summary_of_changes in candidates:
+        is_error, benchmark_results, average_cpu_usage, average_memory_usage, options = spm.benchmark(
+            db_path, candidate_options, output_dir, reasoning, iteration_count, previous_results, options_files,
+            duration=duration)
+        results.append((is_error, benchmark_results, average_cpu_usage, average_memory_usage,
+                        options, reasoning, summary_of_changes))
+    return results
+
+
+def screen_candidates(slots, db_path, output_folder_dir, candidates, iteration_count, options_files, reference):
+    '''
+    Give every candidate a short run and keep the best ones for the full length runs
+
+    The screening runs are stored in the screening folder. They are not side checked,
+    since the throughput of a short run is not comparable with a full length one, and
+    are ranked with the weighted score, whose ranking does not depend on the reference.
+
+    Parameters:
+    - slots (list): The slots built by build_slots, None to run in db_path
+    - db_path (str): The path of the database used without slots
+    - output_folder_dir (str): The output directory
+    - candidates (list): A list of (options, reasoning, summary_of_changes) tuples
+    - iteration_count (int): The current iteration
+    - options_files (list): List of the previous options files
+    - reference (dict): The benchmark results the scores are relative to
+
+    Returns:
+    - finalists (list): The best SCREENING_FINALISTS candidates, best first
+    '''
+    screening_dir = os.path.join(output_folder_dir, "screening")
+    os.makedirs(screening_dir, exist_ok=True)
+
+    log_update(f"[SPC] Screening {len(candidates)} candidates with {SCREENING_DURATION} second runs")
+    print(f"[SPC] Screening {len(candidates)} candidates with {SCREENING_DURATION} second runs")
+    results = run_candidates(slots, db_path, screening_dir, candidates, iteration_count, None, options_files,
+                             SCREENING_DURATION)
+
+    screened = []
+    for candidate_id, (candidate, result) in enumerate(zip(candidates, results)):
+        if result[0]:
+            log_update(f"[SPC] Candidate {candidate_id} failed its screening run")
+            continue
+        candidate_score = score(result[1], reference) if reference is not None else result[1]["ops_per_sec"]
+        log_update(f"[SPC] Candidate {candidate_id}: {result[1]['ops_per_sec']} ops/sec, score {candidate_score:.4f}")
+        screened.append((candidate_score, candidate_id, candidate))
+
+    screened.sort(key=lambda entry: entry[0], reverse=True)
+    finalists = screened[:SCREENING_FINALISTS]
+    log_update(f"[SPC] Finalists: candidates {[candidate_id for _, candidate_id, _ in finalists]}")
+    return [candidate for _, _, candidate in finalists]
+
+
+def evaluate_speculative(slots, db_path, output_folder_dir, options, options_files, device_information, temperature,
+                         average_cpu_used, average_mem_used, iteration_count, previous_results,
+                         case, test_name, version):
+    '''
+    Generate SPECULATIVE_CANDIDATES candidates, screen them with short runs and give the
+    best SCREENING_FINALISTS a full length run
+
+    The candidates are made diverse with a temperature ladder.
+
+    Returns:
+    - best (tuple): (options, benchmark_results, average_cpu_usage, average_memory_usage,
+      reasoning, summary_of_changes) of the best finalist, None if every candidate failed
+    '''
+    candidates = generate_candidates(SPECULATIVE_CANDIDATES, options, options_files, device_information, temperature,
+                                     average_cpu_used, average_mem_used, case, test_name, version)
+    # The candidates the surrogate expects to lose are not even screened, unless they all are
+    candidates = rank_candidates(candidates, db_path if slots is None else slots[0]["db_path"], test_name,
+                                 options_files)
+    if not candidates:
+        return None
+
+    reference = options_files[0][1] if options_files else None
+    finalists = screen_candidates(slots, db_path, output_folder_dir, candidates, iteration_count, options_files,
+                                  reference)
+    if not finalists:
+        return None
+
+    log_update(f"[SPC] Benchmarking {len(finalists)} finalists with full length runs")
+    print(f"[SPC] Benchmarking {len(finalists)} finalists with full length runs")
+    results = run_candidates(slots, db_path, output_folder_dir, finalists, iteration_count, previous_results,
+                             options_files)
+
+    successful = [result for result in results if not result[0]]
+    if not successful:
+        return None
+
+    best = select_best([result[1] for result in successful], reference)
+    _, benchmark_results, average_cpu_usage, average_memory_usage, best_options, reasoning, summary_of_changes = successful[best]
+    log_update(f"[SPC] Best of {len(results)} finalists: {benchmark_results['ops_per_sec']} ops/sec")
+
+    return best_options, benchmark_results, average_cpu_usage, average_memory_usage, reasoning, summary_of_changes
@@ -0,0 +1,114 @@
+from statistics import NormalDist
+
+from rocksdb.early_stopping import batch_means_standard_error
+
+
+def mser_truncation(values, batch_size=5):
+    '''
+    Length of the warm-up phase using the MSER-5 rule
+
+    The series is averaged in batches of batch_size, and the truncation point d minimizing
+    the marginal standard error sum((x - mean)^2) / (n - d)^2 of the remaining batches is
+    chosen. Only the first half of the series is considered as warm-up.
+
+    Parameters:
+    - values (list): The per-second throughput series
+    - batch_size (int): The number of readings per batch
+
+    Returns:
+    - warmup (int): The number of readings to drop from the start of the series
+    '''
+    batch_count = len(values) // batch_size
+    if batch_count < 2:
+        return 0
+    batches = [sum(values[i * batch_size:(i + 1) * batch_size]) / batch_size for i in range(batch_count)]
+
+    # Suffix sums make every candidate truncation O(1)
+    suffix_sum = [0.0] * (batch_count + 1)
+    suffix_squares = [0.0] * (batch_count + 1)
+    for i in range(batch_count - 1, -1, -1):
+        suffix_sum[i] = suffix_sum[i + 1] + batches[i]
+        suffix_squares[i] = suffix_squares[i + 1] + batches[i] ** 2
+
+    best_truncation, best_statistic = 0, None
+    for d in range(batch_count // 2 + 1):
+        remaining = batch_count - d
+        sum_of_squares = suffix_squares[d] - suffix_sum[d] ** 2 / remaining
+        statistic = sum_of_squares / remaining ** 2
+        if best_statistic is None or statistic < best_statistic:
+            best_truncation, best_statistic = d, statistic
+
+    return best_truncation * batch_size
+
+
+def steady_state_summary(samples, confidence=0.95, tolerance=0.02):
+    '''
+    Steady-state throughput of a run with its confidence interval
+
+    Parameters:
+    - samples (list): The IntervalSamples of the run
+    - confidence (float): Two sided confidence level of the interval
+    - tolerance (float): Relative half width of the interval under which the run has converged
+
+    Returns:
+    - summary (dict): The steady-state mean, confidence interval, warm-up length and convergence
+    '''
+    values = [sample.interval_ops_per_sec for sample in samples]
+    warmup = mser_truncation(values)
+    steady_values = values[warmup:]
+    if not steady_values:
+        return None
+
+    mean = sum(steady_values) / len(steady_values)
+    half_width = NormalDist().inv_cdf(0.5 + confidence / 2) * batch_means_standard_error(steady_values)
+    return {
+        "mean_ops_per_sec": mean,
+        "ci_low": mean - half_width,
+        "ci_high": mean + half_width,
+        "confidence": confidence,
+        "warmup_seconds": samples[warmup - 1].timestamp if warmup > 0 else 0.0,
+        "steady_seconds": sum(sample.interval_seconds for sample in samples[warmup:]),
+        "converged": mean > 0 and half_width / mean <= tolerance,
+    }
+
+
+class SteadyStateDetector:
+    '''
+    Watch the per-second throughput of a running benchmark and report once it has
+    converged to a steady state, so the run can be stopped before its full duration.
+    '''
+
+    def __init__(self, tolerance=0.02, confidence=0.95, min_steady_seconds=60, check_interval=10):
+        '''
+        Parameters:
+        - tolerance (float): Relative half width of the confidence interval to reach
+        - confidence (float): Two sided confidence level of the interval
+        - min_steady_seconds (float): Seconds of steady-state data required after the warm-up
+        - check_interval (float): Seconds between two checks
+        '''
+        self.tolerance = tolerance
+        self.confidence = confidence
+        self.min_steady_seconds = min_steady_seconds
+        self.check_interval = check_interval
+        self.samples = []
+        self.last_check = 0.0
+        self.summary = None
+
+    def update(self, sample):
+        '''
+        Add an interval sample
+
+        Parameters:
+        - sample (IntervalSample): The latest interval sample
+
+        Returns:
+        - converged (bool): True if the throughput has converged and the run can be stopped
+        '''
+        self.samples.append(sample)
+        if sample.timestamp - self.last_check < self.check_interval:
+            return False
+
+        self.last_check = sample.timestamp
+        self.summary = steady_state_summary(self.samples, self.confidence, self.tolerance)
+        return (self.summary is not None and self.summary["converged"]
+                and self.summary["steady_seconds"] >= self.min_steady_seconds)
@@ -1,38 +1,75 @@
 import subprocess
 import os
-import time 
+import re
 
 from cgroup_monitor import CGroupMonitor
 
 from utils.utils import log_update, path_of_db
-from utils.constants import TEST_NAME, DB_BENCH_PATH, OPTIONS_FILE_DIR, NUM_ENTRIES, SIDE_CHECKER, FIO_RESULT_PATH
+from utils.constants import TEST_NAME, OPTIONS_FILE_DIR, NUM_ENTRIES, SIDE_CHECKER, SIDE_CHECKER_INTERVAL, \
+    SETTLE_IDLE_WINDOW, SETTLE_MAX_TIMEOUT, SETTLE_DIRTY_THRESHOLD, EARLY_STOP_CONFIDENCE, \
+    STEADY_STATE, STEADY_STATE_TOLERANCE, TRASH_DELETE_RATE, TRASH_MIN_FREE, \
+    LOG_STATS_DUMP_PERIOD, STATISTICS
 from rocksdb.parse_db_bench_output import parse_db_bench_output
+from rocksdb.db_bench_monitor import monitor_db_bench_output
+from rocksdb.base_db_cache import prefill_db
+from rocksdb.workloads import get_workload
+from rocksdb.early_stopping import EarlyStoppingEngine
+from rocksdb.steady_state import SteadyStateDetector, steady_state_summary
+from rocksdb.scoring import incumbent_throughput
+from rocksdb.log_tailer import LogTailer, summarize_log_stats, archive_log
+from rocksdb.result_cache import lookup_result, store_result
+from rocksdb.surrogate import record_observation
+from rocksdb.benchmark_backend import db_bench_command_prefix, is_privileged_backend, device_fio_result
 from utils.utils import store_db_bench_output
 from utils.graph import plot_2axis
 from gpt.prompts_generator import midway_options_file_generation
-from utils.system_operations.fio_runner import get_fio_result
 from utils.system_operations.get_sys_info import system_info
+from utils.system_operations.settle import device_of_path, wait_for_quiescence
+from utils.system_operations.trash import TrashDeleter
+from utils.system_operations.resource_sampler import ResourceSampler, summarize_timeline
+from utils.system_operations.io_accounting import IOAccounting, compute_amplification, io_cgroup
 
+trash_deleter = TrashDeleter(TRASH_DELETE_RATE * 1024 * 1024)
 
-def pre_tasks(database_path, run_count):
+
+def pre_tasks(database_path, run_count, drop_caches=True):
     '''
     Function to perform the pre-tasks before running the db_bench
     Parameters:
     - database_path (str): The path to the database
     - run_count (str): The current iteration of the benchmark
+    - drop_caches (bool): Flush the page cache and wait, disabled when other slots are running
 
     Returns:
     - None
     '''
 
-    # Try to delete the database if path exists 
-    proc = subprocess.run(
-        f'rm -rf {database_path}',
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        shell=True,
-        check=False
-    )
+    # Move the database to the trash, it is deleted in the background between runs
+    trash_deleter.trash(database_path)
+    # The trash only shrinks between the runs, let it catch up if it leaves too little space
+    waited = trash_deleter.wait_for_space(os.path.dirname(os.path.abspath(database_path)), TRASH_MIN_FREE / 100)
+    if waited >= 1:
+        log_update(f"[SPM] Waited {waited:.0f}s for the trash to free {TRASH_MIN_FREE}% of the device")
+    # The deletion must not overlap the settle window and the measurement
+    trash_deleter.pause()
+
+    if drop_caches:
+        flush_caches(database_path)
+
+
+def flush_caches(database_path=None):
+    '''
+    Function to flush the page cache and wait for the memory and IO to settle
+
+    Parameters:
+    - database_path (str): The path to the database, its device is watched. None watches every disk
+
+    Returns:
+    - None
+    '''
+    # Only a real device needs (and allows) dropping the caches
+    if not is_privileged_backend():
+        return
 
     log_update("[SPM] Flushing the cache")
     print("[SPM] Flushing the cache")
@@ -45,144 +82,330 @@ def pre_tasks(database_path, run_count):
         check=False
     )
 
-    # update_log_file("[SPM] Waiting for 90 seconds to free up memory, IO and other resources")
-    print("[SPM] Waiting for 30 seconds to free up memory, IO and other resources")
-    # Give a 1.5 min delay for all the current memory/IO/etc to be freed
-    time.sleep(30)
+    # Wait for the current memory/IO/etc to be freed instead of a fixed delay
+    device = device_of_path(database_path) if database_path is not None else None
+    print(f"[SPM] Waiting for memory and IO to settle on {device or 'all devices'}")
+    settled, waited = wait_for_quiescence(device, SETTLE_IDLE_WINDOW, SETTLE_MAX_TIMEOUT,
+                                          dirty_threshold_kb=int(SETTLE_DIRTY_THRESHOLD * 1024) or None)
+    if settled:
+        log_update(f"[SPM] Memory and IO settled after {waited:.1f} seconds")
+    else:
+        log_update(f"[SPM] Memory and IO did not settle within {waited:.1f} seconds, starting anyway")
+
+
+def with_stats_dump_period(options, period):
+    '''
+    Function to set stats_dump_period_sec in the options written for db_bench, so the
+    RocksDB LOG has compaction and stall stats during the run
+
+    Parameters:
+    - options (str): The options file
+    - period (int): The stats dump period in seconds, 0 keeps the options file value
+
+    Returns:
+    - options (str): The options file with the stats dump period
+    '''
+    if not period:
+        return options
+    return re.sub(r"(?m)^(\s*stats_dump_period_sec\s*=).*$", rf"\g<1>{period}", options)
 
 
-def generate_db_bench_command(db_bench_path, database_path, options, run_count, test_name):
+def generate_db_bench_command(db_bench_path, database_path, options, run_count, test_name, options_file_dir=OPTIONS_FILE_DIR,
+                              duration=None):
     '''
     Generate the DB bench command
 
     Parameters:
-    - db_bench_path (str): The path to the db_bench executable
+    - db_bench_path (list): The command launching db_bench
     - database_path (str): The path to the database
     - option_file (dict): The options file to be used
     - run_count (str): The current iteration of the benchmark
     - test_name (str): The name of the test
+    - options_file_dir (str): The path the options file is stored at
+    - duration (int): Seconds the measured phase runs for at most, None for the workload duration
 
     Returns:
     - list: The db_bench command
     '''
 
-    db_bench_command = [
-        db_bench_path,
+    workload = get_workload(test_name)
+    if workload is None:
+        print(f"[SPM] Test name {test_name} not recognized")
+        exit(1)
+
+    base_command = [
+        *db_bench_path,
         f"--db={database_path}",
-        f"--options_file={OPTIONS_FILE_DIR}",
+        f"--options_file={options_file_dir}",
         "--use_direct_io_for_flush_and_compaction",
         "--use_direct_reads", "--compression_type=none",
-        "--stats_interval_seconds=1", "--histogram", 
-        f"--num={NUM_ENTRIES}", "--duration=100"
+        "--stats_interval_seconds=1", "--histogram",
     ]
 
-
-    if test_name == "fillrandom":
-        db_bench_command.append("--benchmarks=fillrandom")
-    elif test_name == "readrandomwriterandom":
-        db_bench_command.append("--benchmarks=readrandomwriterandom")
-    elif test_name == "readrandom":
-        tmp_runner = db_bench_command[:-2] + ["--num=25000000", "--benchmarks=fillrandom"]
-        tmp_proc = subprocess.run(tmp_runner, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, check=False)
-        new_db_bench = db_bench_command[:-2] + ["--benchmarks=readrandom", "--use_existing_db", "--num=25000000", "--duration=1000"]
-        db_bench_command = new_db_bench
-    elif test_name == "mixgraph":
-        tmp_runner = db_bench_command[:-2] + ["--num=25000000", "--benchmarks=fillrandom"]
-        tmp_proc = subprocess.run(tmp_runner, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, check=False)
-        new_db_bench = db_bench_command[:-1] + ["--benchmarks=mixgraph", "--use_existing_db", "--duration=1000", "--mix_get_ratio=0.5", "--mix_put_ratio=0.5", "--mix_seek_ratio=0.0", "--mix_get_ratio=0.5"]
-        db_bench_command = new_db_bench
-    elif test_name == "readwhilewriting":
-        db_bench_command.append("--benchmarks=readwhilewriting")
+    prefill = workload["prefill"]
+    if prefill is not None:
+        prefill_command = base_command + [
+            f"--num={prefill['num'] or NUM_ENTRIES}",
+            f"--benchmarks={prefill['benchmark']}",
+            *prefill["flags"],
+        ]
+        prefill_db(prefill_command, database_path, options)
+
+    db_bench_command = base_command + [f"--num={workload['num'] or NUM_ENTRIES}"]
+    if duration is not None:
+        # A shortened run, the workload may already run for less
+        duration = min(duration, workload["duration"] or duration)
     else:
-        print(f"[SPM] Test name {test_name} not recognized")
-        exit(1)
+        duration = workload["duration"]
+    if duration is not None:
+        db_bench_command.append(f"--duration={duration}")
+    db_bench_command.append(f"--benchmarks={workload['benchmark']}")
+    if prefill is not None:
+        db_bench_command.append("--use_existing_db")
+    if STATISTICS:
+        # Only the measured phase, the ticker and histogram dump is printed at the end of the run
+        db_bench_command.append("--statistics")
+    db_bench_command += workload["flags"]
 
     log_update(f"[SPM] Command: {db_bench_command}")
     return db_bench_command
 
 
-def db_bench(db_bench_path, database_path, options, run_count, test_name, previous_throughput, options_files, bm_iter=0):
+def db_bench(db_bench_path, database_path, options, run_count, test_name, previous_throughput, options_files, bm_iter=0, sample_callbacks=(),
+             options_file_dir=OPTIONS_FILE_DIR, drop_caches=True, partial_runs=None, duration=None, shared_device=False):
     '''
     Store the options in a file
     Do the benchmark
 
+    The db_bench output is streamed line by line, every stats interval report is parsed once
+    into an IntervalSample and shared by the side checker, the callbacks and the final parsing.
+
     Parameters:
-    - db_bench_path (str): The path to the db_bench executable
+    - db_bench_path (list): The command launching db_bench
     - database_path (str): The path to the database
     - option_file (dict): The options file to be used
     - run_count (str): The current iteration of the benchmark
+    - sample_callbacks (iterable): Functions called with each IntervalSample as it arrives
+    - options_file_dir (str): The path the options file is stored at
+    - drop_caches (bool): Flush the page cache before the run
+    - partial_runs (list): Runs stopped early are appended as (options, output, samples, summary)
+    - duration (int): Seconds the measured phase runs for at most, None for the workload duration
+    - shared_device (bool): If other slots run on the device, its IO is then read from the cgroup
 
     Returns:
-    - None
+    - output (str): The db_bench output
+    - samples (list): The IntervalSamples parsed from the output
+    - run_metrics (dict): Metrics sampled during the run
+        - resource_timeline (dict): Per-second CPU, memory and IO samples
+        - device_io (dict): Bytes read and written on the device and the database size
+        - log_stats (dict): Compaction stats and write stalls parsed from the RocksDB LOG
+    - avg_cpu_used (float): Average CPU usage during the run
+    - avg_mem_used (float): Average memory usage during the run
+    - options (str): The options file that was benchmarked
     '''
     global proc_out
-    with open(f"{OPTIONS_FILE_DIR}", "w") as f:
-        f.write(options)
+    with open(f"{options_file_dir}", "w") as f:
+        f.write(with_stats_dump_period(options, LOG_STATS_DUMP_PERIOD))
+
+    cgroup_monitor = resource_sampler = io_accounting = log_tailer = None
+    stopped = None
+
+    def stop_monitors():
+        '''
+        Stop the monitors once, returns (avg_cpu_used, avg_mem_used, run_metrics)
+        '''
+        nonlocal stopped
+        if stopped is None:
+            avg_cpu_used, avg_mem_used = cgroup_monitor.stop_monitor() if cgroup_monitor is not None else (None, None)
+            stopped = (avg_cpu_used, avg_mem_used, {
+                "resource_timeline": resource_sampler.stop() if resource_sampler is not None else None,
+                "device_io": io_accounting.stop() if io_accounting is not None else None,
+                "log_stats": log_tailer.stop() if log_tailer is not None else None,
+            })
+        return stopped
+
+    # The deleter and the monitors must be stopped even when the run fails
+    try:
+        # Perform pre-tasks to reset the environment
+        pre_tasks(database_path, run_count, drop_caches)
+        command = generate_db_bench_command(db_bench_path, database_path, options, run_count, test_name,
+                                            options_file_dir, duration)
+
+        log_update(f"[SPM] Executing db_bench with command: {command}")
+        print("[SPM] Executing db_bench")
+
+        side_checker_enabled = SIDE_CHECKER and previous_throughput != None
+        cgroup_monitor = CGroupMonitor()
+        cgroup_monitor.start_monitor()
+        device = device_of_path(database_path)
+        resource_sampler = ResourceSampler(device)
+        resource_sampler.start()
+        io_accounting = IOAccounting(device, database_path, io_cgroup() if shared_device else None, shared_device)
+        io_accounting.start()
+        log_tailer = LogTailer(database_path)
+        log_tailer.start()
+
+        if side_checker_enabled:
+            early_stopping = EarlyStoppingEngine(previous_throughput, EARLY_STOP_CONFIDENCE,
+                                                 SIDE_CHECKER_INTERVAL, SIDE_CHECKER_INTERVAL)
+
+        if STEADY_STATE:
+            steady_state_detector = SteadyStateDetector(STEADY_STATE_TOLERANCE)
+
+        output_lines = []
+        samples = []
+        with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True) as proc_out:
+            for line, sample in monitor_db_bench_output(proc_out.stdout, sample_callbacks):
+                output_lines.append(line)
+                if sample is None:
+                    continue
+                samples.append(sample)
 
-    # Perform pre-tasks to reset the environment
-    pre_tasks(database_path, run_count)
-    command = generate_db_bench_command(db_bench_path, database_path, options, run_count, test_name)
+                if STEADY_STATE and steady_state_detector.update(sample):
+                    print("[SPM] Throughput converged, stopping the benchmark")
+                    log_update(f"[SPM] Throughput converged after {sample.timestamp:.0f}s: {steady_state_detector.summary}")
+                    proc_out.terminate()
+                    break
 
-    log_update(f"[SPM] Executing db_bench with command: {command}")
-    print("[SPM] Executing db_bench")
+                if not side_checker_enabled:
+                    continue
 
+                if early_stopping.update(sample) and (bm_iter < 3):
+                    current_avg_throughput = sample.cumulative_ops_per_sec
+                    summary = early_stopping.summary()
+                    print("[SQU] Throughput is clearly below the best run, resetting the benchmark")
+                    log_update(f"[SQU] Throughput upper bound {summary['upper_bound_ops_per_sec']:.1f} below "
+                               f"{previous_throughput} after {sample.timestamp:.0f}s, resetting the benchmark")
+                    avg_cpu_used, avg_mem_used, _ = stop_monitors()
+                    proc_out.kill()
+
+                    # Keep the truncated run instead of throwing it away
+                    if partial_runs is not None:
+                        summary["stopped_at"] = sample.timestamp
+                        partial_runs.append((options, "".join(output_lines), samples, summary))
+
+                    db_path = path_of_db()
+                    fio_result = device_fio_result()
+                    device_info = system_info(db_path, fio_result)
+
+                    new_options, _, _ = midway_options_file_generation(options, avg_cpu_used, avg_mem_used, current_avg_throughput, device_info, options_files)
+                    output, samples, run_metrics, avg_cpu_used, avg_mem_used, options = db_bench(
+                        db_bench_path, database_path, new_options, run_count, test_name, previous_throughput, options_files, bm_iter+1, sample_callbacks,
+                        options_file_dir, drop_caches, partial_runs, duration, shared_device)
+
+                    log_update("[SPM] Finished running db_bench")
+                    return output, samples, run_metrics, avg_cpu_used, avg_mem_used, options
+
+        if side_checker_enabled and not samples:
+            print("[SQU] No throughput found in the output")
+            log_update("[SQU] No throughput found in the output")
+
+        output = "".join(output_lines)
+        print("[SPM] Finished running db_bench")
+        print("----------------------------------------------------------------------------")
+        print("[SPM] Output: ", output)
+        avg_cpu_used, avg_mem_used, run_metrics = stop_monitors()
+    finally:
+        stop_monitors()
+        trash_deleter.resume()
+    return output, samples, run_metrics, avg_cpu_used, avg_mem_used, options
 
-    if SIDE_CHECKER and previous_throughput != None:
-        cgroup_monitor = CGroupMonitor()
-        cgroup_monitor.start_monitor()
-        start_time = time.time()
 
-        with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True) as proc_out:
-            output = ""
-            check_interval = 30
-            for line in proc_out.stdout:
-                output += line
-                if time.time() - start_time <= check_interval:
-                    continue
+def apply_steady_state(benchmark_results, samples):
+    '''
+    Function to add the steady-state throughput to the benchmark results
 
-                start_time = time.time()
-                if "ops/second" in line:
-                    current_avg_throughput = float(line.split("(")[2].split(",")[1].split(")")[0])
+    In steady-state mode the run may have been stopped before db_bench printed its summary,
+    and the steady-state mean replaces the cumulative average (which includes the warm-up)
+    as the ops/sec score.
 
-                    if (current_avg_throughput < 0.9 * float(previous_throughput)) and (bm_iter < 3):
-                        print("[SQU] Throughput decreased, resetting the benchmark")
-                        log_update(f"[SQU] Throughput decreased {previous_throughput}->{current_avg_throughput}, resetting the benchmark")
-                        avg_cpu_used, avg_mem_used = cgroup_monitor.stop_monitor()
-                        proc_out.kill()
+    Parameters:
+    - benchmark_results (dict): The parsed benchmark results, updated in place
+    - samples (list): The IntervalSamples of the run
 
-                        db_path = path_of_db()
-                        fio_result = get_fio_result(FIO_RESULT_PATH)
-                        device_info = system_info(db_path, fio_result)
+    Returns:
+    - None
+    '''
+    if benchmark_results.get("error") is not None or not samples:
+        return
 
-                        new_options, _, _ = midway_options_file_generation(options, avg_cpu_used, avg_mem_used, current_avg_throughput, device_info, options_files)
-                        output, avg_cpu_used, avg_mem_used, options = db_bench(db_bench_path, database_path, new_options, run_count, test_name, previous_throughput, options_files, bm_iter+1)
+    summary = steady_state_summary(samples, tolerance=STEADY_STATE_TOLERANCE)
+    benchmark_results["steady_state"] = summary
+    if not STEADY_STATE or summary is None:
+        return
 
-                        log_update("[SPM] Finished running db_bench")
-                        return output, avg_cpu_used, avg_mem_used, options
-                else:
-                    print("[SQU] No throughput found in the output")
-                    log_update("[SQU] No throughput found in the output")
-                    # exit(1)
+    benchmark_results["cumulative_ops_per_sec"] = benchmark_results["ops_per_sec"]
+    benchmark_results["ops_per_sec"] = int(summary["mean_ops_per_sec"])
+    if benchmark_results["data_speed"] is None:
+        benchmark_results["data_speed"] = benchmark_results["ops_per_sec"]
+        benchmark_results["data_speed_unit"] = "ops/sec"
+
+
+def run_number(output_file_dir):
+    '''
+    Function to get the number of the next run, the N of its N.ini, LOG_N and ops_per_sec_N.png
+
+    Only the finished runs are counted, the partial and failed runs are named after the
+    run they belong to (see attempt_name).
+
+    Parameters:
+    - output_file_dir (str): the output directory
+
+    Returns:
+    - run_number (int): The number of finished runs so far
+    '''
+    return len([f for f in os.listdir(output_file_dir) if re.fullmatch(r"\d+\.ini", f)])
+
+
+def attempt_name(output_file_dir, run, kind):
+    '''
+    Function to name a partial or failed attempt of a run, e.g. 3-partial-2 for the
+    second partial run before run 3
+
+    Parameters:
+    - output_file_dir (str): the output directory
+    - run (int): The number of the run the attempt belongs to
+    - kind (str): The kind of attempt, partial or incorrect_options
+
+    Returns:
+    - name (str): The name of the attempt, without extension
+    '''
+    pattern = re.compile(rf"{run}-{kind}-\d+\.ini")
+    attempts = len([f for f in os.listdir(output_file_dir) if pattern.fullmatch(f)])
+    return f"{run}-{kind}-{attempts + 1}"
 
-        print("[SPM] Finished running db_bench")
-        print("----------------------------------------------------------------------------")
-        print("[SPM] Output: ", output)
-        avg_cpu_used, avg_mem_used = cgroup_monitor.stop_monitor()
-        return output, avg_cpu_used, avg_mem_used, options
-    else:
-        cgroup_monitor = CGroupMonitor()
-        cgroup_monitor.start_monitor()
-        proc_out = subprocess.run(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            check=False
-        )
-        avg_cpu_used, avg_mem_used = cgroup_monitor.stop_monitor()
-        return proc_out.stdout.decode(), avg_cpu_used, avg_mem_used, options
 
+def store_partial_runs(partial_runs, output_file_dir, reasoning):
+    '''
+    Function to store the runs stopped early by the side checker
+
+    The truncated output has no summary line, the throughput is taken from the last
+    interval sample instead.
+
+    Parameters:
+    - partial_runs (list): A list of (options, output, samples, summary) tuples
+    - output_file_dir (str): the output directory
+    - reasoning (str): The reasoning of the benchmark
 
-def benchmark(db_path, options, output_file_dir, reasoning, iteration_count, previous_results, options_files):
+    Returns:
+    - None
+    '''
+    for options, output, samples, summary in partial_runs:
+        partial_results = parse_db_bench_output(output, samples, TEST_NAME)
+        if partial_results.get("error") is not None:
+            continue
+        if partial_results["ops_per_sec"] is None and samples:
+            partial_results["ops_per_sec"] = samples[-1].cumulative_ops_per_sec
+        partial_results["partial"] = summary
+
+        name = attempt_name(output_file_dir, run_number(output_file_dir), "partial")
+        store_db_bench_output(output_file_dir, f"{name}.ini", partial_results, options, reasoning)
+        log_update(f"[SPM] Stored partial run stopped at {summary['stopped_at']:.0f}s "
+                   f"with {partial_results['ops_per_sec']} ops/sec")
+
+
+def benchmark(db_path, options, output_file_dir, reasoning, iteration_count, previous_results, options_files,
+              options_file_dir=OPTIONS_FILE_DIR, drop_caches=True, duration=None, shared_device=False):
     '''
     Function to run db_bench with the given options file and store the output in a file
 
@@ -191,23 +414,54 @@ def benchmark(db_path, options, output_file_dir, reasoning, iteration_count, pre
     - options (dict): The options to be used
     - output_file_dir (str): the output directory
     - reasoning (str): The reasoning of the benchmark
+    - options_file_dir (str): The path the options file is stored at
+    - drop_caches (bool): Flush the page cache before the run
+    - duration (int): Seconds the measured phase runs for at most, None for the workload duration
+    - shared_device (bool): If other slots run on the device, its IO is then read from the cgroup
 
     Returns:
     - is_error (bool): 
     - benchmark_results (dict):
     '''
-    if previous_results is None:
-        output, average_cpu_usage, average_memory_usage, options = db_bench(
-            DB_BENCH_PATH, db_path, options, iteration_count, TEST_NAME, None, options_files)
-    else:
-        output, average_cpu_usage, average_memory_usage, options = db_bench(
-            DB_BENCH_PATH, db_path, options, iteration_count, TEST_NAME, previous_results['ops_per_sec'], options_files)
+    # An options file already measured on this hardware is not run again
+    cached = lookup_result(options, db_path, TEST_NAME, duration)
+    if cached is not None:
+        benchmark_results, average_cpu_usage, average_memory_usage, options = cached
+        store_db_bench_output(output_file_dir, f"{run_number(output_file_dir)}.ini", benchmark_results, options,
+                              reasoning)
+        return False, benchmark_results, average_cpu_usage, average_memory_usage, options
+
+    partial_runs = []
+    # Early stopping compares against the best scoring run so far, not only the previous one
+    incumbent = None
+    if previous_results is not None:
+        incumbent = incumbent_throughput([previous_results] + [result for _, result, _, _ in options_files])
+    output, samples, run_metrics, average_cpu_usage, average_memory_usage, options = db_bench(
+        db_bench_command_prefix(), db_path, options, iteration_count, TEST_NAME, incumbent, options_files,
+        options_file_dir=options_file_dir, drop_caches=drop_caches, partial_runs=partial_runs, duration=duration,
+        shared_device=shared_device)
+
+    store_partial_runs(partial_runs, output_file_dir, reasoning)
 
     # log_update(f"[SPM] Output: {output}")
-    benchmark_results = parse_db_bench_output(output)
-
-    contents = os.listdir(output_file_dir)
-    ini_file_count = len([f for f in contents if f.endswith(".ini")])
+    benchmark_results = parse_db_bench_output(output, samples, TEST_NAME)
+    apply_steady_state(benchmark_results, samples)
+    if benchmark_results.get("error") is None:
+        # Stored next to ops_per_second_graph, on the same 1 second cadence
+        benchmark_results["resource_timeline"] = run_metrics["resource_timeline"]
+        benchmark_results["resource_summary"] = summarize_timeline(
+            run_metrics["resource_timeline"], benchmark_results["ops_per_second_graph"])
+        benchmark_results["device_io"] = run_metrics["device_io"]
+        benchmark_results["amplification"] = compute_amplification(
+            run_metrics["device_io"], benchmark_results["total_operations"], get_workload(TEST_NAME), NUM_ENTRIES)
+        benchmark_results["log_summary"] = summarize_log_stats(run_metrics["log_stats"])
+
+    ini_file_count = run_number(output_file_dir)
+    is_error = benchmark_results.get("error") is not None or benchmark_results.get('data_speed') is None
+    run_name = attempt_name(output_file_dir, ini_file_count, "incorrect_options") if is_error else str(ini_file_count)
+
+    # The next run tears the database down, keep its LOG with the run
+    archive_log(db_path, output_file_dir, run_name, run_metrics["log_stats"])
 
     if benchmark_results.get("error") is not None:
         is_error = True
@@ -216,7 +470,7 @@ def benchmark(db_path, options, output_file_dir, reasoning, iteration_count, pre
               benchmark_results.get("error"))
         # Save incorrect options in a file
         store_db_bench_output(output_file_dir,
-                              f"{ini_file_count}-incorrect_options.ini",
+                              f"{run_name}.ini",
                               benchmark_results, options, reasoning)
     elif benchmark_results['data_speed'] is None:
         is_error = True
@@ -225,10 +479,14 @@ def benchmark(db_path, options, output_file_dir, reasoning, iteration_count, pre
               "Data speed is None. Check DB save path")
         # Save incorrect options in a file
         store_db_bench_output(output_file_dir,
-                              f"{ini_file_count}-incorrect_options.ini",
+                              f"{run_name}.ini",
                               benchmark_results, options, reasoning)
     else:
         is_error = False
+        store_result(options, db_path, TEST_NAME, benchmark_results, average_cpu_usage, average_memory_usage, duration)
+        if duration is None:
+            # Shortened runs are not comparable, only the full length runs train the surrogate
+            record_observation(options, db_path, TEST_NAME, benchmark_results)
         # Store the output of db_bench in a file
         store_db_bench_output(output_file_dir, f"{ini_file_count}.ini",
                               benchmark_results, options, reasoning)
@@ -0,0 +1,277 @@
+import os
+import json
+import fcntl
+import hashlib
+
+import numpy as np
+
+from utils.utils import log_update
+from utils.constants import SURROGATE, SURROGATE_DIR, SURROGATE_MIN_RUNS, VERSION, NUM_ENTRIES, BENCHMARK_BACKEND
+from rocksdb.workloads import get_workload
+from rocksdb.scoring import incumbent_throughput
+from rocksdb.result_cache import normalize_options, hardware_fingerprint
+
+# A candidate is rejected when even its optimistic throughput, this many standard
+# deviations above the prediction, is below the best run
+REJECT_Z = 2.0
+# Hyperparameters tried when fitting, the one with the best marginal likelihood is kept
+LENGTH_SCALES = [0.25, 0.5, 1.0, 2.0, 4.0]
+NOISE_VARIANCES = [0.01, 0.1, 0.3]
+
+
+def encode_value(value):
+    '''
+    Function to turn an option value into a number, None for categorical values
+
+    Sizes span several orders of magnitude, numbers are compressed with a signed log.
+    '''
+    if value in ("true", "false"):
+        return 1.0 if value == "true" else 0.0
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return float(np.sign(number) * np.log1p(abs(number)))
+
+
+class OptionsEncoder:
+    '''
+    Encode parsed options files as feature vectors
+
+    Only the options that differ between the observed files are features. Numeric and
+    boolean options are one standardized column each, the others are one-hot encoded
+    over the values seen.
+    '''
+
+    def __init__(self, observations):
+        '''
+        Parameters:
+        - observations (list): The normalized options files (see normalize_options)
+        '''
+        self.numeric = []
+        self.categorical = {}
+        keys = sorted(set().union(*observations))
+        for key in keys:
+            values = [options.get(key) for options in observations]
+            if len(set(values)) < 2:
+                continue
+            encoded = [encode_value(value) for value in values if value is not None]
+            if all(number is not None for number in encoded):
+                self.numeric.append(key)
+            else:
+                self.categorical[key] = sorted(set(value for value in values if value is not None))
+
+        raw = np.array([self._raw(options) for options in observations])
+        self.mean = np.nanmean(raw, axis=0) if raw.size else np.zeros(0)
+        self.std = np.nanstd(raw, axis=0) if raw.size else np.zeros(0)
+        self.std[self.std == 0] = 1.0
+
+    def _raw(self, options):
+        row = [encode_value(options[key]) if key in options else np.nan for key in self.numeric]
+        for key, categories in self.categorical.items():
+            row += [1.0 if options.get(key) == category else 0.0 for category in categories]
+        return row
+
+    def encode(self, options):
+        '''
+        Parameters:
+        - options (dict): A normalized options file
+
+        Returns:
+        - features (np.ndarray): The standardized features, a missing option is at the mean
+        '''
+        row = (np.array(self._raw(options), dtype=float) - self.mean) / self.std
+        return np.nan_to_num(row)
+
+
+class GaussianProcess:
+    '''
+    Gaussian process regressor with an RBF kernel on standardized features and targets
+    '''
+
+    def fit(self, features, targets):
+        '''
+        Fit the process, the length scale and the noise are picked by marginal likelihood
+
+        Parameters:
+        - features (np.ndarray): One row per observation
+        - targets (np.ndarray): The observed values
+        '''
+        self.features = features
+        self.target_mean = targets.mean()
+        self.target_std = targets.std() or 1.0
+        standardized = (targets - self.target_mean) / self.target_std
+        squared_distances = self._squared_distances(features, features)
+        dimensions = max(features.shape[1], 1)
+
+        best = None
+        for length_scale in LENGTH_SCALES:
+            for noise in NOISE_VARIANCES:
+                scale = length_scale * np.sqrt(dimensions)
+                kernel = np.exp(-squared_distances / (2 * scale ** 2)) + noise * np.eye(len(features))
+                try:
+                    cholesky = np.linalg.cholesky(kernel)
+                except np.linalg.LinAlgError:
+                    continue
+                alpha = np.linalg.solve(cholesky.T, np.linalg.solve(cholesky, standardized))
+                log_likelihood = -0.5 * standardized @ alpha - np.log(np.diag(cholesky)).sum()
+                if best is None or log_likelihood > best[0]:
+                    best = (log_likelihood, scale, noise, cholesky, alpha)
+        _, self.scale, self.noise, self.cholesky, self.alpha = best
+        return self
+
+    def predict(self, features):
+        '''
+        Parameters:
+        - features (np.ndarray): One row per point
+
+        Returns:
+        - mean (np.ndarray): The predicted values
+        - std (np.ndarray): Their standard deviation
+        '''
+        cross = np.exp(-self._squared_distances(features, self.features) / (2 * self.scale ** 2))
+        mean = cross @ self.alpha
+        solved = np.linalg.solve(self.cholesky, cross.T)
+        variance = np.clip(1 + self.noise - (solved ** 2).sum(axis=0), 1e-12, None)
+        return mean * self.target_std + self.target_mean, np.sqrt(variance) * self.target_std
+
+    @staticmethod
+    def _squared_distances(a, b):
+        return ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2)
+
+
+def surrogate_path(db_path, test_name):
+    '''
+    Function to get the file the observations of a hardware and workload are stored in
+
+    The CPU set and the device name are left out, so the slots (one CPU set and maybe one
+    drive of the same model each) and the main process share the observations.
+    '''
+    hardware = {key: value for key, value in hardware_fingerprint(db_path).items() if key not in ("cpus", "device")}
+    material = {
+        "workload": get_workload(test_name),
+        "version": VERSION,
+        "backend": BENCHMARK_BACKEND,
+        "hardware": hardware,
+        "num_entries": NUM_ENTRIES,
+    }
+    key = hashlib.sha1(json.dumps(material, sort_keys=True).encode()).hexdigest()
+    return os.path.join(SURROGATE_DIR, f"{key}.json")
+
+
+def record_observation(options, db_path, test_name, benchmark_results):
+    '''
+    Function to add a finished full length run to the observations of the surrogate
+
+    The observations are kept across sessions, the model is refit from them when it is used.
+
+    Parameters:
+    - options (str): The options file that was benchmarked
+    - db_path (str): The path of the database
+    - test_name (str): The workload name
+    - benchmark_results (dict): The benchmark results
+
+    Returns:
+    - None
+    '''
+    if not SURROGATE or not benchmark_results.get("ops_per_sec"):
+        return
+
+    os.makedirs(SURROGATE_DIR, exist_ok=True)
+    path = surrogate_path(db_path, test_name)
+    with open(f"{path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        observations = []
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                observations = json.load(f)
+        observations.append({"options": normalize_options(options), "ops_per_sec": benchmark_results["ops_per_sec"]})
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(observations, f)
+        os.replace(f"{path}.tmp", path)
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_surrogate(db_path, test_name, candidate_options=()):
+    '''
+    Function to fit the surrogate on the stored observations
+
+    Parameters:
+    - db_path (str): The path of the database
+    - test_name (str): The workload name
+    - candidate_options (list): The options files to predict. An option only they change is
+      a feature too, so such a candidate is far from the observations and its prediction uncertain
+
+    Returns:
+    - predict (function): Function mapping an options file to its predicted log throughput
+      and standard deviation, None when there are fewer than --surrogate_min_runs observations
+    '''
+    path = surrogate_path(db_path, test_name)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        observations = json.load(f)
+    if len(observations) < SURROGATE_MIN_RUNS:
+        return None
+
+    encoder = OptionsEncoder([observation["options"] for observation in observations] +
+                             [normalize_options(options) for options in candidate_options])
+    features = np.array([encoder.encode(observation["options"]) for observation in observations])
+    targets = np.log(np.array([observation["ops_per_sec"] for observation in observations], dtype=float))
+    process = GaussianProcess().fit(features, targets)
+
+    def predict(options):
+        mean, std = process.predict(encoder.encode(normalize_options(options))[None, :])
+        return mean[0], std[0]
+
+    log_update(f"[SUR] Surrogate fit on {len(observations)} runs, {features.shape[1]} features")
+    return predict
+
+
+def rank_candidates(candidates, db_path, test_name, options_files):
+    '''
+    Function to order the candidates by predicted throughput and drop the obviously bad ones
+
+    A candidate is dropped when its optimistic throughput, REJECT_Z standard deviations above
+    the prediction, is below the throughput of the best run. The surrogate only ranks once
+    --surrogate_min_runs runs were observed for this hardware and workload. It never drops
+    every candidate: when all of them are expected to lose, the most promising one is kept,
+    so a model fit on a few runs cannot stall the tuning.
+
+    Parameters:
+    - candidates (list): A list of (options, reasoning, summary_of_changes) tuples
+    - db_path (str): The path of the database
+    - test_name (str): The workload name
+    - options_files (list): List of the previous options files
+
+    Returns:
+    - candidates (list): The kept candidates, the most promising first, never empty if candidates is not
+    '''
+    if not SURROGATE or not candidates:
+        return candidates
+    predict = load_surrogate(db_path, test_name, [candidate[0] for candidate in candidates])
+    if predict is None:
+        return candidates
+
+    incumbent = incumbent_throughput([result for _, result, _, _ in options_files])
+    ranked = []
+    for candidate_id, candidate in enumerate(candidates):
+        mean, std = predict(candidate[0])
+        optimistic = mean + REJECT_Z * std
+        log_update(f"[SUR] Candidate {candidate_id}: predicted {np.exp(mean):.0f} ops/sec "
+                   f"(optimistic {np.exp(optimistic):.0f})")
+        ranked.append((optimistic, candidate_id, candidate))
+    ranked.sort(key=lambda entry: entry[0], reverse=True)
+
+    kept = []
+    for optimistic, candidate_id, candidate in ranked:
+        if incumbent is not None and optimistic < np.log(incumbent):
+            log_update(f"[SUR] Candidate {candidate_id} rejected, it is unlikely to beat {incumbent} ops/sec")
+            continue
+        kept.append(candidate)
+
+    if not kept:
+        _, candidate_id, candidate = ranked[0]
+        log_update(f"[SUR] Every candidate rejected, benchmarking the most promising one, candidate {candidate_id}")
+        kept.append(candidate)
+    return kept
@@ -0,0 +1,156 @@
+import json
+
+from utils.constants import WORKLOAD_FILE
+
+# Workload registry
+# Each workload is plain data:
+# - benchmark (str): The db_bench benchmark that is measured
+# - prefill (dict): The phase filling the database before the measurement, None for none
+#     - benchmark (str): The db_bench benchmark filling the database
+#     - num (int): The number of keys to fill, None for --num_entries
+#     - flags (list): Extra db_bench flags of the fill phase
+# - num (int): The number of keys of the measured phase, None for --num_entries
+# - duration (int): Seconds the measured phase runs for, None to run until num operations are done
+# - flags (list): Extra db_bench flags of the measured phase (key/value sizes, mix ratios, ...)
+# - parser (str): The format of the summary printed by db_bench
+#     - "write": ops/sec, MB/s and the write latency histogram
+#     - "read": ops/sec, MB/s, the number of keys found and the read latency histogram
+#     - "ops": ops/sec only
+# - read_fraction / write_fraction (float): Share of the measured operations that read / write
+#   a key-value pair, used for the read and write amplification. None when unknown
+#
+# Custom workloads are loaded from the JSON file given with --workload_file, e.g.
+# {"prod_mix": {"benchmark": "mixgraph", "prefill": {"benchmark": "fillrandom", "num": 50000000},
+#               "duration": 600, "parser": "ops",
+#               "flags": ["--mix_get_ratio=0.8", "--mix_put_ratio=0.15", "--mix_seek_ratio=0.05",
+#                         "--value_size_distribution_type=pareto", "--value_theta=0.2"]}}
+
+DEFAULT_PREFILL = {"benchmark": "fillrandom", "num": 25000000, "flags": []}
+
+WORKLOADS = {
+    "fillrandom": {
+        "benchmark": "fillrandom",
+        "prefill": None,
+        "num": None,
+        "duration": 100,
+        "flags": [],
+        "parser": "write",
+        "read_fraction": None,
+        "write_fraction": 1.0,
+    },
+    "readrandomwriterandom": {
+        "benchmark": "readrandomwriterandom",
+        "prefill": None,
+        "num": None,
+        "duration": 100,
+        "flags": [],
+        "parser": "ops",
+        # db_bench --readwritepercent defaults to 90
+        "read_fraction": 0.9,
+        "write_fraction": 0.1,
+    },
+    "readrandom": {
+        "benchmark": "readrandom",
+        "prefill": DEFAULT_PREFILL,
+        "num": 25000000,
+        "duration": 1000,
+        "flags": [],
+        "parser": "read",
+        "read_fraction": 1.0,
+        "write_fraction": None,
+    },
+    "mixgraph": {
+        "benchmark": "mixgraph",
+        "prefill": DEFAULT_PREFILL,
+        "num": None,
+        "duration": 1000,
+        "flags": ["--mix_get_ratio=0.5", "--mix_put_ratio=0.5", "--mix_seek_ratio=0.0"],
+        "parser": "ops",
+        "read_fraction": 0.5,
+        "write_fraction": 0.5,
+    },
+    "readwhilewriting": {
+        "benchmark": "readwhilewriting",
+        "prefill": None,
+        "num": None,
+        "duration": 100,
+        "flags": [],
+        "parser": "read",
+        # Only the reads are counted in the ops, the writer thread runs on the side
+        "read_fraction": 1.0,
+        "write_fraction": None,
+    },
+}
+
+PARSERS = ["write", "read", "ops"]
+
+
+def register_workload(name, definition):
+    '''
+    Add a workload to the registry, missing fields take the defaults
+
+    Parameters:
+    - name (str): The workload name used with --workload
+    - definition (dict): The workload definition
+
+    Returns:
+    - workload (dict): The registered workload
+
+    Raises:
+    - ValueError: If the definition is invalid
+    '''
+    if "benchmark" not in definition:
+        raise ValueError(f"Workload {name} does not define a benchmark")
+
+    workload = {
+        "benchmark": definition["benchmark"],
+        "prefill": None,
+        "num": None,
+        "duration": 100,
+        "flags": [],
+        "parser": "ops",
+        "read_fraction": None,
+        "write_fraction": None,
+    }
+    workload.update(definition)
+
+    if workload["parser"] not in PARSERS:
+        raise ValueError(f"Workload {name} uses unknown parser {workload['parser']}, choose from {PARSERS}")
+    if workload["prefill"] is not None:
+        workload["prefill"] = {**DEFAULT_PREFILL, **workload["prefill"]}
+
+    WORKLOADS[name] = workload
+    return workload
+
+
+def load_workload_file(file_path):
+    '''
+    Register the custom workloads of a JSON file
+
+    Parameters:
+    - file_path (str): The path of the JSON file
+
+    Returns:
+    - None
+    '''
+    with open(file_path, "r") as f:
+        definitions = json.load(f)
+    for name, definition in definitions.items():
+        register_workload(name, definition)
+
+
+def get_workload(name):
+    '''
+    Look up a workload
+
+    Parameters:
+    - name (str): The workload name
+
+    Returns:
+    - workload (dict): The workload, None if it is not registered
+    '''
+    return WORKLOADS.get(name)
+
+
+if WORKLOAD_FILE:
+    load_workload_file(WORKLOAD_FILE)
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# utils.constants parses the command line when it is imported, the pytest arguments are not for it
+sys.argv = sys.argv[:1]
+# Keep the log of the modules under test out of the repository
+os.environ.setdefault("OUTPUT_PATH", tempfile.mkdtemp(prefix="elmo-tune-tests-"))
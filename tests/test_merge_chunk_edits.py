@@ -0,0 +1,45 @@
+import unittest
+
+from gpt.prompts_generator import merge_chunk_edits
+
+
+class MergeChunkEditsTest(unittest.TestCase):
+
+    def test_changed_values_of_each_chunk_are_merged(self):
+        edits = merge_chunk_edits([
+            ({"write_buffer_size": "67108864", "max_write_buffer_number": "2"},
+             {"write_buffer_size": "134217728", "max_write_buffer_number": "2"}),
+            ({"max_background_jobs": "2"}, {"max_background_jobs": "8"}),
+        ])
+
+        self.assertEqual(edits, {"write_buffer_size": "134217728", "max_background_jobs": "8"})
+
+    def test_owner_wins_over_a_foreign_chunk(self):
+        edits = merge_chunk_edits([
+            ({"write_buffer_size": "67108864"}, {"write_buffer_size": "134217728"}),
+            ({"max_background_jobs": "2"}, {"max_background_jobs": "4", "write_buffer_size": "268435456"}),
+        ])
+
+        self.assertEqual(edits, {"write_buffer_size": "134217728", "max_background_jobs": "4"})
+
+    def test_foreign_value_is_dropped_when_the_owner_keeps_its_value(self):
+        edits = merge_chunk_edits([
+            ({"write_buffer_size": "67108864"}, {}),
+            ({"max_background_jobs": "2"}, {"write_buffer_size": "268435456"}),
+        ])
+
+        self.assertEqual(edits, {})
+
+    def test_unknown_options_are_ignored(self):
+        edits = merge_chunk_edits([({"max_background_jobs": "2"}, {"not_an_option": "1"})])
+
+        self.assertEqual(edits, {})
+
+    def test_option_names_are_case_insensitive(self):
+        edits = merge_chunk_edits([
+            ({"write_buffer_size": "67108864", "Max_Open_Files": "-1"}, {"WRITE_BUFFER_SIZE": "134217728"}),
+            ({"max_background_jobs": "2"}, {"Max_Background_Jobs": "4", "max_open_files": "5000"}),
+        ])
+
+        # Edits are named as in the owning chunk, the foreign max_open_files is a conflict
+        self.assertEqual(edits, {"write_buffer_size": "134217728", "max_background_jobs": "4"})
@@ -0,0 +1,64 @@
+import os
+import unittest
+
+from options_files.options_model import parse_options, _parse
+
+DEFAULT_OPTIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "options_files", "default_options_files")
+DEFAULT_OPTIONS_FILE = os.path.join(DEFAULT_OPTIONS_DIR, "dbbench_default_options-8.8.1.ini")
+
+
+def read_options(path):
+    with open(path, "r") as f:
+        return f.read()
+
+
+class OptionsModelTest(unittest.TestCase):
+
+    def test_default_files_serialize_unchanged(self):
+        file_names = [file_name for file_name in sorted(os.listdir(DEFAULT_OPTIONS_DIR)) if file_name.endswith(".ini")]
+        self.assertTrue(file_names)
+        for file_name in file_names:
+            with self.subTest(file_name=file_name):
+                text = read_options(os.path.join(DEFAULT_OPTIONS_DIR, file_name))
+                options_file = parse_options(text)
+
+                self.assertEqual(options_file.serialize(), text)
+                self.assertTrue(options_file.sections())
+
+    def test_set_is_case_insensitive_and_keeps_the_original_case(self):
+        text = "[DBOptions]\n  Max_Background_Jobs=2\n  max_open_files=-1\n"
+        options_file = parse_options(text)
+
+        options_file.set("DBOptions", "MAX_BACKGROUND_JOBS", "8")
+
+        self.assertEqual(options_file.get("DBOptions", "max_background_jobs"), "8")
+        self.assertEqual(options_file.get("DBOptions", "Max_Background_Jobs"), "8")
+        self.assertEqual(options_file.serialize(), "[DBOptions]\n  Max_Background_Jobs=8\n  max_open_files=-1\n")
+        self.assertEqual(options_file.sections_of("MAX_BACKGROUND_JOBS"), ("DBOptions",))
+        with self.assertRaises(KeyError):
+            options_file.set("DBOptions", "not_an_option", "1")
+
+    def test_only_the_value_is_rewritten(self):
+        text = read_options(DEFAULT_OPTIONS_FILE)
+        options_file = parse_options(text)
+
+        options_file.set("DBOptions", "max_background_jobs", "8")
+
+        self.assertEqual(options_file.serialize(), text.replace("  max_background_jobs=2\n", "  max_background_jobs=8\n"))
+
+    def test_editing_a_clone_leaves_the_cache_and_siblings_untouched(self):
+        text = read_options(DEFAULT_OPTIONS_FILE)
+        first = parse_options(text)
+        second = parse_options(text)
+        third = first.clone()
+
+        first.set("DBOptions", "max_background_jobs", "8")
+        third.set("DBOptions", "max_background_jobs", "16")
+
+        self.assertEqual(first.get("DBOptions", "max_background_jobs"), "8")
+        self.assertEqual(second.get("DBOptions", "max_background_jobs"), "2")
+        self.assertEqual(third.get("DBOptions", "max_background_jobs"), "16")
+        self.assertEqual(second.serialize(), text)
+        # The cached parse is still the file as read, a new parse does not see the edits
+        self.assertEqual(_parse(text).serialize(), text)
+        self.assertEqual(parse_options(text).get("DBOptions", "max_background_jobs"), "2")
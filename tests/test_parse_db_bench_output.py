@@ -0,0 +1,107 @@
+import os
+import unittest
+
+from rocksdb.parse_db_bench_output import parse_db_bench_output
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data", "db_bench")
+
+
+def recorded_output(name):
+    with open(os.path.join(DATA_DIR, name), "r") as f:
+        return f.read()
+
+
+class ParseDbBenchOutputTest(unittest.TestCase):
+
+    def test_fillrandom(self):
+        parsed = parse_db_bench_output(recorded_output("fillrandom.txt"), test_name="fillrandom")
+
+        self.assertEqual(parsed["entries"], 3000000000)
+        self.assertEqual(parsed["micros_per_op"], 5.123)
+        self.assertEqual(parsed["ops_per_sec"], 195187)
+        self.assertEqual(parsed["total_seconds"], 100.0)
+        self.assertEqual(parsed["total_operations"], 19518700)
+        self.assertEqual(parsed["data_speed"], 21.6)
+        self.assertEqual(parsed["data_speed_unit"], "MB/s")
+        self.assertEqual(parsed["ops_per_second_graph"],
+                         [[4.966718, 10.011724, 15.680568], [201340.2, 198215.7, 176402.9]])
+
+        latency = parsed["latency"]
+        self.assertEqual(latency["count"], 19518700)
+        self.assertEqual(latency["average"], 5.1234)
+        self.assertEqual(latency["max"], 12345)
+        self.assertEqual(latency["percentiles"],
+                         {"P50": 3.06, "P75": 4.51, "P99": 20.87, "P99.9": 98.44, "P99.99": 512.3})
+        self.assertEqual(len(latency["buckets"]["count"]), 19)
+        self.assertEqual(latency["buckets"]["low"][-1], 9900)
+        self.assertEqual(latency["buckets"]["cumulative_percent"][-1], 100.0)
+        self.assertNotIn("benchmarks", parsed)
+        self.assertNotIn("statistics", parsed)
+
+    def test_readrandom_after_prefill(self):
+        parsed = parse_db_bench_output(recorded_output("readrandom_prefill.txt"), test_name="readrandom")
+
+        # The measured phase is the last section, not the prefill
+        self.assertEqual(parsed["ops_per_sec"], 235287)
+        self.assertEqual(parsed["total_operations"], 235287516)
+        self.assertEqual(parsed["data_speed"], 26.0)
+        self.assertEqual(parsed["latency"]["count"], 235287516)
+        self.assertEqual(parsed["latency"]["percentiles"]["P99"], 12.4)
+        self.assertEqual(parsed["latency"]["found"], 235287516)
+        self.assertEqual(parsed["latency"]["total"], 235287516)
+
+        self.assertEqual([section["benchmark"] for section in parsed["benchmarks"]], ["fillrandom", "readrandom"])
+        prefill = parsed["benchmarks"][0]
+        self.assertEqual(prefill["ops_per_sec"], 204498)
+        self.assertEqual(list(prefill["histograms"]), ["write"])
+        self.assertEqual(prefill["histograms"]["write"]["count"], 25000000)
+        # The interval lines of both phases are kept
+        self.assertEqual(len(parsed["ops_per_second_graph"][0]), 3)
+
+    def test_mixgraph_after_prefill(self):
+        parsed = parse_db_bench_output(recorded_output("mixgraph_prefill.txt"), test_name="mixgraph")
+
+        self.assertEqual(parsed["ops_per_sec"], 120307)
+        self.assertEqual(parsed["total_seconds"], 1000.0)
+        self.assertEqual(parsed["total_operations"], 120307000)
+        # Mixed workloads are scored by their ops/sec, without a single latency histogram
+        self.assertEqual(parsed["data_speed"], 120307)
+        self.assertEqual(parsed["data_speed_unit"], "ops/sec")
+        self.assertNotIn("latency", parsed)
+
+        mixgraph = parsed["benchmarks"][1]
+        self.assertEqual(mixgraph["benchmark"], "mixgraph")
+        self.assertEqual(sorted(mixgraph["histograms"]), ["read", "write"])
+        self.assertEqual(mixgraph["histograms"]["read"]["percentiles"]["P99.9"], 80.12)
+        self.assertEqual(mixgraph["histograms"]["write"]["count"], 60153500)
+
+    def test_measured_benchmark_is_guessed_without_test_name(self):
+        parsed = parse_db_bench_output(recorded_output("readrandom_prefill.txt"))
+
+        self.assertEqual(parsed["ops_per_sec"], 235287)
+        self.assertEqual(parsed["latency"]["count"], 235287516)
+
+    def test_statistics_dump(self):
+        parsed = parse_db_bench_output(recorded_output("readrandom_statistics.txt"), test_name="readrandom")
+
+        self.assertEqual(parsed["ops_per_sec"], 199600)
+        self.assertEqual(parsed["latency"]["found"], 199600000)
+
+        statistics = parsed["statistics"]
+        self.assertEqual(statistics["tickers"]["rocksdb.block.cache.hit"], 750000)
+        self.assertEqual(statistics["hit_rates"]["block_cache_hit_rate"], 0.75)
+        self.assertEqual(statistics["hit_rates"]["block_cache_data_hit_rate"], 0.75)
+        self.assertEqual(statistics["hit_rates"]["block_cache_filter_hit_rate"], 0.75)
+        self.assertIsNone(statistics["hit_rates"]["block_cache_index_hit_rate"])
+        self.assertEqual(statistics["hit_rates"]["memtable_hit_rate"], 0.05)
+        self.assertEqual(statistics["hit_rates"]["bloom_filter_useful_rate"], 0.9)
+
+        # Only the histograms with samples are latencies
+        self.assertEqual(sorted(statistics["latencies"]), ["compaction", "get"])
+        self.assertEqual(statistics["latencies"]["get"],
+                         {"P50": 3.9, "P95": 9.8, "P99": 16.5, "P100": 6120.0, "count": 199600000, "sum": 999996000})
+
+    def test_invalid_options_file(self):
+        parsed = parse_db_bench_output("Unable to load options file /tmp/options.ini --- Invalid argument")
+
+        self.assertEqual(parsed, {"error": "Invalid options file"})
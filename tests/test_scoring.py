@@ -0,0 +1,80 @@
+import math
+import unittest
+
+from rocksdb.scoring import score, dominates, pareto_front, select_best, objective_values, parse_weights
+
+
+def run(ops_per_sec=None, p99=None, p999=None, write_amp=None):
+    result = {"ops_per_sec": ops_per_sec}
+    if p99 is not None or p999 is not None:
+        result["latency"] = {"percentiles": {"P99": p99, "P99.9": p999}}
+    if write_amp is not None:
+        result["amplification"] = {"write": write_amp}
+    return result
+
+
+class ScoringTest(unittest.TestCase):
+
+    def test_parse_weights(self):
+        weights = parse_weights("ops_per_sec=1, p999=0.5")
+
+        self.assertEqual(weights["ops_per_sec"], 1.0)
+        self.assertEqual(weights["p999"], 0.5)
+        self.assertEqual(weights["p99"], 0.0)
+        with self.assertRaises(ValueError):
+            parse_weights("throughput=1")
+
+    def test_objective_values_of_an_unmeasured_run(self):
+        values = objective_values(run(ops_per_sec=0))
+
+        self.assertTrue(all(value is None for value in values.values()))
+
+    def test_score_is_the_weighted_log_ratio(self):
+        weights = {"ops_per_sec": 1.0, "p99": 0.5}
+        reference = run(ops_per_sec=100000, p99=20.0)
+
+        self.assertEqual(score(reference, reference, weights), 0.0)
+        self.assertAlmostEqual(score(run(ops_per_sec=200000, p99=20.0), reference, weights), math.log(2))
+        # A lower latency is better
+        self.assertAlmostEqual(score(run(ops_per_sec=100000, p99=10.0), reference, weights), 0.5 * math.log(2))
+
+    def test_missing_objective_loses(self):
+        weights = {"ops_per_sec": 1.0, "p99": 1.0}
+        reference = run(ops_per_sec=100000, p99=20.0)
+
+        self.assertEqual(score(run(ops_per_sec=500000), reference, weights), -math.inf)
+        # An objective the reference did not measure is left out
+        self.assertAlmostEqual(score(run(ops_per_sec=200000, p99=5.0), run(ops_per_sec=100000), weights), math.log(2))
+
+    def test_dominates(self):
+        names = ["ops_per_sec", "p99"]
+        fast = objective_values(run(ops_per_sec=200000, p99=10.0))
+        slow = objective_values(run(ops_per_sec=100000, p99=20.0))
+        mixed = objective_values(run(ops_per_sec=300000, p99=30.0))
+        unmeasured = objective_values(run(ops_per_sec=300000))
+
+        self.assertTrue(dominates(fast, slow, names))
+        self.assertFalse(dominates(slow, fast, names))
+        self.assertFalse(dominates(fast, mixed, names))
+        self.assertFalse(dominates(fast, fast, names))
+        # Not measuring an objective is worse than any measured value
+        self.assertTrue(dominates(mixed, unmeasured, names))
+        self.assertFalse(dominates(unmeasured, mixed, names))
+
+    def test_pareto_front(self):
+        weights = {"ops_per_sec": 1.0, "p999": 1.0}
+        results = [
+            run(ops_per_sec=100000, p999=100.0),
+            run(ops_per_sec=200000, p999=150.0),
+            run(ops_per_sec=150000, p999=50.0),
+            run(ops_per_sec=90000, p999=200.0),
+        ]
+
+        self.assertEqual(pareto_front(results, weights), [1, 2])
+
+    def test_select_best(self):
+        weights = {"ops_per_sec": 1.0}
+        results = [run(ops_per_sec=100000), run(ops_per_sec=250000), run(ops_per_sec=180000)]
+
+        self.assertEqual(select_best(results, weights=weights), 1)
+        self.assertEqual(select_best(results, reference=results[2], weights=weights), 1)
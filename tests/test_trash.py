@@ -0,0 +1,94 @@
+import os
+import time
+import tempfile
+import unittest
+
+from utils.system_operations.trash import TrashDeleter, TRUNCATE_CHUNK_SIZE
+
+
+class TrashDeleterTest(unittest.TestCase):
+
+    def test_hardlinked_clone_keeps_snapshot_intact(self):
+        with tempfile.TemporaryDirectory() as root:
+            snapshot_dir = os.path.join(root, "snap")
+            db_dir = os.path.join(root, "db")
+            os.makedirs(snapshot_dir)
+            os.makedirs(db_dir)
+
+            # Larger than a truncation chunk, sparse so the test does not write it
+            size = TRUNCATE_CHUNK_SIZE + 6 * 1024 * 1024
+            snapshot_file = os.path.join(snapshot_dir, "000001.sst")
+            with open(snapshot_file, "wb") as f:
+                f.truncate(size)
+            os.link(snapshot_file, os.path.join(db_dir, "000001.sst"))
+
+            trash_deleter = TrashDeleter(0)
+            trash_deleter.trash(db_dir)
+            trash_deleter.wait_idle()
+
+            self.assertFalse(os.path.exists(db_dir))
+            self.assertEqual(os.path.getsize(snapshot_file), size)
+            self.assertEqual(os.stat(snapshot_file).st_nlink, 1)
+
+    def test_unlinking_a_hard_link_is_not_throttled(self):
+        with tempfile.TemporaryDirectory() as root:
+            snapshot_dir = os.path.join(root, "snap")
+            db_dir = os.path.join(root, "db")
+            os.makedirs(snapshot_dir)
+            os.makedirs(db_dir)
+
+            snapshot_file = os.path.join(snapshot_dir, "000001.sst")
+            with open(snapshot_file, "wb") as f:
+                f.write(b"x" * 1024 * 1024)
+            os.link(snapshot_file, os.path.join(db_dir, "000001.sst"))
+
+            # 1 MB at 64 KB/s would take 16 seconds if it were throttled
+            trash_deleter = TrashDeleter(64 * 1024)
+            start = time.time()
+            trash_deleter.trash(db_dir)
+            trash_deleter.wait_idle()
+
+            self.assertLess(time.time() - start, 2)
+            self.assertEqual(os.path.getsize(snapshot_file), 1024 * 1024)
+
+    def test_wait_for_space_deletes_unthrottled(self):
+        with tempfile.TemporaryDirectory() as root:
+            db_dir = os.path.join(root, "db")
+            os.makedirs(db_dir)
+            with open(os.path.join(db_dir, "000001.sst"), "wb") as f:
+                f.write(b"x" * 2 * 1024 * 1024)
+
+            # 2 MB at 64 KB/s would take 32 seconds if it were throttled
+            trash_deleter = TrashDeleter(64 * 1024)
+            trash_deleter.trash(db_dir)
+            # More than the whole device is never free, so it waits for the trash to be empty
+            waited = trash_deleter.wait_for_space(root, 1.01)
+
+            self.assertLess(waited, 5)
+            self.assertEqual(os.listdir(os.path.join(root, ".trash")), [])
+
+    def test_forked_child_deletes_its_trash(self):
+        with tempfile.TemporaryDirectory() as root:
+            trash_deleter = TrashDeleter(0)
+            # The parent's thread is started before the fork, like the initial run before the slots
+            os.makedirs(os.path.join(root, "parent_db"))
+            trash_deleter.trash(os.path.join(root, "parent_db"))
+            trash_deleter.wait_idle()
+
+            child_root = os.path.join(root, "slot")
+            os.makedirs(os.path.join(child_root, "db"))
+            pid = os.fork()
+            if pid == 0:
+                trash_deleter.trash(os.path.join(child_root, "db"))
+                trash_dir = os.path.join(child_root, ".trash")
+                deadline = time.time() + 5
+                while os.listdir(trash_dir) and time.time() < deadline:
+                    time.sleep(0.05)
+                os._exit(1 if os.listdir(trash_dir) else 0)
+
+            _, status = os.waitpid(pid, 0)
+            self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -32,6 +32,44 @@ env_VERSION = os.getenv("VERSION", "8.8.1")
 env_OUTPUT_PATH = os.getenv("OUTPUT_PATH", None)
 env_NUM_ENTRIES = os.getenv("NUM_ENTRIES", 3000000000)
 env_SIDE_CHECKER = os.getenv("SIDE_CHECKER", True)
+env_SIDE_CHECKER_INTERVAL = os.getenv("SIDE_CHECKER_INTERVAL", 30)
+env_PARALLEL_SLOTS = os.getenv("PARALLEL_SLOTS", 1)
+env_SLOT_DB_PATHS = os.getenv("SLOT_DB_PATHS", None)
+env_BASE_DB_CACHE = os.getenv("BASE_DB_CACHE", True)
+env_SETTLE_IDLE_WINDOW = os.getenv("SETTLE_IDLE_WINDOW", 5)
+env_SETTLE_MAX_TIMEOUT = os.getenv("SETTLE_MAX_TIMEOUT", 120)
+env_EARLY_STOP_CONFIDENCE = os.getenv("EARLY_STOP_CONFIDENCE", 0.99)
+env_STEADY_STATE = os.getenv("STEADY_STATE", False)
+env_STEADY_STATE_TOLERANCE = os.getenv("STEADY_STATE_TOLERANCE", 0.02)
+env_TRASH_DELETE_RATE = os.getenv("TRASH_DELETE_RATE", 256)
+env_BENCHMARK_BACKEND = os.getenv("BENCHMARK_BACKEND", "db_bench")
+env_WORKLOAD_FILE = os.getenv("WORKLOAD_FILE", None)
+env_LOG_STATS_DUMP_PERIOD = os.getenv("LOG_STATS_DUMP_PERIOD", 10)
+env_STATISTICS = os.getenv("STATISTICS", False)
+env_SCORING_MODE = os.getenv("SCORING_MODE", "weighted")
+env_SCORE_WEIGHTS = os.getenv("SCORE_WEIGHTS", "ops_per_sec=1")
+env_LLM_CACHE = os.getenv("LLM_CACHE", "off")
+env_LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "llm_cache")
+env_LLM_REPLAY_SESSION = os.getenv("LLM_REPLAY_SESSION", None)
+env_LLM_CONCURRENCY = os.getenv("LLM_CONCURRENCY", 4)
+env_SPECULATIVE_CANDIDATES = os.getenv("SPECULATIVE_CANDIDATES", 1)
+env_SCREENING_DURATION = os.getenv("SCREENING_DURATION", 30)
+env_SCREENING_FINALISTS = os.getenv("SCREENING_FINALISTS", 2)
+env_PROMPT_TOKEN_BUDGET = os.getenv("PROMPT_TOKEN_BUDGET", 0)
+env_LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+env_LLM_MODEL = os.getenv("LLM_MODEL", None)
+env_LLM_BASE_URL = os.getenv("LLM_BASE_URL", None)
+env_RESULT_CACHE = os.getenv("RESULT_CACHE", False)
+env_RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "result_cache")
+env_RESULT_CACHE_MEASUREMENTS = os.getenv("RESULT_CACHE_MEASUREMENTS", 1)
+env_SURROGATE = os.getenv("SURROGATE", False)
+env_SURROGATE_DIR = os.getenv("SURROGATE_DIR", "surrogate")
+env_SURROGATE_MIN_RUNS = os.getenv("SURROGATE_MIN_RUNS", 5)
+env_LOCAL_SEARCH = os.getenv("LOCAL_SEARCH", False)
+env_LOCAL_SEARCH_KNOBS = os.getenv("LOCAL_SEARCH_KNOBS", 3)
+env_LOCAL_SEARCH_DURATION = os.getenv("LOCAL_SEARCH_DURATION", 15)
+env_TRASH_MIN_FREE = os.getenv("TRASH_MIN_FREE", 20)
+env_SETTLE_DIRTY_THRESHOLD = os.getenv("SETTLE_DIRTY_THRESHOLD", 0)
 
 # Parse the arguments. They replace the environment variables if they are set
 parser = argparse.ArgumentParser(description='Description of your script')
@@ -42,6 +80,44 @@ parser.add_argument('-v', '--version', type=str, default=env_VERSION, help='Spec
 parser.add_argument('-o', '--output', type=str, default=env_OUTPUT_PATH, help='Specify the output path')
 parser.add_argument('-n', '--num_entries', type=int, default=env_NUM_ENTRIES, help='Specify the number of entries')
 parser.add_argument('-s', '--side_checker', type=bool, default=env_SIDE_CHECKER, help='Specify if side checker is enabled')
+parser.add_argument('--side_checker_interval', type=int, default=env_SIDE_CHECKER_INTERVAL, help='Specify the seconds between side checker throughput checks')
+parser.add_argument('--slots', type=int, default=env_PARALLEL_SLOTS, help='Specify the number of candidates benchmarked concurrently')
+parser.add_argument('--slot_db_paths', type=str, default=env_SLOT_DB_PATHS, help='Specify comma separated database roots for the parallel slots')
+parser.add_argument('--base_db_cache', type=lambda x: str(x).lower() in ('1', 'true', 'yes'), default=env_BASE_DB_CACHE, help='Specify if pre-populated base databases are cached and cloned')
+parser.add_argument('--settle_idle_window', type=float, default=env_SETTLE_IDLE_WINDOW, help='Specify the seconds IO and memory must stay idle before a run')
+parser.add_argument('--settle_max_timeout', type=float, default=env_SETTLE_MAX_TIMEOUT, help='Specify the maximum seconds to wait for IO and memory to settle')
+parser.add_argument('--early_stop_confidence', type=float, default=env_EARLY_STOP_CONFIDENCE, help='Specify the confidence the side checker needs before stopping a losing run')
+parser.add_argument('--steady_state', type=lambda x: str(x).lower() in ('1', 'true', 'yes'), default=env_STEADY_STATE, help='Specify if runs stop once throughput converges and are scored by the steady-state mean, a stopped run has no latency or amplification and loses on those objectives')
+parser.add_argument('--steady_state_tolerance', type=float, default=env_STEADY_STATE_TOLERANCE, help='Specify the relative confidence interval half width at which throughput has converged')
+parser.add_argument('--trash_delete_rate', type=float, default=env_TRASH_DELETE_RATE, help='Specify the background database deletion rate in MB/s, 0 for unthrottled')
+parser.add_argument('--backend', type=str, default=env_BENCHMARK_BACKEND, help='Specify the benchmark backend (db_bench, simulator)')
+parser.add_argument('--workload_file', type=str, default=env_WORKLOAD_FILE, help='Specify a JSON file of custom workloads')
+parser.add_argument('--log_stats_dump_period', type=int, default=env_LOG_STATS_DUMP_PERIOD, help='Specify the stats_dump_period_sec used during the runs so the RocksDB LOG has compaction and stall stats, 0 keeps the options file value')
+parser.add_argument('--statistics', type=lambda x: str(x).lower() in ('1', 'true', 'yes'), default=env_STATISTICS, help='Specify if db_bench collects RocksDB statistics (cache, bloom filter and memtable hit rates, latency histograms)')
+parser.add_argument('--scoring', type=str, default=env_SCORING_MODE, help='Specify how runs are ranked: weighted (weighted score of the objectives) or pareto (Pareto front, ties broken by the weighted score)')
+parser.add_argument('--score_weights', type=str, default=env_SCORE_WEIGHTS, help='Specify the objective weights as name=weight pairs, e.g. ops_per_sec=1,p999=0.5 (ops_per_sec, p99, p999, cpu, memory, write_amp)')
+parser.add_argument('--llm_cache', type=str, default=env_LLM_CACHE, help='Specify the LLM reply cache mode: off, cache (serve recorded replies, record the others) or replay (serve a recorded session, no network)')
+parser.add_argument('--llm_cache_dir', type=str, default=env_LLM_CACHE_DIR, help='Specify the directory of the LLM reply cache and the recorded sessions')
+parser.add_argument('--llm_replay_session', type=str, default=env_LLM_REPLAY_SESSION, help='Specify the recorded session to replay, the latest one if not set')
+parser.add_argument('--llm_concurrency', type=int, default=env_LLM_CONCURRENCY, help='Specify the maximum number of concurrent LLM requests')
+parser.add_argument('--candidates', type=int, default=env_SPECULATIVE_CANDIDATES, help='Specify the number of candidates generated per iteration, more than 1 screens them with short runs first')
+parser.add_argument('--screening_duration', type=int, default=env_SCREENING_DURATION, help='Specify the seconds of the short screening runs of the candidates')
+parser.add_argument('--finalists', type=int, default=env_SCREENING_FINALISTS, help='Specify the number of best screened candidates that get a full length run')
+parser.add_argument('--prompt_token_budget', type=int, default=env_PROMPT_TOKEN_BUDGET, help='Specify the token budget of the prompt history, encoded as a compact table of the changed options and scores, 0 sends every past reasoning in full')
+parser.add_argument('--llm_backend', type=str, default=env_LLM_BACKEND, help='Specify the LLM backend: openai, local (OpenAI compatible server at --llm_base_url) or rules (deterministic stand-in, no network)')
+parser.add_argument('--llm_model', type=str, default=env_LLM_MODEL, help='Specify the model requested from the LLM backend, the backend default if not set')
+parser.add_argument('--llm_base_url', type=str, default=env_LLM_BASE_URL, help='Specify the URL of the OpenAI compatible endpoint, e.g. http://localhost:8000/v1')
+parser.add_argument('--result_cache', type=lambda x: str(x).lower() in ('1', 'true', 'yes'), default=env_RESULT_CACHE, help='Specify if benchmark results are cached and reused for options files already measured on the same hardware')
+parser.add_argument('--result_cache_dir', type=str, default=env_RESULT_CACHE_DIR, help='Specify the directory of the benchmark result cache')
+parser.add_argument('--result_cache_measurements', type=int, default=env_RESULT_CACHE_MEASUREMENTS, help='Specify how many times an options file is measured before its cached results are reused, more than 1 estimates the noise')
+parser.add_argument('--surrogate', type=lambda x: str(x).lower() in ('1', 'true', 'yes'), default=env_SURROGATE, help='Specify if a surrogate model fit on the previous runs ranks the candidates and rejects the ones unlikely to beat the best run, keeping at least the most promising one')
+parser.add_argument('--surrogate_dir', type=str, default=env_SURROGATE_DIR, help='Specify the directory the surrogate observations are kept in across sessions')
+parser.add_argument('--surrogate_min_runs', type=int, default=env_SURROGATE_MIN_RUNS, help='Specify the number of runs the surrogate needs before it ranks candidates')
+parser.add_argument('--local_search', type=lambda x: str(x).lower() in ('1', 'true', 'yes'), default=env_LOCAL_SEARCH, help='Specify if the numeric options the LLM changed are refined with a local search of short runs')
+parser.add_argument('--local_search_knobs', type=int, default=env_LOCAL_SEARCH_KNOBS, help='Specify the number of numeric options the local search refines')
+parser.add_argument('--local_search_duration', type=int, default=env_LOCAL_SEARCH_DURATION, help='Specify the seconds of the first local search runs, doubled every halving')
+parser.add_argument('--trash_min_free', type=float, default=env_TRASH_MIN_FREE, help='Specify the percentage of the device that must be free before a run, the run waits for the trash to be deleted until it is')
+parser.add_argument('--settle_dirty_threshold', type=float, default=env_SETTLE_DIRTY_THRESHOLD, help='Specify the dirty and writeback memory in MB still considered idle before a run, 0 for the kernel background writeback threshold')
 
 args = parser.parse_args()
 CASE_NUMBER = args.case
@@ -51,6 +127,44 @@ VERSION = args.version
 OUTPUT_PATH = args.output if args.output else path_of_output_folder()
 NUM_ENTRIES = args.num_entries
 SIDE_CHECKER = args.side_checker
+SIDE_CHECKER_INTERVAL = args.side_checker_interval
+PARALLEL_SLOTS = args.slots
+SLOT_DB_PATHS = args.slot_db_paths
+BASE_DB_CACHE = args.base_db_cache
+SETTLE_IDLE_WINDOW = args.settle_idle_window
+SETTLE_MAX_TIMEOUT = args.settle_max_timeout
+EARLY_STOP_CONFIDENCE = args.early_stop_confidence
+STEADY_STATE = args.steady_state
+STEADY_STATE_TOLERANCE = args.steady_state_tolerance
+TRASH_DELETE_RATE = args.trash_delete_rate
+BENCHMARK_BACKEND = args.backend
+WORKLOAD_FILE = args.workload_file
+LOG_STATS_DUMP_PERIOD = args.log_stats_dump_period
+STATISTICS = args.statistics
+SCORING_MODE = args.scoring
+SCORE_WEIGHTS = args.score_weights
+LLM_CACHE = args.llm_cache
+LLM_CACHE_DIR = args.llm_cache_dir
+LLM_REPLAY_SESSION = args.llm_replay_session
+LLM_CONCURRENCY = args.llm_concurrency
+SPECULATIVE_CANDIDATES = args.candidates
+SCREENING_DURATION = args.screening_duration
+SCREENING_FINALISTS = args.finalists
+PROMPT_TOKEN_BUDGET = args.prompt_token_budget
+LLM_BACKEND = args.llm_backend
+LLM_MODEL = args.llm_model
+LLM_BASE_URL = args.llm_base_url
+RESULT_CACHE = args.result_cache
+RESULT_CACHE_DIR = args.result_cache_dir
+RESULT_CACHE_MEASUREMENTS = args.result_cache_measurements
+SURROGATE = args.surrogate
+SURROGATE_DIR = args.surrogate_dir
+SURROGATE_MIN_RUNS = args.surrogate_min_runs
+LOCAL_SEARCH = args.local_search
+LOCAL_SEARCH_KNOBS = args.local_search_knobs
+LOCAL_SEARCH_DURATION = args.local_search_duration
+TRASH_MIN_FREE = args.trash_min_free
+SETTLE_DIRTY_THRESHOLD = args.settle_dirty_threshold
 
 # Constants
 # DB_BENCH_PATH = f"/data/gpt_project/rocksdb-{VERSION}/db_bench"
@@ -60,3 +174,5 @@ FIO_RESULT_PATH = f"/data/gpt_project/gpt-assisted-rocksdb-config/data/fio/fio_o
 DEFAULT_OPTION_FILE_DIR = "options_files/default_options_files"
 INITIAL_OPTIONS_FILE_NAME = f"dbbench_default_options-{VERSION}.ini"
 OPTIONS_FILE_DIR = f"{OUTPUT_PATH}/options_file.ini"
+SLOT_CGROUP_ROOT = "/sys/fs/cgroup/elmo-tune"
+BASE_DB_CACHE_DIR = os.getenv("BASE_DB_CACHE_DIR", f"/{DEVICE}/gpt_project/base_db_cache")
\ No newline at end of file
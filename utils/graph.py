@@ -1,6 +1,6 @@
 import matplotlib.pyplot as plt
 
-def plot(values, title, file):
+def plot(values, title, file, ylim=(0, 400000)):
     '''
     Plots a single line graph based on a list of values.
 
@@ -10,6 +10,7 @@ def plot(values, title, file):
     values (list): A list of numerical values to be plotted.
     title (str): The title of the plot.
     file (str): The file path where the plot image will be saved.
+    ylim (tuple): The Y-axis range, None to fit the values.
 
     Returns:
     - None. The plot is saved to the specified file path.
@@ -23,7 +24,8 @@ def plot(values, title, file):
     plt.legend()
     plt.grid(True)
 
-    plt.ylim(0, 400000)
+    if ylim is not None:
+        plt.ylim(*ylim)
 
     # Save the plot to a file
     plt.savefig(file)
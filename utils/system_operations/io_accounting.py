@@ -0,0 +1,193 @@
+import os
+import math
+import time
+import threading
+
+from utils.system_operations.settle import cgroup_path
+from utils.system_operations.resource_sampler import read_io
+
+# db_bench defaults when the workload does not set --key_size / --value_size
+DEFAULT_KEY_SIZE = 16
+DEFAULT_VALUE_SIZE = 100
+
+
+def directory_size(path):
+    '''
+    Function to compute the size of a directory
+
+    Parameters:
+    - path (str): The directory
+
+    Returns:
+    - size (int): The total size of the files in bytes, 0 if the directory does not exist
+    '''
+    size = 0
+    try:
+        for root, _, files in os.walk(path):
+            for file_name in files:
+                try:
+                    size += os.stat(os.path.join(root, file_name)).st_size
+                except OSError:
+                    # Files are deleted by compactions while walking
+                    pass
+    except OSError:
+        pass
+    return size
+
+
+def io_cgroup():
+    '''
+    Function to find the cgroup whose IO counters belong to the current process only
+
+    Returns:
+    - cgroup (str): The cgroup directory, None if it has no io.stat (io controller not enabled)
+    '''
+    path = cgroup_path()
+    if path is None or not os.path.exists(os.path.join(path, "io.stat")):
+        return None
+    return path
+
+
+class IOAccounting:
+    '''
+    Measure the bytes read and written on the device backing the database during a run,
+    and scan the size of the database directory periodically in a background thread.
+
+    The bytes are read from the io.stat of the cgroup when one is given, otherwise from
+    /proc/diskstats, where the other processes using the same device are accounted too.
+    When other slots share the device and no cgroup counters are available, the bytes
+    are marked as shared and no read or write amplification is computed from them.
+    '''
+
+    def __init__(self, device, database_path, cgroup=None, shared_device=False, scan_interval=10.0):
+        '''
+        Parameters:
+        - device (str): The device name in /proc/diskstats
+        - database_path (str): The database directory
+        - cgroup (str): The cgroup of the run, None to use the device counters
+        - shared_device (bool): If other slots run on the same device
+        - scan_interval (float): Seconds between two directory size scans
+        '''
+        self.device = device
+        self.cgroup = cgroup
+        self.shared_device = shared_device
+        self.database_path = database_path
+        self.scan_interval = scan_interval
+        self.db_size_timeline = [[], []]
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.start_stats = None
+        self.start_time = None
+
+    def start(self):
+        self.start_time = time.time()
+        self.start_stats = read_io(self.cgroup, self.device)
+        self.thread = threading.Thread(target=self._scan, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        '''
+        Stop the accounting
+
+        Returns:
+        - device_io (dict): Device bytes and IOs during the run, and the database size over time
+        '''
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+        end_stats = read_io(self.cgroup, self.device)
+        final_size = directory_size(self.database_path)
+        self.db_size_timeline[0].append(round(time.time() - self.start_time, 3))
+        self.db_size_timeline[1].append(final_size)
+
+        return {
+            "device": self.device,
+            "source": "cgroup" if self.cgroup is not None else "device",
+            # The device counters include the IO of the other slots
+            "shared": self.shared_device and self.cgroup is None,
+            "read_bytes": end_stats["read_bytes"] - self.start_stats["read_bytes"],
+            "write_bytes": end_stats["write_bytes"] - self.start_stats["write_bytes"],
+            "read_ios": end_stats["read_ios"] - self.start_stats["read_ios"],
+            "write_ios": end_stats["write_ios"] - self.start_stats["write_ios"],
+            "db_size_bytes": final_size,
+            "peak_db_size_bytes": max(self.db_size_timeline[1]),
+            "db_size_timeline": self.db_size_timeline,
+        }
+
+    def _scan(self):
+        while not self.stop_event.wait(self.scan_interval):
+            self.db_size_timeline[0].append(round(time.time() - self.start_time, 3))
+            self.db_size_timeline[1].append(directory_size(self.database_path))
+
+
+def flag_value(flags, name, default):
+    '''
+    Function to read a numeric db_bench flag from a list of flags
+
+    Parameters:
+    - flags (list): The db_bench flags
+    - name (str): The flag name without the leading dashes
+    - default (float): The value when the flag is not set
+
+    Returns:
+    - value (float): The flag value
+    '''
+    for flag in flags:
+        if flag.startswith(f"--{name}="):
+            return float(flag.split("=", 1)[1])
+    return default
+
+
+def compute_amplification(device_io, total_operations, workload, num_entries):
+    '''
+    Function to compute the write, read and space amplification of a run
+
+    - write amplification: device bytes written / bytes written by the application
+    - read amplification: device bytes read / bytes read by the application
+    - space amplification: database size / size of the live key-value pairs
+
+    The application bytes are estimated from the number of operations, the read/write
+    fractions of the workload and the key and value sizes. Random inserts overwrite
+    existing keys, the number of live keys is the expected number of distinct keys.
+    Device bytes shared with other slots give no write or read amplification.
+
+    Parameters:
+    - device_io (dict): The result of IOAccounting.stop
+    - total_operations (int): The number of operations of the measured phase
+    - workload (dict): The workload from the registry
+    - num_entries (int): The key space of the measured phase
+
+    Returns:
+    - amplification (dict): The amplification factors, None where they cannot be estimated
+    '''
+    if device_io is None or not total_operations:
+        return None
+
+    flags = workload["flags"]
+    entry_size = flag_value(flags, "key_size", DEFAULT_KEY_SIZE) + flag_value(flags, "value_size", DEFAULT_VALUE_SIZE)
+    write_fraction = workload.get("write_fraction")
+    read_fraction = workload.get("read_fraction")
+
+    user_write_bytes = total_operations * write_fraction * entry_size if write_fraction else None
+    user_read_bytes = total_operations * read_fraction * entry_size if read_fraction else None
+
+    # Live keys: the prefilled keys plus the distinct keys among the random inserts
+    key_space = (workload["num"] or num_entries)
+    live_keys = 0
+    if workload["prefill"] is not None:
+        live_keys = workload["prefill"]["num"] or num_entries
+    if write_fraction:
+        inserted = total_operations * write_fraction
+        live_keys = max(live_keys, key_space * (1 - math.exp(-inserted / key_space)))
+    live_bytes = live_keys * entry_size
+
+    shared = device_io.get("shared", False)
+    return {
+        "write": device_io["write_bytes"] / user_write_bytes if user_write_bytes and not shared else None,
+        "read": device_io["read_bytes"] / user_read_bytes if user_read_bytes and not shared else None,
+        "space": device_io["db_size_bytes"] / live_bytes if live_bytes else None,
+        "user_write_bytes": user_write_bytes,
+        "user_read_bytes": user_read_bytes,
+        "live_bytes": live_bytes,
+    }
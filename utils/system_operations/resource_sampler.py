@@ -0,0 +1,207 @@
+import os
+import time
+import bisect
+import threading
+
+from utils.system_operations.settle import cgroup_path, read_diskstats
+
+
+def read_cpu_usec(cgroup):
+    '''
+    Function to read the CPU time used so far
+
+    Parameters:
+    - cgroup (str): The cgroup directory, None to use the whole machine
+
+    Returns:
+    - usage_usec (float): CPU time in microseconds
+    '''
+    if cgroup is not None:
+        try:
+            with open(os.path.join(cgroup, "cpu.stat"), "r") as f:
+                for line in f:
+                    key, value = line.split()
+                    if key == "usage_usec":
+                        return float(value)
+        except OSError:
+            pass
+
+    # /proc/stat reports jiffies, everything but idle and iowait counts as busy
+    with open("/proc/stat", "r") as f:
+        fields = [int(value) for value in f.readline().split()[1:]]
+    busy = sum(fields) - fields[3] - fields[4]
+    return busy * 1e6 / os.sysconf("SC_CLK_TCK")
+
+
+def read_memory(cgroup):
+    '''
+    Function to read the anonymous (RSS) and page cache memory
+
+    Parameters:
+    - cgroup (str): The cgroup directory, None to use the whole machine
+
+    Returns:
+    - rss_bytes (int): Anonymous memory in bytes
+    - page_cache_bytes (int): Page cache in bytes
+    '''
+    if cgroup is not None:
+        try:
+            stats = {}
+            with open(os.path.join(cgroup, "memory.stat"), "r") as f:
+                for line in f:
+                    key, value = line.split()
+                    stats[key] = int(value)
+            return stats.get("anon", 0), stats.get("file", 0)
+        except OSError:
+            pass
+
+    meminfo = {}
+    with open("/proc/meminfo", "r") as f:
+        for line in f:
+            key, value = line.split(":", 1)
+            meminfo[key] = int(value.split()[0]) * 1024
+    return meminfo.get("AnonPages", 0), meminfo.get("Cached", 0)
+
+
+def read_io(cgroup, device):
+    '''
+    Function to read the IO counters
+
+    Parameters:
+    - cgroup (str): The cgroup directory, None to use the device counters
+    - device (str): The device name used when the cgroup counters are not available
+
+    Returns:
+    - io (dict): read/write bytes and read/write IO counts
+    '''
+    if cgroup is not None:
+        io = {"read_bytes": 0, "write_bytes": 0, "read_ios": 0, "write_ios": 0}
+        keys = {"rbytes": "read_bytes", "wbytes": "write_bytes", "rios": "read_ios", "wios": "write_ios"}
+        try:
+            with open(os.path.join(cgroup, "io.stat"), "r") as f:
+                for line in f:
+                    for field in line.split()[1:]:
+                        key, value = field.split("=", 1)
+                        if key in keys:
+                            io[keys[key]] += int(value)
+            return io
+        except OSError:
+            pass
+
+    return read_diskstats(device)
+
+
+class ResourceSampler:
+    '''
+    Sample CPU, memory and IO every interval in a background thread
+
+    The samples are kept as compact per-metric arrays aligned with the
+    --stats_interval_seconds ops/sec series of db_bench.
+    '''
+
+    METRICS = ["cpu_percent", "rss_bytes", "page_cache_bytes",
+               "read_bytes", "write_bytes", "read_iops", "write_iops"]
+
+    def __init__(self, device=None, interval=1.0):
+        '''
+        Parameters:
+        - device (str): The device backing the database, used without cgroup IO counters
+        - interval (float): Seconds between two samples
+        '''
+        self.device = device
+        self.interval = interval
+        self.cgroup = cgroup_path()
+        self.timeline = {"t": []}
+        for metric in self.METRICS:
+            self.timeline[metric] = []
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        '''
+        Stop sampling
+
+        Returns:
+        - timeline (dict): "t" (seconds since start) and one list per metric
+        '''
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        return self.timeline
+
+    def _run(self):
+        start_time = previous_time = time.time()
+        previous_cpu = read_cpu_usec(self.cgroup)
+        previous_io = read_io(self.cgroup, self.device)
+
+        while not self.stop_event.wait(self.interval):
+            now = time.time()
+            cpu = read_cpu_usec(self.cgroup)
+            io = read_io(self.cgroup, self.device)
+            rss_bytes, page_cache_bytes = read_memory(self.cgroup)
+            elapsed = now - previous_time
+
+            self.timeline["t"].append(round(now - start_time, 3))
+            self.timeline["cpu_percent"].append(round((cpu - previous_cpu) / (elapsed * 1e6) * 100, 1))
+            self.timeline["rss_bytes"].append(rss_bytes)
+            self.timeline["page_cache_bytes"].append(page_cache_bytes)
+            self.timeline["read_bytes"].append(io["read_bytes"] - previous_io["read_bytes"])
+            self.timeline["write_bytes"].append(io["write_bytes"] - previous_io["write_bytes"])
+            self.timeline["read_iops"].append(round((io["read_ios"] - previous_io["read_ios"]) / elapsed, 1))
+            self.timeline["write_iops"].append(round((io["write_ios"] - previous_io["write_ios"]) / elapsed, 1))
+
+            previous_time, previous_cpu, previous_io = now, cpu, io
+
+
+def summarize_timeline(timeline, ops_per_second_graph):
+    '''
+    Function to summarize the resource timeline, including the resource usage during throughput dips
+
+    A dip is a second whose throughput is below 70% of the median throughput, the
+    resources are looked up at the closest sampled second.
+
+    Parameters:
+    - timeline (dict): The timeline returned by ResourceSampler.stop
+    - ops_per_second_graph (list): [timestamps, ops/sec] of the run
+
+    Returns:
+    - summary (dict): Averages and peaks of every metric, and the averages during the dips
+    '''
+    if not timeline or not timeline.get("t"):
+        return None
+
+    def average(values):
+        return sum(values) / len(values) if values else 0.0
+
+    summary = {
+        "avg_cpu_percent": average(timeline["cpu_percent"]),
+        "peak_cpu_percent": max(timeline["cpu_percent"]),
+        "peak_rss_bytes": max(timeline["rss_bytes"]),
+        "peak_page_cache_bytes": max(timeline["page_cache_bytes"]),
+        "avg_read_bytes_per_sec": average(timeline["read_bytes"]),
+        "avg_write_bytes_per_sec": average(timeline["write_bytes"]),
+        "peak_read_iops": max(timeline["read_iops"]),
+        "peak_write_iops": max(timeline["write_iops"]),
+    }
+
+    timestamps, ops = ops_per_second_graph
+    if not ops:
+        return summary
+
+    median_ops = sorted(ops)[len(ops) // 2]
+    dip_indexes = set()
+    for timestamp, value in zip(timestamps, ops):
+        if value < 0.7 * median_ops:
+            index = min(bisect.bisect_left(timeline["t"], timestamp), len(timeline["t"]) - 1)
+            dip_indexes.add(index)
+
+    summary["dip_seconds"] = len(dip_indexes)
+    if dip_indexes:
+        summary["dip_avg_cpu_percent"] = average([timeline["cpu_percent"][i] for i in dip_indexes])
+        summary["dip_avg_write_bytes_per_sec"] = average([timeline["write_bytes"][i] for i in dip_indexes])
+        summary["dip_avg_read_bytes_per_sec"] = average([timeline["read_bytes"][i] for i in dip_indexes])
+    return summary
@@ -0,0 +1,207 @@
+import os
+import time
+
+SECTOR_SIZE = 512
+
+
+def device_of_path(path):
+    '''
+    Function to find the block device backing a path
+
+    Parameters:
+    - path (str): A file or directory path, it does not need to exist yet
+
+    Returns:
+    - device (str): The device name as listed in /proc/diskstats (e.g. nvme0n1p1), None if unknown
+    '''
+    # The database directory is usually deleted at this point, use the closest existing parent
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        path = os.path.dirname(path)
+
+    st_dev = os.stat(path).st_dev
+    try:
+        with open(f"/sys/dev/block/{os.major(st_dev)}:{os.minor(st_dev)}/uevent", "r") as f:
+            for line in f:
+                if line.startswith("DEVNAME="):
+                    return line.strip().split("=", 1)[1]
+    except OSError:
+        pass
+    return None
+
+
+def read_diskstats(device=None):
+    '''
+    Function to read the IO counters of a device from /proc/diskstats
+
+    Parameters:
+    - device (str): The device name, None to sum every whole disk
+
+    Returns:
+    - stats (dict): read/write bytes, completed read/write IOs and IOs in flight
+    '''
+    stats = {"read_bytes": 0, "write_bytes": 0, "read_ios": 0, "write_ios": 0, "in_flight": 0}
+    with open("/proc/diskstats", "r") as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) < 14:
+                continue
+            name = fields[2]
+            if device is not None and name != device:
+                continue
+            # Skip partitions and virtual devices when summing, they would be counted twice
+            if device is None and not os.path.exists(f"/sys/block/{name}/device"):
+                continue
+            stats["read_ios"] += int(fields[3])
+            stats["read_bytes"] += int(fields[5]) * SECTOR_SIZE
+            stats["write_ios"] += int(fields[7])
+            stats["write_bytes"] += int(fields[9]) * SECTOR_SIZE
+            stats["in_flight"] += int(fields[11])
+    return stats
+
+
+def read_meminfo_dirty():
+    '''
+    Function to read the dirty and writeback page counters from /proc/meminfo
+
+    Returns:
+    - dirty_kb (int): Dirty + Writeback memory in kB
+    '''
+    dirty_kb = 0
+    with open("/proc/meminfo", "r") as f:
+        for line in f:
+            if line.startswith(("Dirty:", "Writeback:")):
+                dirty_kb += int(line.split()[1])
+    return dirty_kb
+
+
+def dirty_background_threshold_kb():
+    '''
+    Function to read the dirty memory at which the kernel starts the background writeback
+
+    Returns:
+    - threshold_kb (int): vm.dirty_background_bytes, or vm.dirty_background_ratio of the available memory, in kB
+    '''
+    with open("/proc/sys/vm/dirty_background_bytes", "r") as f:
+        threshold_bytes = int(f.read())
+    if threshold_bytes:
+        return threshold_bytes // 1024
+
+    with open("/proc/sys/vm/dirty_background_ratio", "r") as f:
+        ratio = int(f.read())
+    with open("/proc/meminfo", "r") as f:
+        for line in f:
+            if line.startswith("MemAvailable:"):
+                return int(line.split()[1]) * ratio // 100
+    return 0
+
+
+def cgroup_path():
+    '''
+    Function to find the cgroup v2 directory of the current process
+
+    Returns:
+    - path (str): The cgroup directory, None if cgroup v2 is not mounted
+    '''
+    try:
+        with open("/proc/self/cgroup", "r") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    path = os.path.join("/sys/fs/cgroup", line.strip()[3:].lstrip("/"))
+                    return path if os.path.isdir(path) else None
+    except OSError:
+        pass
+    return None
+
+
+def read_cgroup_stats():
+    '''
+    Function to read the IO and dirty memory counters of the current cgroup
+
+    Returns:
+    - stats (dict): io bytes and dirty/writeback bytes, empty if not available
+    '''
+    path = cgroup_path()
+    if path is None:
+        return {}
+
+    stats = {"io_bytes": 0, "dirty_bytes": 0}
+    try:
+        with open(os.path.join(path, "io.stat"), "r") as f:
+            for line in f:
+                for field in line.split()[1:]:
+                    key, value = field.split("=", 1)
+                    if key in ("rbytes", "wbytes"):
+                        stats["io_bytes"] += int(value)
+    except OSError:
+        pass
+    try:
+        with open(os.path.join(path, "memory.stat"), "r") as f:
+            for line in f:
+                key, value = line.split()
+                if key in ("file_dirty", "file_writeback"):
+                    stats["dirty_bytes"] += int(value)
+    except OSError:
+        pass
+    return stats
+
+
+def wait_for_quiescence(device=None, idle_window=5, max_timeout=120, poll_interval=1,
+                        io_threshold_bytes=1024 * 1024, dirty_threshold_kb=None):
+    '''
+    Function to wait until the device and the memory are idle
+
+    The system counts as idle when, for idle_window consecutive seconds, less than
+    io_threshold_bytes per poll hit the device and the cgroup, no IO is in flight and
+    the dirty + writeback memory grows by less than io_threshold_bytes per poll and
+    stays under dirty_threshold_kb. By default the threshold is the point at which the
+    kernel starts writing back in the background, so it scales with the memory size.
+
+    Parameters:
+    - device (str): The device to watch, None for every disk
+    - idle_window (float): Seconds the system has to stay idle
+    - max_timeout (float): Maximum seconds to wait
+    - poll_interval (float): Seconds between samples
+    - io_threshold_bytes (int): IO bytes per poll still considered idle
+    - dirty_threshold_kb (int): Dirty memory still considered idle, None for the kernel background threshold
+
+    Returns:
+    - settled (bool): True if the system became idle before the timeout
+    - waited (float): Seconds waited
+    '''
+    if dirty_threshold_kb is None:
+        dirty_threshold_kb = dirty_background_threshold_kb()
+
+    start_time = time.time()
+    idle_since = None
+    previous_disk = read_diskstats(device)
+    previous_cgroup = read_cgroup_stats()
+    previous_dirty_kb = read_meminfo_dirty()
+
+    while True:
+        time.sleep(poll_interval)
+        now = time.time()
+        disk = read_diskstats(device)
+        cgroup = read_cgroup_stats()
+
+        disk_bytes = (disk["read_bytes"] + disk["write_bytes"]
+                      - previous_disk["read_bytes"] - previous_disk["write_bytes"])
+        cgroup_bytes = cgroup.get("io_bytes", 0) - previous_cgroup.get("io_bytes", 0)
+        system_dirty_kb = read_meminfo_dirty()
+        dirty_kb = max(system_dirty_kb, cgroup.get("dirty_bytes", 0) // 1024)
+        # A process still writing into the page cache is not idle, even under the threshold
+        dirty_growth_kb = system_dirty_kb - previous_dirty_kb
+        previous_disk, previous_cgroup, previous_dirty_kb = disk, cgroup, system_dirty_kb
+
+        idle = (disk_bytes < io_threshold_bytes and cgroup_bytes < io_threshold_bytes
+                and disk["in_flight"] == 0 and dirty_growth_kb < io_threshold_bytes // 1024
+                and dirty_kb < dirty_threshold_kb)
+        if not idle:
+            idle_since = None
+        elif idle_since is None:
+            idle_since = now
+
+        if idle_since is not None and now - idle_since >= idle_window:
+            return True, now - start_time
+        if now - start_time >= max_timeout:
+            return False, now - start_time
@@ -0,0 +1,224 @@
+import os
+import time
+import shutil
+import threading
+from collections import deque
+
+TRASH_DIR_NAME = ".trash"
+# Large files are truncated in chunks so their extents are freed gradually
+TRUNCATE_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+class TrashDeleter:
+    '''
+    Background database teardown
+
+    Directories are renamed into a trash directory on the same file system (atomic and
+    instant) and deleted by a throttled background thread. The benchmark pauses the
+    deleter while it runs so the deletion IO never overlaps a measurement window.
+    '''
+
+    def __init__(self, rate_bytes_per_sec):
+        '''
+        Parameters:
+        - rate_bytes_per_sec (float): Maximum deletion rate, 0 for unthrottled
+        '''
+        self.rate_bytes_per_sec = rate_bytes_per_sec
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.paused = False
+        self.busy = False
+        self.unthrottled = False
+        self.thread = None
+        # A forked child (e.g. a slot worker) does not inherit the thread
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        '''
+        Start over in a forked child: the parent's thread does not exist there, its lock may
+        have been held at fork time and its queue is the parent's to delete
+        '''
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.paused = False
+        self.busy = False
+        self.unthrottled = False
+        self.thread = None
+
+    def trash(self, path):
+        '''
+        Move a directory to the trash and schedule its deletion
+
+        Parameters:
+        - path (str): The directory to delete
+
+        Returns:
+        - None
+        '''
+        path = os.path.abspath(path)
+        trash_dir = os.path.join(os.path.dirname(path), TRASH_DIR_NAME)
+        os.makedirs(trash_dir, exist_ok=True)
+
+        with self.condition:
+            # Pick up the leftovers of a previous session
+            for leftover in os.listdir(trash_dir):
+                leftover_path = os.path.join(trash_dir, leftover)
+                if leftover_path not in self.queue:
+                    self.queue.append(leftover_path)
+
+            if os.path.exists(path):
+                trashed_path = os.path.join(trash_dir, f"{os.path.basename(path)}-{time.time_ns()}")
+                os.rename(path, trashed_path)
+                self.queue.append(trashed_path)
+
+            self.condition.notify_all()
+
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._worker, daemon=True)
+            self.thread.start()
+
+    def pause(self):
+        '''
+        Pause the deletion, returns once no file is being deleted
+
+        Returns:
+        - None
+        '''
+        with self.condition:
+            self.paused = True
+            while self.busy:
+                self.condition.wait()
+
+    def resume(self):
+        '''
+        Resume the deletion
+
+        Returns:
+        - None
+        '''
+        with self.condition:
+            self.paused = False
+            self.condition.notify_all()
+
+    def wait_idle(self):
+        '''
+        Wait until the trash is empty
+
+        Returns:
+        - None
+        '''
+        with self.condition:
+            while self.queue or self.busy:
+                self.condition.wait()
+
+    def wait_for_space(self, path, min_free_fraction):
+        '''
+        Wait until the device of path has enough free space or the trash is empty
+
+        The deletion only runs between the runs, so a trash that grows faster than it is
+        deleted (e.g. a large database deleted at a low rate) would fill the device. The
+        deleter must not be paused while waiting, and is not throttled since no run is measuring.
+
+        Parameters:
+        - path (str): A path on the device to check
+        - min_free_fraction (float): The fraction of the device that must be free
+
+        Returns:
+        - waited (float): Seconds waited
+        '''
+        start_time = time.time()
+        with self.condition:
+            self.unthrottled = True
+            try:
+                while self.queue or self.busy:
+                    usage = shutil.disk_usage(path)
+                    if usage.free >= min_free_fraction * usage.total:
+                        break
+                    self.condition.wait(timeout=1)
+            finally:
+                self.unthrottled = False
+        return time.time() - start_time
+
+    def _wait_turn(self):
+        '''
+        Block while paused, then mark the deleter busy
+        '''
+        with self.condition:
+            while self.paused:
+                self.condition.wait()
+            self.busy = True
+
+    def _release_turn(self):
+        with self.condition:
+            self.busy = False
+            self.condition.notify_all()
+
+    def _throttle(self, deleted_bytes):
+        if self.rate_bytes_per_sec > 0 and not self.unthrottled:
+            time.sleep(deleted_bytes / self.rate_bytes_per_sec)
+
+    def _delete_file(self, file_path):
+        '''
+        Delete one file, truncating large files chunk by chunk with a pause check between chunks
+
+        A file with other hard links (e.g. the SST files cloned from a cached base database)
+        is only unlinked, truncating it would truncate the other links too. Unlinking it
+        frees no blocks, so it is not throttled either. Otherwise only the allocated bytes
+        are throttled, a sparse file frees less than its size.
+        '''
+        stat = os.lstat(file_path)
+        if stat.st_nlink > 1:
+            self._wait_turn()
+            try:
+                os.unlink(file_path)
+            finally:
+                self._release_turn()
+            return
+
+        size = stat.st_size
+        allocated = stat.st_blocks * 512
+        while size > TRUNCATE_CHUNK_SIZE:
+            self._wait_turn()
+            try:
+                size -= TRUNCATE_CHUNK_SIZE
+                os.truncate(file_path, size)
+                freed = allocated - os.lstat(file_path).st_blocks * 512
+                allocated -= freed
+            finally:
+                self._release_turn()
+            self._throttle(freed)
+
+        self._wait_turn()
+        try:
+            os.unlink(file_path)
+        finally:
+            self._release_turn()
+        self._throttle(allocated)
+
+    def _delete_tree(self, path):
+        if not os.path.isdir(path) or os.path.islink(path):
+            self._delete_file(path)
+            return
+
+        for root, dirs, files in os.walk(path, topdown=False):
+            for file_name in files:
+                self._delete_file(os.path.join(root, file_name))
+            for dir_name in dirs:
+                os.rmdir(os.path.join(root, dir_name))
+        os.rmdir(path)
+
+    def _worker(self):
+        while True:
+            with self.condition:
+                while not self.queue:
+                    self.condition.wait()
+                path = self.queue[0]
+
+            try:
+                self._delete_tree(path)
+            except OSError as e:
+                print(f"[TRS] Failed to delete {path}: {e}")
+
+            with self.condition:
+                self.queue.popleft()
+                self.condition.notify_all()
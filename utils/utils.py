@@ -4,7 +4,8 @@ import getpass
 from datetime import datetime
 from collections import defaultdict
 from deepdiff import DeepDiff
-from utils.constants import OUTPUT_PATH, DEVICE, DB_PATH
+from utils.constants import OUTPUT_PATH, DEVICE, DB_PATH, SCORING_MODE
+from rocksdb.scoring import select_best, pareto_front, objective_values, score
 
 # LOG UTILS
 def log_update(update_string):
@@ -58,7 +59,8 @@ def store_best_option_file(options_files, output_folder_dir):
     - options_files (list): List of options files
     - output_folder_dir (str): The output directory
     '''
-    best_result = max(options_files, key=lambda x: x[1]["ops_per_sec"])
+    results = [options_file[1] for options_file in options_files]
+    best_result = options_files[select_best(results)]
     best_options = best_result[0]
     best_reasoning = best_result[2]
     with open(f"{output_folder_dir}/best_options.ini", "w") as f:
@@ -66,6 +68,14 @@ def store_best_option_file(options_files, output_folder_dir):
         for line in best_reasoning.splitlines():
             f.write("# " + line + "\n")
 
+    # The trade-offs between the objectives, the best file is one of them
+    if SCORING_MODE == "pareto":
+        front = [{"iteration": index, "objectives": objective_values(results[index]),
+                  "score": score(results[index], results[0])}
+                 for index in pareto_front(results)]
+        with open(f"{output_folder_dir}/pareto_front.json", "w") as f:
+            json.dump(front, f, indent=4)
+
 def store_diff_options_list(options_list, output_folder_dir):
     # Calculate differences between options_list
     differences = calculate_differences(options_list)
@@ -79,7 +89,7 @@ def store_diff_options_list(options_list, output_folder_dir):
             f.write("=" * 50)
             f.write("\n\n")
 
-            for key in diff["values_changed"]:
+            for key in diff.get("values_changed", {}):
                 changed_fields_frequency[key] += 1
 
         f.write("\n\n[MFN] Changed Fields Frequency:\n")